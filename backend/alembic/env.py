@@ -1,6 +1,14 @@
-"""Alembic environment configuration for async SQLAlchemy migrations."""
+"""Alembic environment configuration for async SQLAlchemy migrations.
+
+Every migration runs in its own transaction (``transaction_per_migration``),
+so helpers in :mod:`app.migrations` can step outside it for
+``CREATE INDEX CONCURRENTLY`` and batched backfills. ``lock_timeout`` is set
+to ``MIGRATION_LOCK_TIMEOUT_MS``, so DDL that would queue behind a long
+transaction, and block the traffic behind it, fails instead.
+"""
 
 import asyncio
+import logging
 from logging.config import fileConfig
 
 from sqlalchemy import pool
@@ -9,7 +17,16 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from alembic import context
 from app.config import settings
 from app.database import Base
-from app.models import StatusUpdate, User  # noqa: F401 — register models with Base.metadata
+from app.migrations import is_lock_timeout, set_lock_timeout
+from app.models import (  # noqa: F401 — register models with Base.metadata
+    CategoryDailyCount,
+    FeedEntry,
+    PresenceSession,
+    PresenceWorker,
+    RateLimitBucket,
+    StatusUpdate,
+    User,
+)
 
 config = context.config
 if config.config_file_name is not None:
@@ -17,6 +34,8 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+logger = logging.getLogger("alembic.env")
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -29,15 +48,23 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
+        context.execute(f"SET lock_timeout = {settings.MIGRATION_LOCK_TIMEOUT_MS}")
         context.run_migrations()
 
 
 def do_run_migrations(connection) -> None:  # type: ignore[no-untyped-def]
     """Run migrations using the provided connection."""
-    context.configure(connection=connection, target_metadata=target_metadata)
+    set_lock_timeout(connection, settings.MIGRATION_LOCK_TIMEOUT_MS)
+    connection.commit()
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -47,10 +74,22 @@ async def run_async_migrations() -> None:
     """Create an async engine and run migrations."""
     connectable = create_async_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
 
-    async with connectable.connect() as connection:
-        await connection.run_sync(do_run_migrations)
-
-    await connectable.dispose()
+    try:
+        async with connectable.connect() as connection:
+            await connection.run_sync(do_run_migrations)
+    except Exception as exc:
+        if is_lock_timeout(exc):
+            logger.error(
+                "aborted: a lock was not granted within MIGRATION_LOCK_TIMEOUT_MS=%d ms, "
+                "probably because of a long-running transaction. The failed migration's "
+                "statements since its last commit were rolled back; steps it had already "
+                "committed (concurrent index builds, validations, batches) remain and are "
+                "skipped or repeated safely when the upgrade is run again later.",
+                settings.MIGRATION_LOCK_TIMEOUT_MS,
+            )
+        raise
+    finally:
+        await connectable.dispose()
 
 
 def run_migrations_online() -> None:
@@ -0,0 +1,51 @@
+"""Presence shared across workers.
+
+Revision ID: c5d8e1f2a047
+Revises: b7e4c2a9d310
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d8e1f2a047"
+down_revision: str | None = "b7e4c2a9d310"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "presence_workers",
+        sa.Column("worker_id", sa.String(length=100), nullable=False),
+        sa.Column(
+            "seen_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.PrimaryKeyConstraint("worker_id"),
+        prefixes=["UNLOGGED"],
+    )
+    op.create_table(
+        "presence_sessions",
+        sa.Column("worker_id", sa.String(length=100), nullable=False),
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["worker_id"], ["presence_workers.worker_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("worker_id", "user_id"),
+        prefixes=["UNLOGGED"],
+    )
+    op.create_index(
+        op.f("ix_presence_sessions_user_id"), "presence_sessions", ["user_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_presence_sessions_user_id"), table_name="presence_sessions")
+    op.drop_table("presence_sessions")
+    op.drop_table("presence_workers")
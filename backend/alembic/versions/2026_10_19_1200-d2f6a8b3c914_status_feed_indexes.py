@@ -0,0 +1,33 @@
+"""Feed and export indexes on status_updates, built concurrently.
+
+Revision ID: d2f6a8b3c914
+Revises: c5d8e1f2a047
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from app.migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision: str = "d2f6a8b3c914"
+down_revision: str | None = "c5d8e1f2a047"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(
+        "ix_status_updates_created_at", "status_updates", ["created_at", "id"]
+    )
+    create_index_concurrently(
+        "ix_status_updates_category_created_at",
+        "status_updates",
+        ["category", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_status_updates_category_created_at", "status_updates")
+    drop_index_concurrently("ix_status_updates_created_at", "status_updates")
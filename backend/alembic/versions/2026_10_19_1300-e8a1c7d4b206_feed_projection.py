@@ -0,0 +1,181 @@
+"""Denormalized feed projection and per-category daily counts, kept by triggers.
+
+Revision ID: e8a1c7d4b206
+Revises: d2f6a8b3c914
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.migrations import backfill, run_batched
+
+# revision identifiers, used by Alembic.
+revision: str = "e8a1c7d4b206"
+down_revision: str | None = "d2f6a8b3c914"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+FEED_FROM_STATUS = """
+CREATE OR REPLACE FUNCTION feed_entries_from_status() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO feed_entries
+            (id, user_id, created_at, category, message, username, display_name, avatar_url)
+        SELECT NEW.id, NEW.user_id, NEW.created_at, NEW.category, NEW.message,
+               u.username, u.display_name, u.avatar_url
+        FROM users u
+        WHERE u.id = NEW.user_id
+        ON CONFLICT (id) DO NOTHING;
+    ELSE
+        UPDATE feed_entries f
+        SET user_id = NEW.user_id,
+            created_at = NEW.created_at,
+            category = NEW.category,
+            message = NEW.message,
+            username = u.username,
+            display_name = u.display_name,
+            avatar_url = u.avatar_url
+        FROM users u
+        WHERE f.id = NEW.id AND u.id = NEW.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+FEED_FROM_USER = """
+CREATE OR REPLACE FUNCTION feed_entries_from_user() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE feed_entries
+    SET username = NEW.username,
+        display_name = NEW.display_name,
+        avatar_url = NEW.avatar_url
+    WHERE user_id = NEW.id;
+    RETURN NULL;
+END;
+$$
+"""
+
+COUNTS_FROM_FEED = """
+CREATE OR REPLACE FUNCTION category_daily_counts_from_feed() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE category_daily_counts
+        SET count = count - 1
+        WHERE day = (OLD.created_at AT TIME ZONE 'UTC')::date AND category = OLD.category;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO category_daily_counts AS c (day, category, count)
+        VALUES ((NEW.created_at AT TIME ZONE 'UTC')::date, NEW.category, 1)
+        ON CONFLICT (day, category) DO UPDATE SET count = c.count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+TRIGGERS = (
+    "CREATE OR REPLACE TRIGGER trg_status_updates_feed_insert AFTER INSERT ON status_updates "
+    "FOR EACH ROW EXECUTE FUNCTION feed_entries_from_status()",
+    "CREATE OR REPLACE TRIGGER trg_status_updates_feed_update "
+    "AFTER UPDATE OF user_id, created_at, category, message ON status_updates "
+    "FOR EACH ROW WHEN (OLD IS DISTINCT FROM NEW) "
+    "EXECUTE FUNCTION feed_entries_from_status()",
+    "CREATE OR REPLACE TRIGGER trg_users_feed_update "
+    "AFTER UPDATE OF username, display_name, avatar_url ON users FOR EACH ROW "
+    "WHEN ((OLD.username, OLD.display_name, OLD.avatar_url) "
+    "IS DISTINCT FROM (NEW.username, NEW.display_name, NEW.avatar_url)) "
+    "EXECUTE FUNCTION feed_entries_from_user()",
+    "CREATE OR REPLACE TRIGGER trg_feed_entries_counts AFTER INSERT OR DELETE ON feed_entries "
+    "FOR EACH ROW EXECUTE FUNCTION category_daily_counts_from_feed()",
+    "CREATE OR REPLACE TRIGGER trg_feed_entries_counts_move "
+    "AFTER UPDATE OF created_at, category ON feed_entries FOR EACH ROW "
+    "WHEN (OLD.category IS DISTINCT FROM NEW.category "
+    "OR (OLD.created_at AT TIME ZONE 'UTC')::date "
+    "IS DISTINCT FROM (NEW.created_at AT TIME ZONE 'UTC')::date) "
+    "EXECUTE FUNCTION category_daily_counts_from_feed()",
+)
+
+
+def upgrade() -> None:
+    # The batched copy and backfill commit as they go, and the revision is
+    # recorded only at the end. After a failure the next upgrade reruns this
+    # from the top, so the schema statements are all safe to repeat.
+    op.create_table(
+        "feed_entries",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("category", sa.String(length=20), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("username", sa.String(length=50), nullable=False),
+        sa.Column("display_name", sa.String(length=100), nullable=False),
+        sa.Column("avatar_url", sa.String(length=500), nullable=True),
+        sa.Column("github_ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["id"], ["status_updates.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    for name, columns in (
+        ("ix_feed_entries_created_at", ["created_at", "id"]),
+        ("ix_feed_entries_category_created_at", ["category", "created_at", "id"]),
+        ("ix_feed_entries_user_id_created_at", ["user_id", "created_at", "id"]),
+        ("ix_feed_entries_username_created_at", ["username", "created_at", "id"]),
+    ):
+        op.create_index(name, "feed_entries", columns, if_not_exists=True)
+    op.create_table(
+        "category_daily_counts",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("category", sa.String(length=20), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("day", "category"),
+        if_not_exists=True,
+    )
+    for function in (FEED_FROM_STATUS, FEED_FROM_USER, COUNTS_FROM_FEED):
+        op.execute(function)
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+    # The triggers are committed before existing rows are copied, so
+    # concurrent posts are projected by the triggers and the copy skips them.
+    # Counts follow from the copied feed_entries rows via their own trigger.
+    run_batched(
+        "status_updates",
+        "INSERT INTO feed_entries "
+        "(id, user_id, created_at, category, message, username, display_name, avatar_url) "
+        "SELECT status_updates.id, status_updates.user_id, status_updates.created_at, "
+        "status_updates.category, status_updates.message, "
+        "users.username, users.display_name, users.avatar_url "
+        "FROM status_updates JOIN users ON users.id = status_updates.user_id "
+        "WHERE {batch} ON CONFLICT (id) DO NOTHING",
+        label="copy status_updates into feed_entries",
+    )
+    # A profile edit that raced with a copied batch may have missed rows the
+    # batch had not committed yet; bring any such rows up to date.
+    backfill(
+        "feed_entries",
+        "username = users.username, display_name = users.display_name, "
+        "avatar_url = users.avatar_url",
+        from_clause="users",
+        where="users.id = feed_entries.user_id AND "
+        "(feed_entries.username, feed_entries.display_name, feed_entries.avatar_url) "
+        "IS DISTINCT FROM (users.username, users.display_name, users.avatar_url)",
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_users_feed_update ON users")
+    op.execute("DROP TRIGGER IF EXISTS trg_status_updates_feed_update ON status_updates")
+    op.execute("DROP TRIGGER IF EXISTS trg_status_updates_feed_insert ON status_updates")
+    op.drop_table("category_daily_counts")
+    op.drop_table("feed_entries")
+    op.execute("DROP FUNCTION IF EXISTS category_daily_counts_from_feed()")
+    op.execute("DROP FUNCTION IF EXISTS feed_entries_from_user()")
+    op.execute("DROP FUNCTION IF EXISTS feed_entries_from_status()")
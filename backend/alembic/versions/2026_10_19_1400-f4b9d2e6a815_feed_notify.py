@@ -0,0 +1,68 @@
+"""Notify workers of feed changes so their recent-feed caches stay current.
+
+Revision ID: f4b9d2e6a815
+Revises: e8a1c7d4b206
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f4b9d2e6a815"
+down_revision: str | None = "e8a1c7d4b206"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Payloads are "<op>:<uuid>" and stay far below the 8000-byte NOTIFY limit;
+# workers read the row itself back in batches.
+NOTIFY_STATUS = """
+CREATE FUNCTION notify_feed_status() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('feed_changes', 'delete:' || OLD.id);
+    ELSE
+        PERFORM pg_notify('feed_changes', lower(TG_OP) || ':' || NEW.id);
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+NOTIFY_USER = """
+CREATE FUNCTION notify_feed_user() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('feed_changes', 'user:' || NEW.id);
+    RETURN NULL;
+END;
+$$
+"""
+
+TRIGGERS = (
+    "CREATE TRIGGER trg_status_updates_feed_notify "
+    "AFTER INSERT OR DELETE OR UPDATE OF user_id, created_at, category, message "
+    "ON status_updates FOR EACH ROW EXECUTE FUNCTION notify_feed_status()",
+    "CREATE TRIGGER trg_users_feed_notify "
+    "AFTER UPDATE OF username, display_name, avatar_url ON users FOR EACH ROW "
+    "WHEN ((OLD.username, OLD.display_name, OLD.avatar_url) "
+    "IS DISTINCT FROM (NEW.username, NEW.display_name, NEW.avatar_url)) "
+    "EXECUTE FUNCTION notify_feed_user()",
+)
+
+
+def upgrade() -> None:
+    op.execute(NOTIFY_STATUS)
+    op.execute(NOTIFY_USER)
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_users_feed_notify ON users")
+    op.execute("DROP TRIGGER IF EXISTS trg_status_updates_feed_notify ON status_updates")
+    op.execute("DROP FUNCTION IF EXISTS notify_feed_user()")
+    op.execute("DROP FUNCTION IF EXISTS notify_feed_status()")
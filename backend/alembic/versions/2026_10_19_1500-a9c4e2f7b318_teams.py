@@ -0,0 +1,348 @@
+"""Teams: scope users, statuses, the feed projection and counts by team_id.
+
+Revision ID: a9c4e2f7b318
+Revises: f4b9d2e6a815
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.migrations import add_constraint, create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision: str = "a9c4e2f7b318"
+down_revision: str | None = "f4b9d2e6a815"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Every existing user and status moves into this team. It stays the column
+# default, so code that does not set team_id keeps working in one team.
+DEFAULT_TEAM_ID = "00000000-0000-0000-0000-000000000001"
+
+FEED_FROM_STATUS = """
+CREATE OR REPLACE FUNCTION feed_entries_from_status() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO feed_entries
+            (id, user_id, team_id, created_at, category, message,
+             username, display_name, avatar_url)
+        SELECT NEW.id, NEW.user_id, NEW.team_id, NEW.created_at, NEW.category, NEW.message,
+               u.username, u.display_name, u.avatar_url
+        FROM users u
+        WHERE u.id = NEW.user_id
+        ON CONFLICT (id) DO NOTHING;
+    ELSE
+        UPDATE feed_entries f
+        SET user_id = NEW.user_id,
+            team_id = NEW.team_id,
+            created_at = NEW.created_at,
+            category = NEW.category,
+            message = NEW.message,
+            username = u.username,
+            display_name = u.display_name,
+            avatar_url = u.avatar_url
+        FROM users u
+        WHERE f.id = NEW.id AND u.id = NEW.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+COUNTS_FROM_FEED = """
+CREATE OR REPLACE FUNCTION category_daily_counts_from_feed() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE category_daily_counts
+        SET count = count - 1
+        WHERE team_id = OLD.team_id
+          AND day = (OLD.created_at AT TIME ZONE 'UTC')::date
+          AND category = OLD.category;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO category_daily_counts AS c (team_id, day, category, count)
+        VALUES (NEW.team_id, (NEW.created_at AT TIME ZONE 'UTC')::date, NEW.category, 1)
+        ON CONFLICT (team_id, day, category) DO UPDATE SET count = c.count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+# Payloads become "<op>:<team_id>:<uuid>", so workers route each change to
+# that team's cache. A status that changes team is also deleted from the old one.
+NOTIFY_STATUS = """
+CREATE OR REPLACE FUNCTION notify_feed_status() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('feed_changes', 'delete:' || OLD.team_id || ':' || OLD.id);
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE' AND OLD.team_id <> NEW.team_id THEN
+        PERFORM pg_notify('feed_changes', 'delete:' || OLD.team_id || ':' || OLD.id);
+    END IF;
+    PERFORM pg_notify('feed_changes', lower(TG_OP) || ':' || NEW.team_id || ':' || NEW.id);
+    RETURN NULL;
+END;
+$$
+"""
+
+NOTIFY_USER = """
+CREATE OR REPLACE FUNCTION notify_feed_user() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('feed_changes', 'user:' || NEW.team_id || ':' || NEW.id);
+    RETURN NULL;
+END;
+$$
+"""
+
+# Triggers whose column lists gain team_id, as (name, table, new, previous).
+TRIGGERS = (
+    (
+        "trg_status_updates_feed_update",
+        "status_updates",
+        "CREATE TRIGGER trg_status_updates_feed_update "
+        "AFTER UPDATE OF user_id, team_id, created_at, category, message ON status_updates "
+        "FOR EACH ROW WHEN (OLD IS DISTINCT FROM NEW) "
+        "EXECUTE FUNCTION feed_entries_from_status()",
+        "CREATE TRIGGER trg_status_updates_feed_update "
+        "AFTER UPDATE OF user_id, created_at, category, message ON status_updates "
+        "FOR EACH ROW WHEN (OLD IS DISTINCT FROM NEW) "
+        "EXECUTE FUNCTION feed_entries_from_status()",
+    ),
+    (
+        "trg_feed_entries_counts_move",
+        "feed_entries",
+        "CREATE TRIGGER trg_feed_entries_counts_move "
+        "AFTER UPDATE OF team_id, created_at, category ON feed_entries FOR EACH ROW "
+        "WHEN (OLD.team_id IS DISTINCT FROM NEW.team_id "
+        "OR OLD.category IS DISTINCT FROM NEW.category "
+        "OR (OLD.created_at AT TIME ZONE 'UTC')::date "
+        "IS DISTINCT FROM (NEW.created_at AT TIME ZONE 'UTC')::date) "
+        "EXECUTE FUNCTION category_daily_counts_from_feed()",
+        "CREATE TRIGGER trg_feed_entries_counts_move "
+        "AFTER UPDATE OF created_at, category ON feed_entries FOR EACH ROW "
+        "WHEN (OLD.category IS DISTINCT FROM NEW.category "
+        "OR (OLD.created_at AT TIME ZONE 'UTC')::date "
+        "IS DISTINCT FROM (NEW.created_at AT TIME ZONE 'UTC')::date) "
+        "EXECUTE FUNCTION category_daily_counts_from_feed()",
+    ),
+    (
+        "trg_status_updates_feed_notify",
+        "status_updates",
+        "CREATE TRIGGER trg_status_updates_feed_notify "
+        "AFTER INSERT OR DELETE OR UPDATE OF user_id, team_id, created_at, category, message "
+        "ON status_updates FOR EACH ROW EXECUTE FUNCTION notify_feed_status()",
+        "CREATE TRIGGER trg_status_updates_feed_notify "
+        "AFTER INSERT OR DELETE OR UPDATE OF user_id, created_at, category, message "
+        "ON status_updates FOR EACH ROW EXECUTE FUNCTION notify_feed_status()",
+    ),
+)
+
+# Leading team_id, so one team's page, export or leaderboard is one range
+# scan whose cost does not grow with the number of teams.
+INDEXES: tuple[tuple[str, str, list[str | sa.TextClause]], ...] = (
+    ("ix_status_updates_team_id_created_at", "status_updates", ["team_id", "created_at", "id"]),
+    (
+        "ix_status_updates_team_id_category_created_at",
+        "status_updates",
+        ["team_id", "category", "created_at", "id"],
+    ),
+    ("ix_feed_entries_team_id_created_at", "feed_entries", ["team_id", "created_at", "id"]),
+    (
+        "ix_feed_entries_team_id_category_created_at",
+        "feed_entries",
+        ["team_id", "category", "created_at", "id"],
+    ),
+    ("ix_users_team_id_xp", "users", ["team_id", sa.text("xp DESC"), "username"]),
+)
+
+PREVIOUS_FEED_FROM_STATUS = """
+CREATE OR REPLACE FUNCTION feed_entries_from_status() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO feed_entries
+            (id, user_id, created_at, category, message, username, display_name, avatar_url)
+        SELECT NEW.id, NEW.user_id, NEW.created_at, NEW.category, NEW.message,
+               u.username, u.display_name, u.avatar_url
+        FROM users u
+        WHERE u.id = NEW.user_id
+        ON CONFLICT (id) DO NOTHING;
+    ELSE
+        UPDATE feed_entries f
+        SET user_id = NEW.user_id,
+            created_at = NEW.created_at,
+            category = NEW.category,
+            message = NEW.message,
+            username = u.username,
+            display_name = u.display_name,
+            avatar_url = u.avatar_url
+        FROM users u
+        WHERE f.id = NEW.id AND u.id = NEW.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+PREVIOUS_COUNTS_FROM_FEED = """
+CREATE OR REPLACE FUNCTION category_daily_counts_from_feed() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE category_daily_counts
+        SET count = count - 1
+        WHERE day = (OLD.created_at AT TIME ZONE 'UTC')::date AND category = OLD.category;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO category_daily_counts AS c (day, category, count)
+        VALUES ((NEW.created_at AT TIME ZONE 'UTC')::date, NEW.category, 1)
+        ON CONFLICT (day, category) DO UPDATE SET count = c.count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+PREVIOUS_NOTIFY_STATUS = """
+CREATE OR REPLACE FUNCTION notify_feed_status() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('feed_changes', 'delete:' || OLD.id);
+    ELSE
+        PERFORM pg_notify('feed_changes', lower(TG_OP) || ':' || NEW.id);
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+PREVIOUS_NOTIFY_USER = """
+CREATE OR REPLACE FUNCTION notify_feed_user() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('feed_changes', 'user:' || NEW.id);
+    RETURN NULL;
+END;
+$$
+"""
+
+
+def _team_column(table: str, *, keep_default: bool) -> None:
+    # A constant default fills existing rows without rewriting the table.
+    op.add_column(
+        table,
+        sa.Column(
+            "team_id", sa.Uuid(), nullable=False, server_default=sa.text(f"'{DEFAULT_TEAM_ID}'")
+        ),
+        if_not_exists=True,
+    )
+    if not keep_default:
+        op.alter_column(table, "team_id", server_default=None)
+
+
+def _validate(table: str, constraint: str) -> None:
+    # VALIDATE scans the table under a lock that still allows writes; in its
+    # own transaction, so the migration's stronger locks are not held meanwhile.
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}")
+
+
+def upgrade() -> None:
+    # _validate() and the index builds commit part-way, and the revision is
+    # recorded only at the end, so a failure later on (such as a lock timeout
+    # on UNIQUE USING INDEX) reruns this from the top over the committed
+    # part. Every statement below is therefore safe to repeat.
+    op.create_table(
+        "teams",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("slug", sa.String(length=50), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("slug"),
+        if_not_exists=True,
+    )
+    op.execute(
+        f"INSERT INTO teams (id, slug, name) VALUES ('{DEFAULT_TEAM_ID}', 'default', 'Default') "
+        "ON CONFLICT (id) DO NOTHING"
+    )
+    _team_column("users", keep_default=True)
+    _team_column("status_updates", keep_default=True)
+    _team_column("feed_entries", keep_default=False)
+    _team_column("category_daily_counts", keep_default=False)
+    add_constraint(
+        "users",
+        "users_team_id_fkey",
+        "FOREIGN KEY (team_id) REFERENCES teams (id) ON DELETE CASCADE NOT VALID",
+    )
+
+    # The counts key and the functions that upsert into it change in one
+    # transaction. The table holds one row per day and category, so
+    # rebuilding its primary key is quick, and rebuilding it again on a
+    # rerun gives the same key.
+    op.execute(
+        "ALTER TABLE category_daily_counts DROP CONSTRAINT category_daily_counts_pkey, "
+        "ADD PRIMARY KEY (team_id, day, category)"
+    )
+    for function in (FEED_FROM_STATUS, COUNTS_FROM_FEED, NOTIFY_STATUS, NOTIFY_USER):
+        op.execute(function)
+    for name, table, trigger, _ in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+        op.execute(trigger)
+
+    _validate("users", "users_team_id_fkey")
+    create_index_concurrently("uq_users_id_team_id", "users", ["id", "team_id"], unique=True)
+    add_constraint("users", "uq_users_id_team_id", "UNIQUE USING INDEX uq_users_id_team_id")
+    add_constraint(
+        "status_updates",
+        "fk_status_updates_user_id_team_id",
+        "FOREIGN KEY (user_id, team_id) REFERENCES users (id, team_id) "
+        "ON UPDATE CASCADE ON DELETE CASCADE NOT VALID",
+    )
+    _validate("status_updates", "fk_status_updates_user_id_team_id")
+    for name, table, columns in INDEXES:
+        create_index_concurrently(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        drop_index_concurrently(name, table)
+    op.execute(
+        "ALTER TABLE status_updates DROP CONSTRAINT IF EXISTS fk_status_updates_user_id_team_id"
+    )
+    op.execute("ALTER TABLE users DROP CONSTRAINT IF EXISTS uq_users_id_team_id")
+    for name, table, _, previous in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+        op.execute(previous)
+    for function in (
+        PREVIOUS_FEED_FROM_STATUS,
+        PREVIOUS_COUNTS_FROM_FEED,
+        PREVIOUS_NOTIFY_STATUS,
+        PREVIOUS_NOTIFY_USER,
+    ):
+        op.execute(function)
+    # Merge every team's counts back into one row per day and category.
+    op.execute("ALTER TABLE category_daily_counts DROP CONSTRAINT category_daily_counts_pkey")
+    op.execute(
+        "WITH merged AS (DELETE FROM category_daily_counts RETURNING day, category, count) "
+        "INSERT INTO category_daily_counts (team_id, day, category, count) "
+        f"SELECT '{DEFAULT_TEAM_ID}', day, category, sum(count) FROM merged "
+        "GROUP BY day, category"
+    )
+    for table in ("category_daily_counts", "feed_entries", "status_updates", "users"):
+        op.drop_column(table, "team_id")
+    op.create_primary_key(
+        "category_daily_counts_pkey", "category_daily_counts", ["day", "category"]
+    )
+    op.drop_table("teams")
@@ -0,0 +1,101 @@
+"""Spread each category's daily count over shard rows, so posts do not queue on one row.
+
+Revision ID: b3e7d1c9a402
+Revises: a9c4e2f7b318
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b3e7d1c9a402"
+down_revision: str | None = "a9c4e2f7b318"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SHARDS = 64
+
+# The shard comes from the status id, so a delete or move adjusts the same
+# row its insert did. Decrements are upserts too: a status counted before
+# this migration sits in shard 0, and removing it may create a negative
+# shard row. Only the sum over shards is meaningful.
+COUNTS_FROM_FEED = f"""
+CREATE OR REPLACE FUNCTION category_daily_counts_from_feed() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO category_daily_counts AS c (team_id, day, category, shard, count)
+        VALUES (OLD.team_id, (OLD.created_at AT TIME ZONE 'UTC')::date, OLD.category,
+                mod(get_byte(uuid_send(OLD.id), 15), {SHARDS}), -1)
+        ON CONFLICT (team_id, day, category, shard) DO UPDATE SET count = c.count - 1;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO category_daily_counts AS c (team_id, day, category, shard, count)
+        VALUES (NEW.team_id, (NEW.created_at AT TIME ZONE 'UTC')::date, NEW.category,
+                mod(get_byte(uuid_send(NEW.id), 15), {SHARDS}), 1)
+        ON CONFLICT (team_id, day, category, shard) DO UPDATE SET count = c.count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+PREVIOUS_COUNTS_FROM_FEED = """
+CREATE OR REPLACE FUNCTION category_daily_counts_from_feed() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE category_daily_counts
+        SET count = count - 1
+        WHERE team_id = OLD.team_id
+          AND day = (OLD.created_at AT TIME ZONE 'UTC')::date
+          AND category = OLD.category;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO category_daily_counts AS c (team_id, day, category, count)
+        VALUES (NEW.team_id, (NEW.created_at AT TIME ZONE 'UTC')::date, NEW.category, 1)
+        ON CONFLICT (team_id, day, category) DO UPDATE SET count = c.count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    # Existing rows become shard 0. A constant default needs no table
+    # rewrite, and the table holds one row per team, day and category, so
+    # rebuilding its primary key is quick. Key and function change in one
+    # transaction.
+    op.add_column(
+        "category_daily_counts",
+        sa.Column("shard", sa.SmallInteger(), nullable=False, server_default="0"),
+    )
+    op.alter_column("category_daily_counts", "shard", server_default=None)
+    op.execute(
+        "ALTER TABLE category_daily_counts DROP CONSTRAINT category_daily_counts_pkey, "
+        "ADD PRIMARY KEY (team_id, day, category, shard)"
+    )
+    op.execute(COUNTS_FROM_FEED)
+
+
+def downgrade() -> None:
+    op.execute(PREVIOUS_COUNTS_FROM_FEED)
+    # Merge the shards back into one row per team, day and category.
+    op.execute("ALTER TABLE category_daily_counts DROP CONSTRAINT category_daily_counts_pkey")
+    op.execute(
+        "WITH merged AS (DELETE FROM category_daily_counts "
+        "RETURNING team_id, day, category, count) "
+        "INSERT INTO category_daily_counts (team_id, day, category, shard, count) "
+        "SELECT team_id, day, category, 0, sum(count) FROM merged "
+        "GROUP BY team_id, day, category"
+    )
+    op.drop_column("category_daily_counts", "shard")
+    op.create_primary_key(
+        "category_daily_counts_pkey", "category_daily_counts", ["team_id", "day", "category"]
+    )
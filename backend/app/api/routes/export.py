@@ -0,0 +1,70 @@
+"""Streaming status history export route."""
+
+import uuid
+from datetime import UTC, datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import get_settings
+from app.database import get_engine
+from app.models.status import VALID_CATEGORIES
+from app.queries import FeedFilters
+from app.rate_limit import rate_limit
+from app.services.export import MEDIA_TYPES, ExportFormat, export_statuses
+
+router = APIRouter(tags=["export"])
+
+
+@router.get(
+    "/statuses/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(rate_limit("export"))],
+)
+async def export_status_history(
+    team_id: uuid.UUID,
+    format: Annotated[ExportFormat, Query()] = "ndjson",  # noqa: A002
+    user_id: uuid.UUID | None = None,
+    username: str | None = None,
+    category: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> StreamingResponse:
+    """Stream every matching status of one team with its author as NDJSON or CSV.
+
+    The export query is started before the response, so a database failure
+    at that point is answered with 503 rather than an empty download.
+    """
+    if category is not None and category not in VALID_CATEGORIES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"category must be one of: {', '.join(VALID_CATEGORIES)}",
+        )
+    filters = FeedFilters(
+        user_id=user_id,
+        username=username,
+        category=category,
+        since=since,
+        until=until,
+        team_id=team_id,
+    )
+    try:
+        body = await export_statuses(
+            get_engine(), filters, format, get_settings().EXPORT_CHUNK_ROWS
+        )
+    except (OSError, SQLAlchemyError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="export could not be started; try again later",
+        ) from exc
+    stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="statuses-{stamp}.{format}"',
+            "Cache-Control": "no-store",
+        },
+    )
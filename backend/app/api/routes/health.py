@@ -0,0 +1,31 @@
+"""Health check, liveness and readiness routes."""
+
+from fastapi import APIRouter, Response, status
+
+from app.services.drain import get_connection_drainer
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/health")
+async def health_check() -> dict[str, str]:
+    """Return application health status."""
+    return {"status": "ok"}
+
+
+@router.get("/health/live")
+async def liveness() -> dict[str, str]:
+    """Return 200 while the worker's event loop is answering, including during a drain."""
+    return {"status": "alive"}
+
+
+@router.get(
+    "/health/ready",
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Starting or draining"}},
+)
+async def readiness(response: Response) -> dict[str, str]:
+    """Return 200 once started and 503 while starting or draining, for load balancers."""
+    drainer = get_connection_drainer()
+    if not drainer.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": drainer.state}
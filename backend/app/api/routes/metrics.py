@@ -0,0 +1,35 @@
+"""Metrics snapshot route.
+
+The snapshot exposes query names, queue depths and failure counts, so it is
+only served when ``METRICS_TOKEN`` is set, and only to requests that send it
+as ``Authorization: Bearer <token>``.
+"""
+
+import hmac
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from app.config import get_settings
+from app.metrics import metrics
+
+
+def require_metrics_token(authorization: Annotated[str | None, Header()] = None) -> None:
+    """Answer 404 while metrics are disabled and 401 without the right bearer token."""
+    token = get_settings().METRICS_TOKEN
+    if token is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    expected = f"Bearer {token}".encode()
+    if authorization is None or not hmac.compare_digest(authorization.encode(), expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+router = APIRouter(tags=["metrics"], dependencies=[Depends(require_metrics_token)])
+
+
+@router.get("/metrics")
+async def metrics_snapshot() -> dict[str, list[dict[str, Any]]]:
+    """Return this worker's counters, gauges and timing summaries."""
+    return metrics.snapshot()
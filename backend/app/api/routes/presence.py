@@ -0,0 +1,24 @@
+"""Presence snapshot route."""
+
+import uuid
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.queries import fetch_user_teams
+from app.services.presence import get_presence_tracker
+
+router = APIRouter(tags=["presence"])
+
+
+@router.get("/presence")
+async def presence_snapshot(
+    session: Annotated[AsyncSession, Depends(get_db)], team_id: uuid.UUID
+) -> dict[str, Any]:
+    """Return one team's users currently online, as of the last presence flush."""
+    snapshot = get_presence_tracker().snapshot()
+    teams = await fetch_user_teams(session, [uuid.UUID(u) for u in snapshot["online"]])
+    snapshot["online"] = [u for u in snapshot["online"] if teams.get(uuid.UUID(u)) == team_id]
+    return snapshot
@@ -0,0 +1,34 @@
+"""Dashboard statistics routes."""
+
+import uuid
+from datetime import UTC, date, datetime, timedelta
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.queries import fetch_category_counts
+
+router = APIRouter(tags=["stats"])
+
+MAX_RANGE_DAYS = 366
+
+
+@router.get("/stats/categories")
+async def category_counts(
+    session: Annotated[AsyncSession, Depends(get_db)],
+    team_id: uuid.UUID,
+    since: date | None = None,
+    until: date | None = None,
+) -> list[dict[str, Any]]:
+    """Return one team's status counts per category per UTC day, for the last week by default."""
+    until = until or datetime.now(UTC).date()
+    since = since or until - timedelta(days=6)
+    if since > until or (until - since).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"since must be on or before until, at most {MAX_RANGE_DAYS} days apart",
+        )
+    rows = await fetch_category_counts(session, team_id=team_id, since=since, until=until)
+    return [dict(row) for row in rows]
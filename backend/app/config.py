@@ -1,8 +1,20 @@
-"""Application configuration loaded from environment variables."""
+"""Application configuration loaded from environment variables.
+
+Settings are constructed lazily on first access so that importing ``app.*``
+modules does not require a complete environment. Use :func:`get_settings`
+in new code; ``from app.config import settings`` keeps working and resolves
+to the same cached instance.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Literal
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+RATE_LIMIT_PATTERN = re.compile(r"^(?:off|([1-9]\d*)/(second|minute|hour|day))$")
+
 
 class Settings(BaseSettings):
     """Application settings with environment variable binding."""
@@ -17,6 +29,44 @@ class Settings(BaseSettings):
     WS_INITIAL_HOURS: int = 1
     GITHUB_TOKEN: str | None = None
     LOG_LEVEL: str = "INFO"
+    METRICS_TOKEN: str | None = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_WARMUP: int = 2
+    DB_STATEMENT_MODE: Literal["prepared", "pgbouncer"] = "prepared"
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    COUNTER_FLUSH_INTERVAL_SECONDS: float = 1.0
+    COUNTER_FLUSH_BATCH_SIZE: int = 500
+    COUNTER_FLUSH_MAX_PENDING: int = 1000
+    COUNTER_PENDING_LIMIT: int = 100_000
+    EXPORT_CHUNK_ROWS: int = 1000
+    RATE_LIMIT_BACKEND: Literal["memory", "postgres"] = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    RATE_LIMIT_PRUNE_INTERVAL_SECONDS: float = 300.0
+    RATE_LIMIT_LOGIN: str = "5/minute"
+    RATE_LIMIT_REGISTER: str = "5/minute"
+    RATE_LIMIT_STATUS_CREATE: str = "30/minute"
+    RATE_LIMIT_WS_CONNECT: str = "20/minute"
+    RATE_LIMIT_EXPORT: str = "10/hour"
+    PRESENCE_BACKEND: Literal["memory", "postgres"] = "memory"
+    PRESENCE_HEARTBEAT_SECONDS: float = 30.0
+    PRESENCE_MISSED_HEARTBEATS: int = 2
+    PRESENCE_FLUSH_INTERVAL_SECONDS: float = 2.0
+    MIGRATION_LOCK_TIMEOUT_MS: int = 5000
+    FEED_PROJECTION: bool = False
+    FEED_CACHE_SIZE: int = 10_000
+    FEED_CACHE_TEAM_SIZE: int = 1_000
+    FEED_CACHE_MAX_TEAMS: int = 256
+    FEED_CACHE_SYNC_INTERVAL_SECONDS: float = 0.5
+    FEED_CACHE_LISTEN_URL: str | None = None
+    TASK_QUEUE_MAX_SIZE: int = 1000
+    TASK_RETRY_BASE_SECONDS: float = 0.5
+    TASK_RETRY_MAX_SECONDS: float = 30.0
+    TASK_DRAIN_TIMEOUT_SECONDS: float = 10.0
+    CHANNEL_SEND_TIMEOUT_SECONDS: float = 1.0
+    DRAIN_GRACE_SECONDS: float = 5.0
+    DRAIN_SECONDS: float = 10.0
+    DRAIN_WAVES: int = 10
 
     @field_validator("JWT_SECRET")
     @classmethod
@@ -27,10 +77,150 @@ class Settings(BaseSettings):
             raise ValueError(msg)
         return v
 
+    @field_validator("COUNTER_PENDING_LIMIT")
+    @classmethod
+    def counter_pending_limit_must_be_positive(cls, v: int) -> int:
+        """Reject COUNTER_PENDING_LIMIT values below 1."""
+        if v < 1:
+            msg = "COUNTER_PENDING_LIMIT must be >= 1"
+            raise ValueError(msg)
+        return v
+
+    @field_validator("METRICS_TOKEN")
+    @classmethod
+    def metrics_token_must_not_be_blank(cls, v: str | None) -> str | None:
+        """Reject empty or whitespace-only METRICS_TOKEN values (leave it unset instead)."""
+        if v is not None and not v.strip():
+            msg = "METRICS_TOKEN must not be empty or whitespace-only"
+            raise ValueError(msg)
+        return v
+
+    @field_validator("DB_POOL_WARMUP")
+    @classmethod
+    def pool_warmup_must_not_be_negative(cls, v: int) -> int:
+        """Reject negative DB_POOL_WARMUP values (0 disables warm-up)."""
+        if v < 0:
+            msg = "DB_POOL_WARMUP must be >= 0"
+            raise ValueError(msg)
+        return v
+
+    @field_validator("MIGRATION_LOCK_TIMEOUT_MS")
+    @classmethod
+    def lock_timeout_must_not_be_negative(cls, v: int) -> int:
+        """Reject negative MIGRATION_LOCK_TIMEOUT_MS values (0 waits forever)."""
+        if v < 0:
+            msg = "MIGRATION_LOCK_TIMEOUT_MS must be >= 0"
+            raise ValueError(msg)
+        return v
+
+    @field_validator("PRESENCE_HEARTBEAT_SECONDS", "PRESENCE_FLUSH_INTERVAL_SECONDS")
+    @classmethod
+    def presence_interval_must_be_positive(cls, v: float) -> float:
+        """Reject zero or negative presence intervals."""
+        if v <= 0:
+            msg = "presence intervals must be > 0"
+            raise ValueError(msg)
+        return v
+
+    @field_validator("FEED_CACHE_SIZE", "FEED_CACHE_TEAM_SIZE", "FEED_CACHE_MAX_TEAMS")
+    @classmethod
+    def feed_cache_size_must_not_be_negative(cls, v: int) -> int:
+        """Reject negative feed cache sizes (0 disables that cache)."""
+        if v < 0:
+            msg = "feed cache sizes must be >= 0"
+            raise ValueError(msg)
+        return v
+
+    @field_validator("FEED_CACHE_LISTEN_URL")
+    @classmethod
+    def listen_url_must_not_be_blank(cls, v: str | None) -> str | None:
+        """Reject empty or whitespace-only FEED_CACHE_LISTEN_URL values (leave it unset)."""
+        if v is not None and not v.strip():
+            msg = "FEED_CACHE_LISTEN_URL must not be empty or whitespace-only"
+            raise ValueError(msg)
+        return v
+
+    @field_validator(
+        "TASK_QUEUE_MAX_SIZE",
+        "TASK_RETRY_BASE_SECONDS",
+        "TASK_RETRY_MAX_SECONDS",
+        "TASK_DRAIN_TIMEOUT_SECONDS",
+    )
+    @classmethod
+    def task_settings_must_be_positive(cls, v: float) -> float:
+        """Reject zero or negative task queue sizes and intervals."""
+        if v <= 0:
+            msg = "task queue sizes and intervals must be > 0"
+            raise ValueError(msg)
+        return v
+
+    @field_validator("RATE_LIMIT_PRUNE_INTERVAL_SECONDS")
+    @classmethod
+    def rate_limit_prune_interval_must_be_positive(cls, v: float) -> float:
+        """Reject zero or negative RATE_LIMIT_PRUNE_INTERVAL_SECONDS values."""
+        if v <= 0:
+            msg = "RATE_LIMIT_PRUNE_INTERVAL_SECONDS must be > 0"
+            raise ValueError(msg)
+        return v
+
+    @field_validator("CHANNEL_SEND_TIMEOUT_SECONDS")
+    @classmethod
+    def channel_send_timeout_must_be_positive(cls, v: float) -> float:
+        """Reject zero or negative CHANNEL_SEND_TIMEOUT_SECONDS values."""
+        if v <= 0:
+            msg = "CHANNEL_SEND_TIMEOUT_SECONDS must be > 0"
+            raise ValueError(msg)
+        return v
+
+    @field_validator("DRAIN_GRACE_SECONDS", "DRAIN_SECONDS")
+    @classmethod
+    def drain_time_must_not_be_negative(cls, v: float) -> float:
+        """Reject negative drain times (0 skips that phase)."""
+        if v < 0:
+            msg = "drain times must be >= 0"
+            raise ValueError(msg)
+        return v
+
+    @field_validator("DRAIN_WAVES")
+    @classmethod
+    def drain_waves_must_be_positive(cls, v: int) -> int:
+        """Reject DRAIN_WAVES values below 1."""
+        if v < 1:
+            msg = "DRAIN_WAVES must be >= 1"
+            raise ValueError(msg)
+        return v
+
+    @field_validator(
+        "RATE_LIMIT_LOGIN",
+        "RATE_LIMIT_REGISTER",
+        "RATE_LIMIT_STATUS_CREATE",
+        "RATE_LIMIT_WS_CONNECT",
+        "RATE_LIMIT_EXPORT",
+    )
+    @classmethod
+    def rate_limit_must_be_well_formed(cls, v: str) -> str:
+        """Accept '<count>/<second|minute|hour|day>' with a positive count, or 'off'."""
+        v = v.strip()
+        if not RATE_LIMIT_PATTERN.match(v):
+            msg = "rate limit must be '<count>/<second|minute|hour|day>' or 'off'"
+            raise ValueError(msg)
+        return v
+
     @property
     def cors_origins_list(self) -> list[str]:
         """Split comma-separated CORS_ORIGINS into a list, filtering out empty values."""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide Settings instance, constructing it on first call."""
+    return Settings()
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve the legacy ``settings`` module attribute lazily."""
+    if name == "settings":
+        return get_settings()
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
@@ -1,8 +1,14 @@
 """Async SQLAlchemy database engine, session factory, and base model."""
 
-from collections.abc import AsyncGenerator
+import asyncio
+import logging
+import uuid
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from typing import Any
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
@@ -10,17 +16,48 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import DeclarativeBase
 
-from app.config import settings
+from app.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
 
 _engine: AsyncEngine | None = None
 _session_factory: async_sessionmaker[AsyncSession] | None = None
 
 
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def statement_connect_args(settings: Settings) -> dict[str, Any]:
+    """Return asyncpg connect arguments for the configured ``DB_STATEMENT_MODE``.
+
+    ``prepared`` keeps a per-connection LRU of ``DB_STATEMENT_CACHE_SIZE``
+    prepared statements. ``pgbouncer`` is safe behind transaction pooling:
+    both statement caches are disabled and every statement gets a unique name,
+    so a server connection never sees a name prepared by another client.
+    """
+    if settings.DB_STATEMENT_MODE == "pgbouncer":
+        return {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": _unique_statement_name,
+        }
+    return {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+
 def get_engine() -> AsyncEngine:
     """Return the async engine, creating it lazily on first call."""
     global _engine  # noqa: PLW0603
     if _engine is None:
-        _engine = create_async_engine(settings.DATABASE_URL, echo=False)
+        settings = get_settings()
+        _engine = create_async_engine(
+            settings.DATABASE_URL,
+            echo=False,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            connect_args=statement_connect_args(settings),
+        )
     return _engine
 
 
@@ -32,6 +69,48 @@ def get_session_factory() -> async_sessionmaker[AsyncSession]:
     return _session_factory
 
 
+async def warm_up_pool(
+    connections: int,
+    prime: Callable[[AsyncConnection], Awaitable[None]] | None = None,
+) -> int:
+    """Open ``connections`` pooled connections concurrently and return how many succeeded.
+
+    Each connection runs a trivial round-trip so the TCP handshake, auth and
+    asyncpg type introspection are paid before the first request; ``prime``
+    then runs on the same connection (e.g. to prepare hot statements). Failures
+    are logged and swallowed: the app must still start when the database is down.
+    """
+    if connections <= 0:
+        return 0
+    engine = get_engine()
+
+    async def _ping() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            if prime is not None:
+                await prime(conn)
+
+    results = await asyncio.gather(*(_ping() for _ in range(connections)), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if failures:
+        logger.warning(
+            "database pool warm-up: %d of %d connections failed: %s",
+            len(failures),
+            connections,
+            failures[0],
+        )
+    return connections - len(failures)
+
+
+async def dispose_engine() -> None:
+    """Close all pooled connections and forget the engine and session factory."""
+    global _engine, _session_factory  # noqa: PLW0603
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _session_factory = None
+
+
 class Base(DeclarativeBase):
     """Base class for all ORM models."""
 
@@ -1,27 +1,137 @@
-"""FastAPI application with CORS middleware and health check."""
+"""FastAPI application with CORS middleware and health check.
+
+The module-level ``app`` (what ``uvicorn app.main:app`` loads) is built on
+first attribute access, so importing this module does not require settings.
+"""
+
+import logging
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import cache
+from typing import Any
 
 from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.config import settings
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Warm the pool, hot-query catalog and feed cache and start background workers.
+
+    Once everything has started, the worker reports ready and SIGTERM is
+    routed through the connection drainer (see :mod:`app.services.drain`).
+    On shutdown the rate limiter stops pruning shared buckets and the task
+    runner drains, while the database and presence are still available to
+    its jobs. Then the presence tracker
+    withdraws this worker, the feed cache stops listening, and the counter
+    aggregator is flushed before the pool is released. If a startup step
+    fails, the steps that already completed are undone in the same order.
+
+    ``app.database`` (and with it SQLAlchemy) is imported here rather than at
+    module level so that importing ``app.main`` stays cheap for tooling.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app import queries
+    from app.database import dispose_engine, get_engine, warm_up_pool
+    from app.rate_limit import get_rate_limiter
+    from app.services.channels import get_team_channels
+    from app.services.counters import get_counter_aggregator
+    from app.services.drain import get_connection_drainer
+    from app.services.feed_cache import FeedCacheListener, get_feed_caches
+    from app.services.presence import get_presence_tracker
+    from app.services.tasks import get_task_runner
+
+    settings = get_settings()
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(dispose_engine)
+        queries.install(get_engine())
+        await warm_up_pool(settings.DB_POOL_WARMUP, prime=queries.prime_connection)
+        feed_caches = get_feed_caches()
+        if feed_caches is not None:
+            listen_engine = None
+            if settings.FEED_CACHE_LISTEN_URL is not None:
+                listen_engine = create_async_engine(
+                    settings.FEED_CACHE_LISTEN_URL, poolclass=NullPool
+                )
+                stack.push_async_callback(listen_engine.dispose)
+            feed_listener = FeedCacheListener(
+                feed_caches,
+                get_engine(),
+                interval=settings.FEED_CACHE_SYNC_INTERVAL_SECONDS,
+                listen_engine=listen_engine,
+            )
+            await feed_listener.start()
+            stack.push_async_callback(feed_listener.stop)
+        elif settings.FEED_CACHE_SIZE or settings.FEED_CACHE_TEAM_SIZE:
+            logger.warning(
+                "feed caches disabled: DB_STATEMENT_MODE=pgbouncer needs FEED_CACHE_LISTEN_URL "
+                "to receive feed_changes notifications"
+            )
+        counters = get_counter_aggregator()
+        counters.start()
+        stack.push_async_callback(counters.stop)
+        presence = get_presence_tracker()
+        presence.broadcast = get_team_channels().publish_presence
+        presence.start()
+        stack.push_async_callback(presence.stop)
+        tasks = get_task_runner()
+        tasks.start()
+        stack.push_async_callback(tasks.stop)
+        limiter = get_rate_limiter()
+        limiter.start()
+        stack.push_async_callback(limiter.stop)
+        drainer = get_connection_drainer()
+        drainer.install_signal_handler()
+        stack.push_async_callback(drainer.stop)
+        drainer.mark_ready()
+        yield
+
+
+def create_router() -> APIRouter:
+    """Build the versioned API router; route modules are imported here, not with ``app.main``."""
+    from app.api.routes import export, health, metrics, presence, stats
+
+    router = APIRouter(prefix="/api/v1")
+    router.include_router(health.router)
+    router.include_router(metrics.router)
+    router.include_router(presence.router)
+    router.include_router(stats.router)
+    # Before any /statuses/{id} route so "export" is not taken as an id.
+    router.include_router(export.router)
+    return router
 
-app = FastAPI(title="Team Statusboard", version="0.1.0")
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins_list,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def create_app() -> FastAPI:
+    """Construct the FastAPI application from the current settings."""
+    settings = get_settings()
+    application = FastAPI(title="Team Statusboard", version="0.1.0", lifespan=lifespan)
 
-router = APIRouter(prefix="/api/v1")
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins_list,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    application.include_router(create_router())
+    return application
 
 
-@router.get("/health")
-async def health_check() -> dict[str, str]:
-    """Return application health status."""
-    return {"status": "ok"}
+@cache
+def get_app() -> FastAPI:
+    """Return the process-wide application, constructing it on first call."""
+    return create_app()
 
 
-app.include_router(router)
+def __getattr__(name: str) -> Any:
+    """Resolve the ``app`` module attribute lazily."""
+    if name == "app":
+        return get_app()
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
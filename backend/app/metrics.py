@@ -0,0 +1,146 @@
+"""In-process metrics registry: counters, gauges and timing summaries.
+
+Each worker keeps its own registry; ``GET /api/v1/metrics`` returns a JSON
+snapshot. Labels are passed as keyword arguments::
+
+    from app.metrics import metrics
+
+    metrics.increment("db_query_compiled_cache_total", query="feed", result="hit")
+    with metrics.timer("db_query_seconds", query="feed"):
+        ...
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+_RESERVOIR_SIZE = 1024
+
+_LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, Any]) -> _LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Summary:
+    """Count, sum and max of observations, plus a bounded reservoir for percentiles."""
+
+    __slots__ = ("count", "max", "recent", "total")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque[float] = deque(maxlen=_RESERVOIR_SIZE)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def to_dict(self) -> dict[str, float]:
+        ordered = sorted(self.recent)
+
+        def pct(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "max": self.max,
+            "p50": pct(0.50),
+            "p95": pct(0.95),
+            "p99": pct(0.99),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of named, labelled counters, gauges and summaries."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[_LabelKey, float]] = {}
+        self._gauges: dict[str, dict[_LabelKey, float]] = {}
+        self._summaries: dict[str, dict[_LabelKey, _Summary]] = {}
+
+    def increment(self, name: str, value: float = 1, /, **labels: Any) -> None:
+        """Add ``value`` to the counter ``name`` for the given labels."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, /, **labels: Any) -> None:
+        """Set the gauge ``name`` for the given labels to ``value``."""
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, /, **labels: Any) -> None:
+        """Record one observation (usually seconds) in the summary ``name``."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            summary = series.get(key)
+            if summary is None:
+                summary = series[key] = _Summary()
+            summary.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, /, **labels: Any) -> Iterator[None]:
+        """Observe the wall-clock duration of the ``with`` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter_value(self, name: str, /, **labels: Any) -> float:
+        """Return the current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def gauge_value(self, name: str, /, **labels: Any) -> float | None:
+        """Return the current value of a gauge, or ``None`` if never set."""
+        with self._lock:
+            return self._gauges.get(name, {}).get(_label_key(labels))
+
+    def summary(self, name: str, /, **labels: Any) -> dict[str, float] | None:
+        """Return the summary statistics for ``name``, or ``None`` if never observed."""
+        with self._lock:
+            found = self._summaries.get(name, {}).get(_label_key(labels))
+            return found.to_dict() if found is not None else None
+
+    def snapshot(self) -> dict[str, list[dict[str, Any]]]:
+        """Return all series as JSON-serialisable lists keyed by metric kind."""
+
+        def rows(series: dict[str, dict[_LabelKey, Any]], field: str) -> list[dict[str, Any]]:
+            out = []
+            for name in sorted(series):
+                for key, value in series[name].items():
+                    data = value.to_dict() if isinstance(value, _Summary) else value
+                    out.append({"name": name, "labels": dict(key), field: data})
+            return out
+
+        with self._lock:
+            return {
+                "counters": rows(self._counters, "value"),
+                "gauges": rows(self._gauges, "value"),
+                "summaries": rows(self._summaries, "stats"),
+            }
+
+    def reset(self) -> None:
+        """Drop every series (used by tests)."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+
+metrics = MetricsRegistry()
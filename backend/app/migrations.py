@@ -0,0 +1,277 @@
+"""Online-safe schema migration helpers for large tables.
+
+A plain ``op.create_index`` holds a lock that blocks writes to the table
+until the whole index is built. A single-statement backfill keeps every row
+it touches locked until it commits. Migration scripts use these helpers
+instead:
+
+- :func:`create_index_concurrently` and :func:`drop_index_concurrently` run
+  ``CREATE/DROP INDEX CONCURRENTLY`` in an autocommit block, outside the
+  migration's transaction. An invalid index left behind by an earlier
+  failed build is dropped and rebuilt.
+- :func:`backfill` updates a table in batches in primary-key order. Each
+  batch commits on its own, the helper sleeps between batches, and it logs
+  progress. :func:`run_batched` does the same for any statement, such as an
+  ``INSERT ... SELECT`` that fills a new table.
+
+``alembic/env.py`` sets ``lock_timeout`` to ``MIGRATION_LOCK_TIMEOUT_MS``
+on the migration connection. A DDL statement that would queue behind a long
+transaction then fails instead. While queued, it would also block all
+traffic arriving after it. Each migration runs in its own transaction, so
+an autocommit block only commits the migration in progress.
+
+Every helper here commits part of the migration, and its revision is only
+recorded at the end. If a later step fails, the next ``alembic upgrade``
+runs the whole migration again over a partly applied schema. Each statement
+in such a migration must therefore be safe to repeat: ``IF NOT EXISTS``,
+``CREATE OR REPLACE``, ``ON CONFLICT DO NOTHING``, or
+:func:`add_constraint` for constraints.
+
+With ``alembic upgrade --sql`` the helpers emit plain SQL. A batched
+statement is then emitted once, for the whole table.
+"""
+
+import contextlib
+import logging
+import time
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+from sqlalchemy import TextClause, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+
+from alembic import op
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def set_lock_timeout(connection: Connection, milliseconds: int) -> None:
+    """Fail statements on ``connection`` that wait longer than ``milliseconds`` for a lock.
+
+    ``0`` waits forever. The setting lasts for the session.
+    """
+    connection.exec_driver_sql(f"SET lock_timeout = {int(milliseconds)}")
+
+
+def is_lock_timeout(exc: BaseException) -> bool:
+    """Whether ``exc`` is PostgreSQL's ``lock_not_available`` error."""
+    if not isinstance(exc, DBAPIError):
+        return False
+    orig = exc.orig
+    return LOCK_NOT_AVAILABLE in (getattr(orig, "sqlstate", None), getattr(orig, "pgcode", None))
+
+
+@contextlib.contextmanager
+def lock_timeout(milliseconds: int) -> Iterator[None]:
+    """Use a different ``lock_timeout`` for the statements in the block."""
+    if op.get_context().as_sql:
+        op.execute(f"SET lock_timeout = {int(milliseconds)}")
+        yield
+        op.execute(f"SET lock_timeout = {get_settings().MIGRATION_LOCK_TIMEOUT_MS}")
+        return
+    bind = op.get_bind()
+    previous = bind.exec_driver_sql("SHOW lock_timeout").scalar_one()
+    set_lock_timeout(bind, milliseconds)
+    try:
+        yield
+    finally:
+        bind.exec_driver_sql(f"SET lock_timeout = '{previous}'")
+
+
+def _index_is_invalid(index_name: str) -> bool:
+    row = (
+        op.get_bind()
+        .execute(
+            text(
+                "SELECT NOT i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+            ),
+            {"name": index_name},
+        )
+        .first()
+    )
+    return bool(row and row[0])
+
+
+def create_index_concurrently(
+    index_name: str,
+    table_name: str,
+    columns: Sequence[str | TextClause],
+    *,
+    unique: bool = False,
+    **kw: Any,
+) -> None:
+    """Build an index without blocking writes, outside the migration transaction.
+
+    ``CONCURRENTLY`` only takes a lock that conflicts with other schema
+    changes and ``VACUUM``, not with reads or writes. It then waits for
+    older transactions to finish. Because the wait blocks nobody, this
+    helper turns ``lock_timeout`` off while the index is built. The helper
+    is idempotent. It drops an index left ``INVALID`` by an interrupted
+    build and builds it again.
+    """
+    as_sql = op.get_context().as_sql
+    with op.get_context().autocommit_block(), lock_timeout(0):
+        if not as_sql and _index_is_invalid(index_name):
+            logger.warning("dropping invalid index %s left by an earlier build", index_name)
+            op.drop_index(
+                index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True
+            )
+        started = time.perf_counter()
+        op.create_index(
+            index_name,
+            table_name,
+            list(columns),
+            unique=unique,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+            **kw,
+        )
+        if not as_sql:
+            logger.info("built index %s in %.1fs", index_name, time.perf_counter() - started)
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    """Drop an index without blocking reads or writes on its table."""
+    with op.get_context().autocommit_block(), lock_timeout(0):
+        op.drop_index(
+            index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True
+        )
+
+
+def add_constraint(table_name: str, constraint_name: str, definition: str) -> None:
+    """Add a constraint unless ``table_name`` already has one named ``constraint_name``.
+
+    PostgreSQL has no ``ADD CONSTRAINT IF NOT EXISTS``, so the check runs in
+    a ``DO`` block. ``definition`` is everything after the constraint name,
+    such as ``"UNIQUE USING INDEX uq_users_id_team_id"``.
+    """
+    op.execute(
+        "DO $$ BEGIN\n"
+        "    IF NOT EXISTS (SELECT 1 FROM pg_constraint\n"
+        f"        WHERE conname = '{constraint_name}' AND conrelid = '{table_name}'::regclass)\n"
+        "    THEN\n"
+        f"        ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} {definition};\n"
+        "    END IF;\n"
+        "END $$"
+    )
+
+
+def _estimate_rows(connection: Connection, table_name: str) -> int | None:
+    if connection.dialect.name != "postgresql":
+        return None
+    estimate = connection.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"),
+        {"t": table_name},
+    ).scalar()
+    return int(estimate) if estimate and estimate > 0 else None
+
+
+def format_progress(
+    label: str, scanned: int, written: int, total: int | None, elapsed: float
+) -> str:
+    """Describe batch progress, with percentage and ETA when the row count is known."""
+    rate = scanned / elapsed if elapsed > 0 else 0.0
+    message = f"{label}: {scanned:,} rows scanned, {written:,} written, {rate:,.0f} rows/s"
+    if total:
+        share = min(scanned / total, 1.0)
+        eta = (total - scanned) / rate if rate and scanned < total else 0.0
+        message += f", {share:.0%} of ~{total:,}, ETA {eta:.0f}s"
+    return message
+
+
+def run_batched(
+    table_name: str,
+    statement: str,
+    *,
+    key: str = "id",
+    batch_size: int = 10_000,
+    pause: float = 0.1,
+    report_every: float = 10.0,
+    label: str | None = None,
+) -> int:
+    """Run ``statement`` once per batch of ``batch_size`` consecutive keys of ``table_name``.
+
+    ``statement`` must contain the placeholder ``{batch}``. It is replaced by
+    ``table_name.key BETWEEN :first AND :last`` for each batch. The table is
+    walked in ``key`` order, and each batch commits on its own, so locks are
+    held briefly. The helper sleeps ``pause`` seconds between batches to
+    leave I/O for live traffic, and logs progress every ``report_every``
+    seconds. Returns the number of rows written. With ``--sql`` the
+    placeholder becomes ``TRUE`` and the statement is emitted once.
+    """
+    if op.get_context().as_sql:
+        op.execute(statement.replace("{batch}", "TRUE"))
+        return 0
+
+    label = label or f"batches over {table_name}"
+    apply_batch = text(
+        statement.replace("{batch}", f"{table_name}.{key} BETWEEN :first AND :last")
+    )
+    first_keys = text(f"SELECT {key} FROM {table_name} ORDER BY {key} LIMIT :n")
+    next_keys = text(
+        f"SELECT {key} FROM {table_name} WHERE {key} > :after ORDER BY {key} LIMIT :n"
+    )
+    total = _estimate_rows(op.get_bind(), table_name)
+    scanned = written = 0
+    after: Any = None
+    started = last_report = time.monotonic()
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while True:
+            if after is None:
+                keys = bind.execute(first_keys, {"n": batch_size}).scalars().all()
+            else:
+                keys = bind.execute(next_keys, {"after": after, "n": batch_size}).scalars().all()
+            if not keys:
+                break
+            result = bind.execute(apply_batch, {"first": keys[0], "last": keys[-1]})
+            scanned += len(keys)
+            written += max(result.rowcount, 0)
+            after = keys[-1]
+            now = time.monotonic()
+            if now - last_report >= report_every:
+                logger.info(format_progress(label, scanned, written, total, now - started))
+                last_report = now
+            if pause:
+                time.sleep(pause)
+    logger.info(format_progress(label, scanned, written, total, time.monotonic() - started))
+    return written
+
+
+def backfill(
+    table_name: str,
+    assignments: str,
+    *,
+    from_clause: str | None = None,
+    where: str | None = None,
+    key: str = "id",
+    batch_size: int = 10_000,
+    pause: float = 0.1,
+    report_every: float = 10.0,
+) -> int:
+    """Run ``UPDATE table SET assignments [FROM ...] [WHERE ...]`` in short batches.
+
+    Each batch updates only the rows in its key range that match ``where``
+    (see :func:`run_batched`). Returns the number of rows updated. Batches
+    can be repeated safely as long as ``where`` excludes rows that are
+    already done (for example ``new_column IS NULL``), so an interrupted
+    backfill can be run again.
+    """
+    update = f"UPDATE {table_name} SET {assignments}"
+    if from_clause:
+        update += f" FROM {from_clause}"
+    filters = f" AND ({where})" if where else ""
+    return run_batched(
+        table_name,
+        f"{update} WHERE {{batch}}{filters}",
+        key=key,
+        batch_size=batch_size,
+        pause=pause,
+        report_every=report_every,
+        label=f"backfill {table_name}",
+    )
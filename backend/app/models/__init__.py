@@ -1,6 +1,20 @@
 """ORM model package — exports all SQLAlchemy models."""
 
+from app.models.feed import CategoryDailyCount, FeedEntry
+from app.models.presence import PresenceSession, PresenceWorker
+from app.models.rate_limit import RateLimitBucket
 from app.models.status import StatusUpdate
+from app.models.team import DEFAULT_TEAM_ID, Team
 from app.models.user import User
 
-__all__ = ["StatusUpdate", "User"]
+__all__ = [
+    "DEFAULT_TEAM_ID",
+    "CategoryDailyCount",
+    "FeedEntry",
+    "PresenceSession",
+    "PresenceWorker",
+    "RateLimitBucket",
+    "StatusUpdate",
+    "Team",
+    "User",
+]
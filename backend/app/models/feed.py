@@ -0,0 +1,72 @@
+"""SQLAlchemy ORM models for the denormalized feed projection.
+
+Both tables are maintained by database triggers (see the ``feed_projection``
+migration), never written by the application.
+"""
+
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, SmallInteger, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class FeedEntry(Base):
+    """One status with its author's display fields, ready to render as a feed card."""
+
+    __tablename__ = "feed_entries"
+    __table_args__ = (
+        Index("ix_feed_entries_created_at", "created_at", "id"),
+        Index("ix_feed_entries_category_created_at", "category", "created_at", "id"),
+        Index("ix_feed_entries_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_feed_entries_username_created_at", "username", "created_at", "id"),
+        Index("ix_feed_entries_team_id_created_at", "team_id", "created_at", "id"),
+        Index(
+            "ix_feed_entries_team_id_category_created_at",
+            "team_id",
+            "category",
+            "created_at",
+            "id",
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("status_updates.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[uuid.UUID]
+    team_id: Mapped[uuid.UUID]
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    category: Mapped[str] = mapped_column(String(20))
+    message: Mapped[str] = mapped_column(Text)
+    username: Mapped[str] = mapped_column(String(50))
+    display_name: Mapped[str] = mapped_column(String(100))
+    avatar_url: Mapped[str | None] = mapped_column(String(500))
+    github_ref_count: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"FeedEntry(id={self.id!r}, username={self.username!r})"
+
+
+class CategoryDailyCount(Base):
+    """One shard of the number of statuses a team posted in a category on a UTC day.
+
+    Posts are counted in one of several shard rows, picked from the status
+    id, so concurrent posts rarely lock the same row. The count is the sum
+    over shards; a single shard may be negative.
+    """
+
+    __tablename__ = "category_daily_counts"
+
+    team_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    day: Mapped[date] = mapped_column(primary_key=True)
+    category: Mapped[str] = mapped_column(String(20), primary_key=True)
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    count: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        return (
+            f"CategoryDailyCount(team_id={self.team_id!r}, day={self.day!r}, "
+            f"category={self.category!r}, shard={self.shard!r}, count={self.count!r})"
+        )
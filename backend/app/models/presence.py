@@ -0,0 +1,42 @@
+"""SQLAlchemy ORM models for presence shared across workers."""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class PresenceWorker(Base):
+    """A worker publishing its connected users when ``PRESENCE_BACKEND=postgres``.
+
+    ``seen_at`` is refreshed on every presence flush. The sessions of a
+    worker that stops refreshing it are ignored once they are older than
+    the heartbeat timeout.
+    """
+
+    __tablename__ = "presence_workers"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    worker_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"PresenceWorker(worker_id={self.worker_id!r}, seen_at={self.seen_at!r})"
+
+
+class PresenceSession(Base):
+    """A user with at least one live WebSocket connection on a worker."""
+
+    __tablename__ = "presence_sessions"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    worker_id: Mapped[str] = mapped_column(
+        ForeignKey("presence_workers.worker_id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(primary_key=True, index=True)
+
+    def __repr__(self) -> str:
+        return f"PresenceSession(worker_id={self.worker_id!r}, user_id={self.user_id!r})"
@@ -0,0 +1,28 @@
+"""SQLAlchemy ORM model for shared rate-limit token buckets."""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class RateLimitBucket(Base):
+    """A token bucket shared by all workers when ``RATE_LIMIT_BACKEND=postgres``.
+
+    The table is UNLOGGED: buckets are cheap to lose on a crash and skipping
+    WAL keeps the write path of rate-limited routes light.
+    """
+
+    __tablename__ = "rate_limit_buckets"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"RateLimitBucket(key={self.key!r}, tokens={self.tokens!r})"
@@ -4,10 +4,19 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import CheckConstraint, ForeignKey, String, Text, func
+from sqlalchemy import (
+    CheckConstraint,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
+from app.models.team import DEFAULT_TEAM_ID
 
 if TYPE_CHECKING:
     from app.models.user import User
@@ -25,17 +34,41 @@ class StatusUpdate(Base):
             f"category IN ({_CATEGORY_IN_CLAUSE})",
             name="ck_status_updates_category",
         ),
+        # A status always belongs to its author's team.
+        ForeignKeyConstraint(
+            ["user_id", "team_id"],
+            ["users.id", "users.team_id"],
+            name="fk_status_updates_user_id_team_id",
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        # Feed (newest first) and export (oldest first) scans, unfiltered or by category.
+        Index("ix_status_updates_created_at", "created_at", "id"),
+        Index("ix_status_updates_category_created_at", "category", "created_at", "id"),
+        # The same scans within one team.
+        Index("ix_status_updates_team_id_created_at", "team_id", "created_at", "id"),
+        Index(
+            "ix_status_updates_team_id_category_created_at",
+            "team_id",
+            "category",
+            "created_at",
+            "id",
+        ),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), index=True
     )
+    # Copied from the author, which fk_status_updates_user_id_team_id enforces.
+    team_id: Mapped[uuid.UUID] = mapped_column(server_default=str(DEFAULT_TEAM_ID))
     message: Mapped[str] = mapped_column(Text)
     category: Mapped[str] = mapped_column(String(20))
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
 
-    user: Mapped["User"] = relationship(back_populates="status_updates", lazy="raise")
+    user: Mapped["User"] = relationship(
+        back_populates="status_updates", foreign_keys=[user_id], lazy="raise"
+    )
 
     def __repr__(self) -> str:
         return f"StatusUpdate(id={self.id!r}, user_id={self.user_id!r})"
@@ -0,0 +1,32 @@
+"""SQLAlchemy ORM model for the Team entity."""
+
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import String, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+if TYPE_CHECKING:
+    from app.models.user import User
+
+# Existing users and statuses were moved into this team when teams were added.
+DEFAULT_TEAM_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+
+
+class Team(Base):
+    """A workspace whose members share a feed, leaderboard and broadcasts."""
+
+    __tablename__ = "teams"
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    slug: Mapped[str] = mapped_column(String(50), unique=True)
+    name: Mapped[str] = mapped_column(String(100))
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+    members: Mapped[list["User"]] = relationship(back_populates="team", lazy="raise")
+
+    def __repr__(self) -> str:
+        return f"Team(id={self.id!r}, slug={self.slug!r})"
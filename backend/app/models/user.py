@@ -4,21 +4,31 @@ import uuid
 from datetime import date, datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String, func
+from sqlalchemy import ForeignKey, Index, String, UniqueConstraint, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
+from app.models.team import DEFAULT_TEAM_ID
 
 if TYPE_CHECKING:
     from app.models.status import StatusUpdate
+    from app.models.team import Team
 
 
 class User(Base):
     """A registered user who can post status updates."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Target of the (user_id, team_id) foreign key on status_updates.
+        UniqueConstraint("id", "team_id", name="uq_users_id_team_id"),
+        Index("ix_users_team_id_xp", "team_id", text("xp DESC"), "username"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    team_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("teams.id", ondelete="CASCADE"), server_default=str(DEFAULT_TEAM_ID)
+    )
     username: Mapped[str] = mapped_column(String(50), unique=True)
     display_name: Mapped[str] = mapped_column(String(100))
     email: Mapped[str] = mapped_column(String(255), unique=True)
@@ -30,8 +40,10 @@ class User(Base):
     last_post_date: Mapped[date | None] = mapped_column(default=None)
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
 
+    team: Mapped["Team"] = relationship(back_populates="members", lazy="raise")
     status_updates: Mapped[list["StatusUpdate"]] = relationship(
         back_populates="user",
+        foreign_keys="StatusUpdate.user_id",
         cascade="all, delete-orphan",
         lazy="raise",
     )
@@ -0,0 +1,95 @@
+"""Startup profiling: per-module import cost of the application.
+
+Run ``python -m app.profiling`` to import ``app.main`` in a fresh interpreter
+with ``-X importtime`` and print the most expensive modules::
+
+    python -m app.profiling --top 20
+    python -m app.profiling --module app.database --json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import asdict, dataclass
+
+_IMPORTTIME_PREFIX = "import time:"
+
+
+@dataclass(frozen=True, slots=True)
+class ImportTiming:
+    """Import cost of a single module as reported by ``-X importtime``."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    """Parse ``-X importtime`` stderr output into :class:`ImportTiming` rows."""
+    timings: list[ImportTiming] = []
+    for line in output.splitlines():
+        if not line.startswith(_IMPORTTIME_PREFIX):
+            continue
+        parts = line[len(_IMPORTTIME_PREFIX) :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header row
+        name = parts[2][1:]
+        stripped = name.lstrip(" ")
+        timings.append(
+            ImportTiming(
+                module=stripped,
+                self_us=int(parts[0]),
+                cumulative_us=int(parts[1]),
+                depth=(len(name) - len(stripped)) // 2,
+            )
+        )
+    return timings
+
+
+def profile_imports(module: str = "app.main") -> list[ImportTiming]:
+    """Import ``module`` in a subprocess and return its per-module import timings."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("JWT_SECRET", "profile-only")
+    proc = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    if proc.returncode != 0:
+        msg = f"importing {module!r} failed:\n{proc.stderr[-2000:]}"
+        raise RuntimeError(msg)
+    return parse_importtime(proc.stderr)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Print the slowest imports of the given module."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--sort", choices=("self", "cumulative"), default="self")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    timings = profile_imports(args.module)
+    key = "self_us" if args.sort == "self" else "cumulative_us"
+    ranked = sorted(timings, key=lambda t: getattr(t, key), reverse=True)[: args.top]
+    total_us = next((t.cumulative_us for t in timings if t.module == args.module), 0)
+
+    if args.json:
+        print(json.dumps({"total_us": total_us, "modules": [asdict(t) for t in ranked]}))
+        return 0
+
+    print(f"{'self ms':>9} {'cum ms':>9}  module")
+    for t in ranked:
+        print(f"{t.self_us / 1000:9.1f} {t.cumulative_us / 1000:9.1f}  {t.module}")
+    print(f"\nimport {args.module}: {total_us / 1000:.1f} ms cumulative")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,358 @@
+"""Catalog of hot read queries, built once and reused for every call.
+
+The feed, single-status lookup, user-by-username lookup, leaderboard and
+per-category daily counts are Core ``select()`` constructs over table
+columns with bound parameters. Each statement object is built once per
+process, so every execution hits SQLAlchemy's compiled cache, and the
+rendered SQL is identical across calls, so the asyncpg dialect reuses its
+per-connection prepared statement (see ``DB_STATEMENT_MODE`` in
+:mod:`app.config`). Rows are returned as mappings; no ORM identity map or
+attribute instrumentation is involved.
+
+With ``FEED_PROJECTION`` enabled, feed, count, export and single-status
+reads come from the trigger-maintained ``feed_entries`` table instead of
+joining ``status_updates`` with ``users``. Each page is then one range scan
+over a ``feed_entries`` index. Rows keep the same keys, plus
+``github_ref_count``.
+
+Team-scoped variants filter on ``team_id`` first. Every table they read has
+an index that leads with ``team_id`` (see the ``teams`` migration), so one
+team's page or leaderboard costs the same however many teams share the
+database.
+
+Metrics (see :mod:`app.metrics`), all labelled with ``query``:
+
+- ``db_query_compile_seconds`` — SQL compilation time, measured once in :func:`install`.
+- ``db_query_prepare_seconds`` — first execution on a warmed connection
+  (server-side parse and plan plus an empty execution), from :func:`prime_connection`.
+- ``db_query_seconds`` — end-to-end time of each catalog execution.
+- ``db_query_compiled_cache_total`` — compiled-cache outcome, labelled ``result=hit|miss``.
+"""
+
+import time
+import uuid
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import cache
+from typing import Any
+
+from sqlalchemy import Select, bindparam, event, func, select
+from sqlalchemy.engine import Connection, RowMapping
+from sqlalchemy.engine.default import CACHE_HIT
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.config import get_settings
+from app.metrics import metrics
+from app.models import CategoryDailyCount, FeedEntry, StatusUpdate, User
+
+_statuses = StatusUpdate.__table__
+_users = User.__table__
+_feed = FeedEntry.__table__
+_category_counts = CategoryDailyCount.__table__
+
+_CATALOG_OPTION = "catalog_query"
+
+FEED_COLUMNS = (
+    _statuses.c.id,
+    _statuses.c.message,
+    _statuses.c.category,
+    _statuses.c.created_at,
+    _statuses.c.user_id,
+    _users.c.username,
+    _users.c.display_name,
+    _users.c.avatar_url,
+)
+
+PROJECTED_FEED_COLUMNS = (
+    _feed.c.id,
+    _feed.c.message,
+    _feed.c.category,
+    _feed.c.created_at,
+    _feed.c.user_id,
+    _feed.c.username,
+    _feed.c.display_name,
+    _feed.c.avatar_url,
+    _feed.c.github_ref_count,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class FeedFilters:
+    """Optional feed filters, matching the ``GET /statuses`` query parameters.
+
+    ``team_id`` limits the feed to one team. ``until`` (inclusive upper
+    bound on ``created_at``) is only exposed by the export endpoint, where
+    reports need a closed date range.
+    """
+
+    team_id: uuid.UUID | None = None
+    user_id: uuid.UUID | None = None
+    username: str | None = None
+    category: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+
+    @property
+    def active(self) -> tuple[str, ...]:
+        """Names of the filters that are set, in a stable order."""
+        return tuple(
+            name
+            for name in ("team_id", "user_id", "username", "category", "since", "until")
+            if getattr(self, name) is not None
+        )
+
+    def params(self) -> dict[str, Any]:
+        """Bound parameter values for the active filters."""
+        return {name: getattr(self, name) for name in self.active}
+
+
+def _feed_where(
+    stmt: Select[Any], active: tuple[str, ...], projected: bool = False
+) -> Select[Any]:
+    source = _feed if projected else _statuses
+    authors = _feed if projected else _users
+    if "team_id" in active:
+        stmt = stmt.where(source.c.team_id == bindparam("team_id"))
+    if "user_id" in active:
+        stmt = stmt.where(source.c.user_id == bindparam("user_id"))
+    if "username" in active:
+        stmt = stmt.where(authors.c.username == bindparam("username"))
+    if "category" in active:
+        stmt = stmt.where(source.c.category == bindparam("category"))
+    if "since" in active:
+        stmt = stmt.where(source.c.created_at > bindparam("since"))
+    if "until" in active:
+        stmt = stmt.where(source.c.created_at <= bindparam("until"))
+    return stmt
+
+
+def _feed_select(projected: bool) -> Select[Any]:
+    if projected:
+        return select(*PROJECTED_FEED_COLUMNS)
+    return select(*FEED_COLUMNS).join(_users, _users.c.id == _statuses.c.user_id)
+
+
+def _variant_name(base: str, active: tuple[str, ...]) -> str:
+    return f"{base}[{','.join(active)}]" if active else base
+
+
+@cache
+def feed_statement(active: tuple[str, ...] = (), projected: bool = False) -> Select[Any]:
+    """Newest-first feed page with author display fields."""
+    source = _feed if projected else _statuses
+    return (
+        _feed_where(_feed_select(projected), active, projected)
+        .order_by(source.c.created_at.desc(), source.c.id.desc())
+        .limit(bindparam("limit"))
+        .offset(bindparam("offset"))
+    )
+
+
+@cache
+def feed_count_statement(active: tuple[str, ...] = (), projected: bool = False) -> Select[Any]:
+    """Total number of statuses matching the feed filters."""
+    if projected:
+        stmt = select(func.count().label("count")).select_from(_feed)
+    else:
+        stmt = select(func.count().label("count")).select_from(_statuses)
+        if "username" in active:
+            stmt = stmt.join(_users, _users.c.id == _statuses.c.user_id)
+    return _feed_where(stmt, active, projected)
+
+
+@cache
+def export_statement(active: tuple[str, ...] = (), projected: bool = False) -> Select[Any]:
+    """Every status matching the feed filters, oldest first, for streaming export."""
+    source = _feed if projected else _statuses
+    return _feed_where(_feed_select(projected), active, projected).order_by(
+        source.c.created_at, source.c.id
+    )
+
+
+STATUS_BY_ID = (
+    select(*FEED_COLUMNS)
+    .join(_users, _users.c.id == _statuses.c.user_id)
+    .where(_statuses.c.id == bindparam("status_id"))
+)
+
+PROJECTED_STATUS_BY_ID = select(*PROJECTED_FEED_COLUMNS).where(
+    _feed.c.id == bindparam("status_id")
+)
+
+USER_BY_USERNAME = select(_users).where(_users.c.username == bindparam("username"))
+
+LEADERBOARD = (
+    select(
+        _users.c.id,
+        _users.c.username,
+        _users.c.display_name,
+        _users.c.avatar_url,
+        _users.c.xp,
+        _users.c.current_streak,
+        _users.c.longest_streak,
+        _users.c.last_post_date,
+    )
+    .order_by(_users.c.xp.desc(), _users.c.username)
+    .limit(bindparam("limit"))
+)
+
+# Reads the top of ix_users_team_id_xp, however many users other teams have.
+TEAM_LEADERBOARD = LEADERBOARD.where(_users.c.team_id == bindparam("team_id"))
+
+# Counts are only read per team: the key leads with team_id, so an
+# all-teams range would scan every team's rows.
+TEAM_CATEGORY_DAILY_COUNTS = (
+    select(
+        _category_counts.c.day,
+        _category_counts.c.category,
+        func.sum(_category_counts.c.count).label("count"),
+    )
+    .where(
+        _category_counts.c.team_id == bindparam("team_id"),
+        _category_counts.c.day.between(bindparam("since"), bindparam("until")),
+    )
+    .group_by(_category_counts.c.day, _category_counts.c.category)
+    .order_by(_category_counts.c.day, _category_counts.c.category)
+)
+
+USER_TEAMS = select(_users.c.id, _users.c.team_id).where(
+    _users.c.id.in_(bindparam("user_ids", expanding=True))
+)
+
+
+def _status_by_id(projected: bool) -> Select[Any]:
+    return PROJECTED_STATUS_BY_ID if projected else STATUS_BY_ID
+
+
+def _warmup() -> Mapping[str, tuple[Select[Any], dict[str, Any]]]:
+    """Base statements with parameters that make them cheap no-ops.
+
+    Used to compile and prepare every hot query before the first request.
+    The feed and status statements follow ``FEED_PROJECTION``.
+    """
+    projected = get_settings().FEED_PROJECTION
+    return {
+        "feed": (feed_statement((), projected), {"limit": 0, "offset": 0}),
+        "status_by_id": (_status_by_id(projected), {"status_id": uuid.UUID(int=0)}),
+        "user_by_username": (USER_BY_USERNAME, {"username": ""}),
+        "leaderboard": (LEADERBOARD, {"limit": 0}),
+        "team_leaderboard": (TEAM_LEADERBOARD, {"team_id": uuid.UUID(int=0), "limit": 0}),
+        "team_category_counts": (
+            TEAM_CATEGORY_DAILY_COUNTS,
+            {"team_id": uuid.UUID(int=0), "since": date.max, "until": date.min},
+        ),
+    }
+
+
+def _record_cache_outcome(
+    conn: Connection,
+    cursor: DBAPICursor,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext | None,
+    executemany: bool,
+) -> None:
+    if context is None:
+        return
+    name = context.execution_options.get(_CATALOG_OPTION)
+    if name is None:
+        return
+    result = "hit" if getattr(context, "cache_hit", None) is CACHE_HIT else "miss"
+    metrics.increment("db_query_compiled_cache_total", query=name, result=result)
+
+
+def install(engine: AsyncEngine) -> None:
+    """Attach cache-outcome instrumentation to ``engine`` and record compile times."""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _record_cache_outcome):
+        event.listen(sync_engine, "before_cursor_execute", _record_cache_outcome)
+    for name, (stmt, _) in _warmup().items():
+        start = time.perf_counter()
+        stmt.compile(dialect=engine.dialect)
+        metrics.observe("db_query_compile_seconds", time.perf_counter() - start, query=name)
+
+
+async def prime_connection(conn: AsyncConnection) -> None:
+    """Execute every catalog query once on ``conn`` so it is compiled and prepared."""
+    for name, (stmt, params) in _warmup().items():
+        start = time.perf_counter()
+        await conn.execute(stmt, params, execution_options={_CATALOG_OPTION: name})
+        metrics.observe("db_query_prepare_seconds", time.perf_counter() - start, query=name)
+
+
+async def _execute(
+    session: AsyncSession, name: str, stmt: Select[Any], params: dict[str, Any]
+) -> Sequence[RowMapping]:
+    with metrics.timer("db_query_seconds", query=name):
+        result = await session.execute(stmt, params, execution_options={_CATALOG_OPTION: name})
+        rows: Sequence[RowMapping] = result.mappings().all()
+        return rows
+
+
+async def fetch_feed(
+    session: AsyncSession, filters: FeedFilters, *, limit: int, offset: int
+) -> Sequence[RowMapping]:
+    """Return one feed page as row mappings with :data:`FEED_COLUMNS` keys."""
+    active = filters.active
+    params = {**filters.params(), "limit": limit, "offset": offset}
+    stmt = feed_statement(active, get_settings().FEED_PROJECTION)
+    return await _execute(session, _variant_name("feed", active), stmt, params)
+
+
+async def count_feed(session: AsyncSession, filters: FeedFilters) -> int:
+    """Return the number of statuses matching ``filters``."""
+    active = filters.active
+    rows = await _execute(
+        session,
+        _variant_name("feed_count", active),
+        feed_count_statement(active, get_settings().FEED_PROJECTION),
+        filters.params(),
+    )
+    count: int = rows[0]["count"]
+    return count
+
+
+async def fetch_status(session: AsyncSession, status_id: uuid.UUID) -> RowMapping | None:
+    """Return a single status with author display fields, or ``None``."""
+    stmt = _status_by_id(get_settings().FEED_PROJECTION)
+    rows = await _execute(session, "status_by_id", stmt, {"status_id": status_id})
+    return rows[0] if rows else None
+
+
+async def fetch_user_by_username(session: AsyncSession, username: str) -> RowMapping | None:
+    """Return the ``users`` row for ``username``, or ``None``."""
+    rows = await _execute(session, "user_by_username", USER_BY_USERNAME, {"username": username})
+    return rows[0] if rows else None
+
+
+async def fetch_leaderboard(
+    session: AsyncSession, *, limit: int, team_id: uuid.UUID | None = None
+) -> Sequence[RowMapping]:
+    """Return the top ``limit`` users by XP, within ``team_id`` if given."""
+    if team_id is None:
+        return await _execute(session, "leaderboard", LEADERBOARD, {"limit": limit})
+    params = {"team_id": team_id, "limit": limit}
+    return await _execute(session, "team_leaderboard", TEAM_LEADERBOARD, params)
+
+
+async def fetch_category_counts(
+    session: AsyncSession, *, team_id: uuid.UUID, since: date, until: date
+) -> Sequence[RowMapping]:
+    """Return one team's per-category status counts for each UTC day from ``since`` to ``until``.
+
+    Days and categories without statuses have no row.
+    """
+    params = {"team_id": team_id, "since": since, "until": until}
+    return await _execute(session, "team_category_counts", TEAM_CATEGORY_DAILY_COUNTS, params)
+
+
+async def fetch_user_teams(
+    session: AsyncSession, user_ids: Sequence[uuid.UUID]
+) -> dict[uuid.UUID, uuid.UUID]:
+    """Map each of ``user_ids`` that exists to its team."""
+    if not user_ids:
+        return {}
+    rows = await _execute(session, "user_teams", USER_TEAMS, {"user_ids": list(user_ids)})
+    return {row["id"]: row["team_id"] for row in rows}
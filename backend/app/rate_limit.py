@@ -0,0 +1,334 @@
+"""Token-bucket rate limiting for login, registration, posting and WebSocket connects.
+
+Each limited *scope* has a rate taken from ``Settings.RATE_LIMIT_<SCOPE>``, in
+the form ``"<count>/<second|minute|hour|day>"`` or ``"off"``. A scope's
+bucket holds ``count`` tokens and refills continuously at
+``count / period``. Each request spends one token.
+
+Two backends are available (``RATE_LIMIT_BACKEND``):
+
+``memory``
+    An in-process :class:`TokenBucketStore`. Each check is O(1): the bucket
+    refills lazily on access. Memory is bounded by ``RATE_LIMIT_MAX_KEYS``,
+    and the least recently used keys are evicted first. Limits apply per worker.
+``postgres``
+    The in-process store is checked first, so denied requests never reach
+    the database. Requests it allows are then checked against a shared
+    bucket in the ``rate_limit_buckets`` table (UNLOGGED), with one atomic
+    upsert, which makes the limit hold across workers. If the database
+    fails, the shared check fails open and the per-worker limit still applies.
+    A bucket left alone refills to capacity, and a full bucket behaves
+    exactly like a missing row, so every ``RATE_LIMIT_PRUNE_INTERVAL_SECONDS``
+    each worker deletes the rows that have refilled (and every row of a scope
+    that is ``off``). Without that, the table keeps one row per client ever
+    seen.
+
+Routes opt in with ``Depends(rate_limit("login"))``. WebSocket handlers
+call :func:`allow_websocket` before accepting. Every decision is counted in
+``rate_limit_decisions_total{scope, decision}``.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request, WebSocket, status
+from sqlalchemy import Float, String, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import RATE_LIMIT_PATTERN, Settings, get_settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+
+SCOPES = ("login", "register", "status_create", "ws_connect", "export")
+
+
+@dataclass(frozen=True, slots=True)
+class Rate:
+    """Bucket capacity and refill speed for one scope."""
+
+    capacity: float
+    per_second: float
+
+    @property
+    def period_seconds(self) -> float:
+        """Time for an empty bucket to refill completely."""
+        return self.capacity / self.per_second
+
+
+def parse_rate(value: str) -> Rate | None:
+    """Parse ``"<count>/<period>"`` into a :class:`Rate`; ``"off"`` gives ``None``."""
+    match = RATE_LIMIT_PATTERN.match(value.strip())
+    if match is None:
+        msg = f"invalid rate {value!r}; expected '<count>/<second|minute|hour|day>' or 'off'"
+        raise ValueError(msg)
+    if match.group(1) is None:
+        return None
+    count = int(match.group(1))
+    return Rate(capacity=count, per_second=count / _PERIODS[match.group(2)])
+
+
+@dataclass(frozen=True, slots=True)
+class Decision:
+    """Outcome of one rate-limit check."""
+
+    allowed: bool
+    remaining: float
+    retry_after: float = 0.0
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+
+
+class TokenBucketStore:
+    """In-process token buckets with LRU eviction beyond ``max_keys`` entries."""
+
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: OrderedDict[Hashable, _Bucket] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def consume(self, key: Hashable, rate: Rate, cost: float = 1.0) -> Decision:
+        """Spend ``cost`` tokens from ``key``'s bucket if it has them."""
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket(rate.capacity, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                metrics.increment("rate_limit_evictions_total")
+        else:
+            self._buckets.move_to_end(key)
+            elapsed = now - bucket.updated
+            bucket.tokens = min(rate.capacity, bucket.tokens + elapsed * rate.per_second)
+            bucket.updated = now
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            return Decision(allowed=True, remaining=bucket.tokens)
+        return Decision(
+            allowed=False,
+            remaining=bucket.tokens,
+            retry_after=(cost - bucket.tokens) / rate.per_second,
+        )
+
+
+# One atomic round-trip: refill from the elapsed server time, then spend a
+# token only if one is available. No row returned means the request is denied.
+_SHARED_CONSUME = text(
+    """
+    INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+    VALUES (:key, :capacity - 1, clock_timestamp())
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = LEAST(
+            :capacity,
+            b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :per_second
+        ) - 1,
+        updated_at = clock_timestamp()
+    WHERE LEAST(
+        :capacity,
+        b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :per_second
+    ) >= 1
+    RETURNING tokens
+    """
+).bindparams(
+    bindparam("key", type_=String),
+    bindparam("capacity", type_=Float),
+    bindparam("per_second", type_=Float),
+)
+
+
+# Deletes the buckets of one scope that have refilled to capacity by now.
+# An "off" scope is pruned with capacity and rate 0, which matches every row.
+_SHARED_PRUNE = text(
+    """
+    DELETE FROM rate_limit_buckets
+    WHERE starts_with(key, :prefix)
+      AND tokens + EXTRACT(EPOCH FROM clock_timestamp() - updated_at) * :per_second
+          >= :capacity
+    """
+).bindparams(
+    bindparam("prefix", type_=String),
+    bindparam("capacity", type_=Float),
+    bindparam("per_second", type_=Float),
+)
+
+
+class PostgresTokenBucketStore:
+    """Shared buckets in PostgreSQL, fronted by a per-worker in-memory store."""
+
+    def __init__(self, engine: AsyncEngine, local: TokenBucketStore) -> None:
+        self._engine = engine
+        self._local = local
+
+    async def consume(self, key: str, rate: Rate) -> Decision:
+        """Check the local bucket, then spend a token from the shared bucket."""
+        local = self._local.consume(key, rate)
+        if not local.allowed:
+            return local
+        try:
+            async with self._engine.begin() as conn:
+                result = await conn.execute(
+                    _SHARED_CONSUME,
+                    {"key": key, "capacity": rate.capacity, "per_second": rate.per_second},
+                )
+                remaining = result.scalar_one_or_none()
+        except Exception:
+            metrics.increment("rate_limit_backend_errors_total")
+            logger.warning("shared rate limit check failed; using per-worker limit", exc_info=True)
+            return local
+        if remaining is None:
+            return Decision(allowed=False, remaining=0.0, retry_after=1 / rate.per_second)
+        return Decision(allowed=True, remaining=float(remaining))
+
+    async def prune(self, rates: Mapping[str, Rate | None]) -> int:
+        """Delete shared buckets that have refilled, one statement per scope.
+
+        Returns the number of rows deleted.
+        """
+        deleted = 0
+        async with self._engine.begin() as conn:
+            for scope, rate in rates.items():
+                result = await conn.execute(
+                    _SHARED_PRUNE,
+                    {
+                        "prefix": f"{scope}:",
+                        "capacity": rate.capacity if rate is not None else 0.0,
+                        "per_second": rate.per_second if rate is not None else 0.0,
+                    },
+                )
+                deleted += result.rowcount
+        metrics.increment("rate_limit_pruned_total", deleted)
+        return deleted
+
+
+class RateLimiter:
+    """Per-scope rate limits from settings, checked against the configured backend."""
+
+    def __init__(self, settings: Settings, engine: AsyncEngine | None = None) -> None:
+        self.rates: dict[str, Rate | None] = {
+            scope: parse_rate(getattr(settings, f"RATE_LIMIT_{scope.upper()}")) for scope in SCOPES
+        }
+        self.local = TokenBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+        self.prune_interval = settings.RATE_LIMIT_PRUNE_INTERVAL_SECONDS
+        self._shared: PostgresTokenBucketStore | None = None
+        self._task: asyncio.Task[None] | None = None
+        if settings.RATE_LIMIT_BACKEND == "postgres":
+            if engine is None:
+                msg = "RATE_LIMIT_BACKEND=postgres requires a database engine"
+                raise ValueError(msg)
+            self._shared = PostgresTokenBucketStore(engine, self.local)
+
+    async def check(self, scope: str, key: str) -> Decision:
+        """Spend one token for ``key`` in ``scope`` and record the decision."""
+        rate = self.rates[scope]
+        if rate is None:
+            return Decision(allowed=True, remaining=float("inf"))
+        bucket_key = f"{scope}:{key}"
+        if self._shared is not None:
+            decision = await self._shared.consume(bucket_key, rate)
+        else:
+            decision = self.local.consume(bucket_key, rate)
+        metrics.increment(
+            "rate_limit_decisions_total",
+            scope=scope,
+            decision="allowed" if decision.allowed else "denied",
+        )
+        metrics.set_gauge("rate_limit_keys", len(self.local))
+        return decision
+
+    async def prune(self) -> int:
+        """Delete refilled shared buckets now; returns 0 for the memory backend."""
+        if self._shared is None:
+            return 0
+        return await self._shared.prune(self.rates)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.prune_interval)
+            try:
+                await self.prune()
+            except Exception:
+                logger.exception("rate limit bucket pruning failed")
+
+    def start(self) -> None:
+        """Start pruning shared buckets periodically; a no-op for the memory backend."""
+        if self._shared is not None and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="rate-limit-prune")
+
+    async def stop(self) -> None:
+        """Stop the pruning loop."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the worker's rate limiter, creating it lazily from settings."""
+    global _limiter  # noqa: PLW0603
+    if _limiter is None:
+        settings = get_settings()
+        engine = None
+        if settings.RATE_LIMIT_BACKEND == "postgres":
+            from app.database import get_engine
+
+            engine = get_engine()
+        _limiter = RateLimiter(settings, engine)
+    return _limiter
+
+
+def client_key(request: Request | WebSocket) -> str:
+    """Identify the caller: the authenticated user id if set, else the client address."""
+    user_id = getattr(request.state, "user_id", None)
+    if user_id is not None:
+        return f"user:{user_id}"
+    host = request.client.host if request.client is not None else "unknown"
+    return f"ip:{host}"
+
+
+def rate_limit(
+    scope: str, key: Callable[[Request], str] = client_key
+) -> Callable[[Request], Awaitable[None]]:
+    """Build a dependency that answers ``429`` once ``scope``'s limit is exhausted."""
+    if scope not in SCOPES:
+        msg = f"unknown rate limit scope {scope!r}"
+        raise ValueError(msg)
+
+    async def dependency(request: Request) -> None:
+        decision = await get_rate_limiter().check(scope, key(request))
+        if not decision.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(max(1, round(decision.retry_after)))},
+            )
+
+    return dependency
+
+
+async def allow_websocket(websocket: WebSocket, scope: str = "ws_connect") -> bool:
+    """Check a WebSocket connect; close with 1013 (try again later) when limited."""
+    decision = await get_rate_limiter().check(scope, client_key(websocket))
+    if not decision.allowed:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="rate limited")
+    return decision.allowed
@@ -0,0 +1,85 @@
+"""Multi-worker serving with rolling restarts and connection draining.
+
+Run ``python -m app.serve`` instead of ``uvicorn app.main:app`` in
+production. It starts ``--workers`` uvicorn worker processes that share one
+listening socket, under uvicorn's supervisor::
+
+    python -m app.serve --host 0.0.0.0 --port 8000 --workers 4
+
+- ``SIGHUP`` to the supervisor restarts the workers one at a time. Each
+  replacement must report started before its predecessor gets ``SIGTERM``.
+- ``SIGTERM`` to the supervisor stops every worker at once. This is what an
+  orchestrator sends on a deploy.
+
+A worker that gets ``SIGTERM`` drains before it stops (see
+:mod:`app.services.drain`). Its readiness turns ``503``, and after
+``DRAIN_GRACE_SECONDS`` its WebSockets are closed in waves over
+``DRAIN_SECONDS``. Allow at least ``DRAIN_GRACE_SECONDS + DRAIN_SECONDS +
+--graceful-timeout`` before force-killing the process.
+
+Every worker has its own database pool, so the server can open up to
+``workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)`` connections.
+"""
+
+import argparse
+import logging
+import os
+
+import uvicorn
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def default_workers() -> int:
+    """``WEB_CONCURRENCY`` if set, else one worker per CPU."""
+    return int(os.environ.get("WEB_CONCURRENCY") or os.cpu_count() or 1)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Serve the application with the given number of workers."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app.main:app", help="ASGI app import string")
+    parser.add_argument("--factory", action="store_true", help="--app is an app factory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=30,
+        help="seconds to wait for in-flight requests after the drain",
+    )
+    parser.add_argument(
+        "--startup-timeout",
+        type=int,
+        default=30,
+        help="seconds a replacement worker may take to start during a rolling restart",
+    )
+    parser.add_argument("--log-level", default=None)
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    logging.basicConfig(level=args.log_level or settings.LOG_LEVEL)
+    logger.info(
+        "serving %s with %d workers, up to %d database connections",
+        args.app,
+        args.workers,
+        args.workers * (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW),
+    )
+    uvicorn.run(
+        args.app,
+        factory=args.factory,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=(args.log_level or settings.LOG_LEVEL).lower(),
+        timeout_graceful_shutdown=args.graceful_timeout,
+        timeout_worker_healthcheck=args.startup_timeout,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+"""Per-team broadcast channels for WebSocket connections.
+
+Every broadcast is addressed to one team. Each worker groups its
+connections by team in :class:`TeamChannels`, so a publish only visits the
+members of that team. Its cost grows with the team's size, not with the
+number of teams or connections on the worker. Members of other teams never
+see the message.
+
+A member's ``send`` gets at most ``CHANNEL_SEND_TIMEOUT_SECONDS``. A
+connection whose send fails or times out is unsubscribed, so one stalled
+client cannot hold up its team. Request handlers publish through the task
+runner's ``broadcast`` queue, for example
+``runner.submit("broadcast", partial(channels.publish, team_id, message))``.
+
+Presence diffs (see :mod:`app.services.presence`) list users of all teams.
+:meth:`TeamChannels.publish_presence` splits each diff by team and sends
+every team only its own members' changes. The team of a user who is not
+connected to this worker is looked up with
+:func:`~app.queries.fetch_user_teams` and remembered until the user goes
+offline. A user moved to another team keeps their old team until their
+connections close, like their own subscriptions, and is routed to the new
+team from their next session. Users whose team cannot be found are left
+out rather than sent to everyone.
+
+Metrics:
+
+- ``channel_teams`` — teams with a member connected to this worker (gauge).
+- ``channel_fanout`` — recipients per publish.
+- ``channel_send_failures_total`` — sends that failed or timed out.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from app.config import get_settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+TeamResolver = Callable[[Sequence[uuid.UUID]], Awaitable[Mapping[uuid.UUID, uuid.UUID]]]
+
+# Users whose team is remembered for presence routing, most recent first.
+MAX_KNOWN_USERS = 100_000
+
+
+@dataclass(frozen=True, slots=True)
+class Member:
+    """One subscribed connection and the user and team it belongs to."""
+
+    user_id: uuid.UUID
+    team_id: uuid.UUID
+    send: Send
+
+
+class TeamChannels:
+    """This worker's connections, grouped by team, with team-scoped publish."""
+
+    def __init__(self, *, send_timeout: float, resolve_teams: TeamResolver | None = None) -> None:
+        self.send_timeout = send_timeout
+        self.resolve_teams = resolve_teams
+        self._channels: dict[uuid.UUID, dict[Hashable, Member]] = {}
+        self._connections: dict[Hashable, Member] = {}
+        self._user_teams: OrderedDict[uuid.UUID, uuid.UUID] = OrderedDict()
+
+    @property
+    def team_count(self) -> int:
+        """Number of teams with at least one member connected to this worker."""
+        return len(self._channels)
+
+    def members(self, team_id: uuid.UUID) -> int:
+        """Number of ``team_id``'s connections on this worker."""
+        return len(self._channels.get(team_id, ()))
+
+    def subscribe(
+        self, connection_id: Hashable, *, user_id: uuid.UUID, team_id: uuid.UUID, send: Send
+    ) -> None:
+        """Add a connection to its team's channel."""
+        self.unsubscribe(connection_id)
+        member = Member(user_id, team_id, send)
+        self._connections[connection_id] = member
+        self._channels.setdefault(team_id, {})[connection_id] = member
+        self._remember(user_id, team_id)
+        metrics.set_gauge("channel_teams", len(self._channels))
+
+    def unsubscribe(self, connection_id: Hashable) -> bool:
+        """Remove a connection; ``False`` if it was not subscribed."""
+        member = self._connections.pop(connection_id, None)
+        if member is None:
+            return False
+        channel = self._channels[member.team_id]
+        del channel[connection_id]
+        if not channel:
+            del self._channels[member.team_id]
+        metrics.set_gauge("channel_teams", len(self._channels))
+        return True
+
+    def _remember(self, user_id: uuid.UUID, team_id: uuid.UUID) -> None:
+        self._user_teams[user_id] = team_id
+        self._user_teams.move_to_end(user_id, last=False)
+        while len(self._user_teams) > MAX_KNOWN_USERS:
+            self._user_teams.popitem()
+
+    async def _send(
+        self, connection_id: Hashable, member: Member, message: dict[str, Any]
+    ) -> bool:
+        try:
+            await asyncio.wait_for(member.send(message), timeout=self.send_timeout)
+        except Exception:
+            metrics.increment("channel_send_failures_total")
+            logger.warning("dropping connection %r after a failed send", connection_id)
+            self.unsubscribe(connection_id)
+            return False
+        return True
+
+    async def publish(self, team_id: uuid.UUID, message: dict[str, Any]) -> int:
+        """Send ``message`` to ``team_id``'s members on this worker; return how many got it."""
+        channel = self._channels.get(team_id)
+        if not channel:
+            return 0
+        recipients = list(channel.items())
+        metrics.observe("channel_fanout", len(recipients))
+        sent = await asyncio.gather(*(self._send(c, m, message) for c, m in recipients))
+        return sum(sent)
+
+    async def _teams_of(self, user_ids: set[uuid.UUID]) -> dict[uuid.UUID, uuid.UUID]:
+        unknown = [u for u in user_ids if u not in self._user_teams]
+        if unknown and self.resolve_teams is not None:
+            try:
+                for user_id, team_id in (await self.resolve_teams(unknown)).items():
+                    self._remember(user_id, team_id)
+            except Exception:
+                logger.warning("could not look up teams for presence", exc_info=True)
+        return {u: self._user_teams[u] for u in user_ids if u in self._user_teams}
+
+    async def publish_presence(self, message: dict[str, Any]) -> None:
+        """Send each team the part of a presence diff that concerns its own members."""
+        changes = {
+            key: {uuid.UUID(u) for u in message.get(key, ())} for key in ("online", "offline")
+        }
+        teams = await self._teams_of(changes["online"] | changes["offline"])
+        by_team: dict[uuid.UUID, dict[str, list[str]]] = {}
+        for key, user_ids in changes.items():
+            for user_id in user_ids:
+                team_id = teams.get(user_id)
+                if team_id is not None and team_id in self._channels:
+                    part = by_team.setdefault(team_id, {"online": [], "offline": []})
+                    part[key].append(str(user_id))
+        # Look the team up again next time, in case the user has moved since.
+        for user_id in changes["offline"]:
+            self._user_teams.pop(user_id, None)
+        await asyncio.gather(
+            *(
+                self.publish(
+                    team_id,
+                    {**message, "online": sorted(p["online"]), "offline": sorted(p["offline"])},
+                )
+                for team_id, p in by_team.items()
+            )
+        )
+
+
+async def _resolve_from_database(user_ids: Sequence[uuid.UUID]) -> Mapping[uuid.UUID, uuid.UUID]:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.database import get_engine
+    from app.queries import fetch_user_teams
+
+    async with AsyncSession(get_engine()) as session:
+        return await fetch_user_teams(session, user_ids)
+
+
+_channels: TeamChannels | None = None
+
+
+def get_team_channels() -> TeamChannels:
+    """Return the worker's team channels, creating them lazily from settings."""
+    global _channels  # noqa: PLW0603
+    if _channels is None:
+        _channels = TeamChannels(
+            send_timeout=get_settings().CHANNEL_SEND_TIMEOUT_SECONDS,
+            resolve_teams=_resolve_from_database,
+        )
+    return _channels
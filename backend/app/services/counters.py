@@ -0,0 +1,356 @@
+"""Write coalescing for the per-user XP and streak counters on ``users``.
+
+Posting a status changes the author's ``xp``, ``current_streak``,
+``longest_streak`` and ``last_post_date``. Updating the row on every post
+makes burst posters and bulk imports queue on its row lock. Instead, each
+worker keeps the pending changes in memory and writes them in batches:
+
+- XP is accumulated as a delta and applied as ``xp = users.xp + delta``, so
+  several workers can flush for the same user without losing increments.
+- Streak fields are absolute values. They are applied only if the pending
+  ``last_post_date`` is not older than the stored one, and
+  ``longest_streak`` only ever grows.
+
+A batch is one ``UPDATE users ... FROM (VALUES ...)`` statement per
+``COUNTER_FLUSH_BATCH_SIZE`` users, ordered by id so that concurrent
+flushes lock rows in the same order. Flushes run every
+``COUNTER_FLUSH_INTERVAL_SECONDS``, and earlier once
+``COUNTER_FLUSH_MAX_PENDING`` users are pending.
+
+Durability: the ``status_updates`` row is committed by the request itself.
+Only the derived counters are deferred. A graceful shutdown flushes
+everything (:meth:`CounterAggregator.stop`). A failed flush puts its
+changes back and retries them on the next interval. A hard crash (SIGKILL,
+OOM) loses every change not yet written: normally one interval's worth,
+but everything since the last successful flush while flushes are failing.
+Pending changes are capped at ``COUNTER_PENDING_LIMIT`` users; past that,
+changes for further users are dropped and counted, so a long database
+outage cannot grow the worker's memory without bound. Callers that need
+the counters on disk before continuing (bulk imports, tests) can await
+:meth:`CounterAggregator.flush`.
+
+Reads: :meth:`CounterAggregator.view` overlays pending and in-flight
+changes on the stored values, so users see their own XP right away.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from typing import cast
+
+import sqlalchemy as sa
+
+from app.config import get_settings
+from app.database import get_engine
+from app.metrics import metrics
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Counters:
+    """The gamification counters stored on a ``users`` row."""
+
+    xp: int = 0
+    current_streak: int = 0
+    longest_streak: int = 0
+    last_post_date: date | None = None
+
+    @classmethod
+    def of(cls, user: User) -> "Counters":
+        """Snapshot the stored counters of a loaded ``User``."""
+        return cls(
+            xp=user.xp,
+            current_streak=user.current_streak,
+            longest_streak=user.longest_streak,
+            last_post_date=user.last_post_date,
+        )
+
+
+@dataclass(slots=True)
+class PendingCounters:
+    """Unflushed changes for one user: an XP delta and the latest streak state."""
+
+    user_id: uuid.UUID
+    xp_delta: int = 0
+    current_streak: int | None = None
+    longest_streak: int | None = None
+    last_post_date: date | None = None
+
+    def merge(self, other: "PendingCounters") -> None:
+        """Fold ``other`` into this entry; the streak from the newer post date wins."""
+        self.xp_delta += other.xp_delta
+        if other.last_post_date is not None and (
+            self.last_post_date is None or other.last_post_date >= self.last_post_date
+        ):
+            self.current_streak = other.current_streak
+            self.last_post_date = other.last_post_date
+        if other.longest_streak is not None:
+            self.longest_streak = max(self.longest_streak or 0, other.longest_streak)
+
+    def apply(self, counters: Counters) -> Counters:
+        """Return ``counters`` with this entry's changes applied."""
+        result = replace(counters, xp=counters.xp + self.xp_delta)
+        if self.last_post_date is not None and (
+            counters.last_post_date is None or self.last_post_date >= counters.last_post_date
+        ):
+            result = replace(
+                result,
+                current_streak=self.current_streak or 0,
+                last_post_date=self.last_post_date,
+            )
+        if self.longest_streak is not None:
+            result = replace(
+                result, longest_streak=max(result.longest_streak, self.longest_streak)
+            )
+        return result
+
+
+def advance_streak(counters: Counters, posted_on: date) -> Counters:
+    """Return the streak fields after a post on ``posted_on`` (UTC calendar day).
+
+    Posting again on the same day keeps the streak. Posting the day after the
+    last post extends it by one. Any longer gap starts a new streak of 1.
+    """
+    last = counters.last_post_date
+    if last is not None and posted_on <= last:
+        return counters
+    streak = counters.current_streak + 1 if last == posted_on - timedelta(days=1) else 1
+    return replace(
+        counters,
+        current_streak=streak,
+        longest_streak=max(counters.longest_streak, streak),
+        last_post_date=posted_on,
+    )
+
+
+_users = cast(sa.Table, User.__table__)
+
+BatchWriter = Callable[[Sequence[PendingCounters]], Awaitable[None]]
+
+
+def build_flush_statement(batch: Sequence[PendingCounters]) -> sa.Update:
+    """Build the ``UPDATE users ... FROM (VALUES ...)`` statement for one batch."""
+    v = sa.values(
+        sa.column("id", sa.Uuid),
+        sa.column("xp_delta", sa.Integer),
+        sa.column("current_streak", sa.Integer),
+        sa.column("longest_streak", sa.Integer),
+        sa.column("last_post_date", sa.Date),
+        name="v",
+    ).data(
+        [
+            (p.user_id, p.xp_delta, p.current_streak, p.longest_streak, p.last_post_date)
+            for p in sorted(batch, key=lambda p: p.user_id)
+        ]
+    )
+    # All-NULL VALUES columns are typed as text by PostgreSQL; cast them back.
+    v_current = sa.cast(v.c.current_streak, sa.Integer)
+    v_longest = sa.cast(v.c.longest_streak, sa.Integer)
+    v_last = sa.cast(v.c.last_post_date, sa.Date)
+    streak_is_newer = sa.and_(
+        v_last.is_not(None),
+        sa.or_(_users.c.last_post_date.is_(None), v_last >= _users.c.last_post_date),
+    )
+    return (
+        sa.update(_users)
+        .values(
+            xp=_users.c.xp + v.c.xp_delta,
+            current_streak=sa.case((streak_is_newer, v_current), else_=_users.c.current_streak),
+            longest_streak=sa.func.greatest(
+                _users.c.longest_streak, sa.func.coalesce(v_longest, 0)
+            ),
+            last_post_date=sa.func.greatest(_users.c.last_post_date, v_last),
+        )
+        .where(_users.c.id == v.c.id)
+    )
+
+
+async def write_batch(batch: Sequence[PendingCounters]) -> None:
+    """Apply one batch of pending counters in its own transaction."""
+    async with get_engine().begin() as conn:
+        await conn.execute(build_flush_statement(batch))
+
+
+class CounterAggregator:
+    """Per-worker accumulator that coalesces counter writes into batched updates."""
+
+    def __init__(
+        self,
+        *,
+        interval: float,
+        batch_size: int,
+        max_pending: int,
+        pending_limit: int,
+        writer: BatchWriter = write_batch,
+    ) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.pending_limit = pending_limit
+        self._writer = writer
+        self._pending: dict[uuid.UUID, PendingCounters] = {}
+        self._inflight: dict[uuid.UUID, PendingCounters] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._dropping = False
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def pending_users(self) -> int:
+        """Number of users with changes that have not been written yet."""
+        return len(self._pending)
+
+    def view(self, user_id: uuid.UUID, stored: Counters) -> Counters:
+        """Return ``stored`` with in-flight and pending changes for ``user_id`` applied."""
+        for source in (self._inflight, self._pending):
+            entry = source.get(user_id)
+            if entry is not None:
+                stored = entry.apply(stored)
+        return stored
+
+    def add(self, user_id: uuid.UUID, *, xp: int = 0, streak: Counters | None = None) -> None:
+        """Queue an XP delta and, optionally, new streak fields for ``user_id``.
+
+        Changes for a user who has none pending yet are dropped once pending
+        and in-flight changes together cover ``pending_limit`` users.
+        """
+        change = PendingCounters(user_id=user_id, xp_delta=xp)
+        if streak is not None:
+            change.current_streak = streak.current_streak
+            change.longest_streak = streak.longest_streak
+            change.last_post_date = streak.last_post_date
+        entry = self._pending.get(user_id)
+        if entry is None:
+            if user_id not in self._inflight and self._at_limit():
+                self._drop(user_id)
+                return
+            self._pending[user_id] = change
+        else:
+            entry.merge(change)
+        metrics.set_gauge("counter_pending_users", len(self._pending))
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    def _at_limit(self) -> bool:
+        held = len(self._pending) + len(self._inflight)
+        if held < self.pending_limit:
+            self._dropping = False
+        return held >= self.pending_limit
+
+    def _drop(self, user_id: uuid.UUID) -> None:
+        metrics.increment("counter_dropped_total")
+        if not self._dropping:
+            self._dropping = True
+            logger.error(
+                "%d users have unwritten counter changes; dropping changes for other users "
+                "until they are written (first dropped: %s)",
+                self.pending_limit,
+                user_id,
+            )
+
+    def record_post(
+        self, user_id: uuid.UUID, stored: Counters, posted_on: date, xp: int
+    ) -> Counters:
+        """Queue a post's XP and streak change and return the user's merged counters."""
+        streak = advance_streak(self.view(user_id, stored), posted_on)
+        self.add(user_id, xp=xp, streak=streak)
+        return self.view(user_id, stored)
+
+    async def flush(self) -> int:
+        """Write all pending changes now and return the number of users written.
+
+        On failure or cancellation the unwritten changes are merged back into
+        the pending set and the exception propagates.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            self._inflight, self._pending = self._pending, {}
+            batch = list(self._inflight.values())
+            written = 0
+            start = time.perf_counter()
+            try:
+                for i in range(0, len(batch), self.batch_size):
+                    chunk = batch[i : i + self.batch_size]
+                    await self._writer(chunk)
+                    for entry in chunk:
+                        del self._inflight[entry.user_id]
+                    written += len(chunk)
+            except BaseException as exc:
+                if not isinstance(exc, asyncio.CancelledError):
+                    metrics.increment("counter_flush_failures_total")
+                self._restore_inflight()
+                raise
+            finally:
+                metrics.observe("counter_flush_seconds", time.perf_counter() - start)
+                metrics.set_gauge("counter_pending_users", len(self._pending))
+            metrics.observe("counter_flush_users", written)
+            return written
+
+    def _restore_inflight(self) -> None:
+        for user_id, entry in self._inflight.items():
+            newer = self._pending.get(user_id)
+            if newer is not None:
+                entry.merge(newer)
+            self._pending[user_id] = entry
+        self._inflight = {}
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("counter flush failed; %d users kept pending", self.pending_users)
+
+    def start(self) -> None:
+        """Start the background flush loop on the running event loop."""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="counter-flush")
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write everything still pending.
+
+        The loop is woken rather than cancelled, so a flush it is running
+        finishes first. A failing final flush is logged, not raised, so
+        shutdown can finish; the changes it could not write are lost.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("final counter flush failed; %d users lost", self.pending_users)
+
+
+_aggregator: CounterAggregator | None = None
+
+
+def get_counter_aggregator() -> CounterAggregator:
+    """Return the worker's aggregator, creating it lazily from settings."""
+    global _aggregator  # noqa: PLW0603
+    if _aggregator is None:
+        settings = get_settings()
+        _aggregator = CounterAggregator(
+            interval=settings.COUNTER_FLUSH_INTERVAL_SECONDS,
+            batch_size=settings.COUNTER_FLUSH_BATCH_SIZE,
+            max_pending=settings.COUNTER_FLUSH_MAX_PENDING,
+            pending_limit=settings.COUNTER_PENDING_LIMIT,
+        )
+    return _aggregator
@@ -0,0 +1,274 @@
+"""Connection draining: take a worker out of rotation and close its sockets in waves.
+
+On SIGTERM, uvicorn stops listening and closes every WebSocket of the
+worker at once. All of those clients then reconnect in the same second, and
+each reconnect loads its missed statuses from the database. Before that
+happens, the worker's :class:`ConnectionDrainer` runs:
+
+1. Readiness (``GET /api/v1/health/ready``) turns ``503``. The worker keeps
+   serving for ``DRAIN_GRACE_SECONDS``, so load balancers have time to stop
+   routing to it.
+2. Registered WebSockets are closed in ``DRAIN_WAVES`` equal waves, spread
+   over ``DRAIN_SECONDS``. Each gets close code ``1012`` (service restart)
+   and a JSON reason such as
+   ``{"reconnect":true,"last_received":"<status id>","retry_ms":731}``.
+   ``retry_ms`` is drawn at random within the wave's interval, so
+   reconnects arrive at an even rate rather than in one burst per wave.
+   The client reconnects after ``retry_ms`` with ``?last_received=`` and
+   receives only what it missed. The waves end early once no socket is
+   left, so a worker without WebSockets only waits out the grace period.
+3. The signal is handed back to uvicorn, which shuts the worker down as
+   usual.
+
+A second SIGTERM skips whatever is left of the drain. SIGINT is passed
+straight to uvicorn, so Ctrl-C still stops a development server at once.
+WebSocket handlers call :meth:`ConnectionDrainer.admit` after accepting
+and :meth:`ConnectionDrainer.unregister` when the socket closes. A socket
+that connects during the grace period is closed in the first wave. Once
+the waves have started, ``admit`` closes new sockets at once, before they
+load anything, and they retry against another worker. With several workers
+on one port, the kernel keeps handing the draining worker its share of new
+connections until uvicorn stops listening.
+
+Metrics:
+
+- ``drain_connections`` — WebSockets registered on this worker (gauge).
+- ``drain_closed_total`` — WebSockets closed by a drain.
+- ``drain_refused_total`` — WebSockets refused by :meth:`ConnectionDrainer.admit`.
+- ``drain_seconds`` — duration of each drain, grace period included.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import random
+import signal
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from types import FrameType
+from typing import Any, Literal
+
+from app.config import get_settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+Close = Callable[[int, str], Awaitable[None]]
+SignalHandler = Callable[[int, FrameType | None], Any] | int | signal.Handlers
+State = Literal["starting", "ready", "draining"]
+
+# RFC 6455: "service restart", the client should reconnect.
+SERVICE_RESTART = 1012
+# A close reason may hold at most 123 bytes.
+MAX_REASON_BYTES = 123
+
+
+def reconnect_reason(last_received: str | None, retry_ms: int) -> str:
+    """Return the close reason that asks a client to reconnect after ``retry_ms``."""
+    reason: dict[str, object] = {"reconnect": True, "retry_ms": retry_ms}
+    if last_received is not None:
+        reason["last_received"] = last_received
+    encoded = json.dumps(reason, separators=(",", ":"))
+    if len(encoded.encode()) > MAX_REASON_BYTES:
+        return reconnect_reason(None, retry_ms)
+    return encoded
+
+
+@dataclass(frozen=True, slots=True)
+class DrainTarget:
+    """How to close one WebSocket and what it last received."""
+
+    close: Close
+    last_received: Callable[[], str | None]
+
+
+class ConnectionDrainer:
+    """Readiness state and wave-by-wave closing of this worker's WebSockets."""
+
+    def __init__(
+        self,
+        *,
+        grace: float,
+        window: float,
+        waves: int,
+        rng: random.Random | None = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.grace = grace
+        self.window = window
+        self.waves = waves
+        self.state: State = "starting"
+        self._rng = rng or random.Random()
+        self._sleep = sleep
+        self._connections: dict[Hashable, DrainTarget] = {}
+        self._closing = False
+        self._task: asyncio.Task[None] | None = None
+        self._previous_handler: SignalHandler = signal.SIG_DFL
+        self._installed = False
+
+    @property
+    def ready(self) -> bool:
+        """Whether load balancers should route new requests to this worker."""
+        return self.state == "ready"
+
+    @property
+    def connections(self) -> int:
+        """Number of registered WebSockets."""
+        return len(self._connections)
+
+    def mark_ready(self) -> None:
+        """Report ready once startup has finished (no-op while draining)."""
+        if self.state == "starting":
+            self.state = "ready"
+
+    def register(
+        self,
+        connection_id: Hashable,
+        *,
+        close: Close,
+        last_received: Callable[[], str | None],
+    ) -> None:
+        """Track an accepted WebSocket so a drain can close it."""
+        self._connections[connection_id] = DrainTarget(close, last_received)
+        metrics.set_gauge("drain_connections", len(self._connections))
+
+    async def admit(
+        self,
+        connection_id: Hashable,
+        *,
+        close: Close,
+        last_received: Callable[[], str | None],
+    ) -> bool:
+        """Register an accepted WebSocket, or close it at once if the waves have started."""
+        if not self._closing:
+            self.register(connection_id, close=close, last_received=last_received)
+            return True
+        metrics.increment("drain_refused_total")
+        retry_ms = int(self._rng.random() * self.window / self.waves * 1000)
+        await close(SERVICE_RESTART, reconnect_reason(last_received(), retry_ms))
+        return False
+
+    def unregister(self, connection_id: Hashable) -> bool:
+        """Stop tracking a WebSocket; ``False`` if it was not registered."""
+        found = self._connections.pop(connection_id, None) is not None
+        metrics.set_gauge("drain_connections", len(self._connections))
+        return found
+
+    async def _close(self, connection_id: Hashable, target: DrainTarget, retry_ms: int) -> None:
+        try:
+            reason = reconnect_reason(target.last_received(), retry_ms)
+            await target.close(SERVICE_RESTART, reason)
+        except Exception:
+            logger.warning("could not close connection %r while draining", connection_id)
+        metrics.increment("drain_closed_total")
+
+    async def drain(self) -> int:
+        """Turn unready, wait out the grace period, then close every WebSocket in waves."""
+        self.state = "draining"
+        closed = 0
+        with metrics.timer("drain_seconds"):
+            logger.info(
+                "draining %d connections in %d waves over %.1fs after a %.1fs grace period",
+                len(self._connections),
+                self.waves,
+                self.window,
+                self.grace,
+            )
+            await self._sleep(self.grace)
+            self._closing = True
+            interval = self.window / self.waves
+            for wave in range(self.waves):
+                remaining = self.waves - wave
+                batch = list(self._connections.items())
+                batch = batch[: math.ceil(len(batch) / remaining)]
+                for connection_id, _ in batch:
+                    del self._connections[connection_id]
+                metrics.set_gauge("drain_connections", len(self._connections))
+                await asyncio.gather(
+                    *(
+                        self._close(c, t, int(self._rng.random() * interval * 1000))
+                        for c, t in batch
+                    )
+                )
+                closed += len(batch)
+                # Sockets that connect from now on are refused by admit(), so
+                # once none are left there is nothing to wait for.
+                if remaining > 1 and self._connections:
+                    await self._sleep(interval)
+                if not self._connections:
+                    break
+        return closed
+
+    def install_signal_handler(self) -> None:
+        """Drain on SIGTERM before passing the signal on to the server.
+
+        Only the main thread can set signal handlers; in any other thread
+        this does nothing. A second SIGTERM cuts the drain short.
+        """
+        if self._installed or threading.current_thread() is not threading.main_thread():
+            return
+        loop = asyncio.get_running_loop()
+        self._previous_handler = signal.getsignal(signal.SIGTERM) or signal.SIG_DFL
+
+        def handle(sig: int, frame: FrameType | None) -> None:
+            if self.state == "draining":
+                self._hand_over()
+            else:
+                self.state = "draining"
+                loop.call_soon_threadsafe(self._start)
+
+        signal.signal(signal.SIGTERM, handle)
+        self._installed = True
+
+    def _start(self) -> None:
+        if not self._installed:
+            return  # a second SIGTERM already handed over
+        self._task = asyncio.get_running_loop().create_task(self._drain_then_exit())
+
+    async def _drain_then_exit(self) -> None:
+        try:
+            await self.drain()
+        except Exception:
+            logger.exception("connection drain failed; shutting down without it")
+        finally:
+            self._hand_over()
+
+    def _hand_over(self) -> None:
+        """Restore the previous SIGTERM handler and raise the signal again."""
+        if self.restore_signal_handler():
+            signal.raise_signal(signal.SIGTERM)
+
+    def restore_signal_handler(self) -> bool:
+        """Put back the SIGTERM handler that was replaced; ``False`` if none was."""
+        if not self._installed:
+            return False
+        signal.signal(signal.SIGTERM, self._previous_handler)
+        self._installed = False
+        return True
+
+    async def stop(self) -> None:
+        """Restore the signal handler and cancel a drain that is still running."""
+        self.restore_signal_handler()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+
+_drainer: ConnectionDrainer | None = None
+
+
+def get_connection_drainer() -> ConnectionDrainer:
+    """Return the worker's connection drainer, creating it lazily from settings."""
+    global _drainer  # noqa: PLW0603
+    if _drainer is None:
+        settings = get_settings()
+        _drainer = ConnectionDrainer(
+            grace=settings.DRAIN_GRACE_SECONDS,
+            window=settings.DRAIN_SECONDS,
+            waves=settings.DRAIN_WAVES,
+        )
+    return _drainer
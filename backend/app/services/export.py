@@ -0,0 +1,171 @@
+"""Streaming export of status history as NDJSON or CSV.
+
+Rows are read through a server-side cursor (``stream_results``) in
+partitions of ``EXPORT_CHUNK_ROWS`` and each partition is encoded into one
+bytes chunk before the next is fetched. At most one partition is held in
+memory, however large the export is.
+
+The query runs and its first partition is fetched before the response
+starts, so a failure there still gets an error status. A failure after
+that can only cut the body short: an NDJSON export ends with
+:data:`NDJSON_ERROR_LINE`, and both formats then abort the response
+instead of ending it cleanly, so a client never mistakes a partial export
+for a complete one.
+"""
+
+import csv
+import io
+import json
+import logging
+from collections.abc import AsyncIterator, Callable, Sequence
+from contextlib import AsyncExitStack
+from typing import Any, Literal
+
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import get_settings
+from app.metrics import metrics
+from app.queries import FeedFilters, export_statement
+
+logger = logging.getLogger(__name__)
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_FIELDS = (
+    "id",
+    "created_at",
+    "category",
+    "message",
+    "user_id",
+    "username",
+    "display_name",
+    "avatar_url",
+)
+
+MEDIA_TYPES: dict[ExportFormat, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+NDJSON_ERROR_LINE = b'{"error": "export failed; the rows above are incomplete"}\n'
+
+
+def _plain(row: RowMapping) -> dict[str, Any]:
+    return {
+        "id": str(row["id"]),
+        "created_at": row["created_at"].isoformat(),
+        "category": row["category"],
+        "message": row["message"],
+        "user_id": str(row["user_id"]),
+        "username": row["username"],
+        "display_name": row["display_name"],
+        "avatar_url": row["avatar_url"],
+    }
+
+
+def encode_ndjson(rows: Sequence[RowMapping]) -> bytes:
+    """Encode rows as newline-delimited JSON objects."""
+    return "".join(json.dumps(_plain(r), ensure_ascii=False) + "\n" for r in rows).encode()
+
+
+def _csv_encoder() -> Callable[[Sequence[RowMapping]], bytes]:
+    """Return a CSV encoder that emits the header row with its first chunk."""
+    header_sent = False
+
+    def encode(rows: Sequence[RowMapping]) -> bytes:
+        nonlocal header_sent
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+        if not header_sent:
+            writer.writeheader()
+            header_sent = True
+        writer.writerows(_plain(r) for r in rows)
+        return buf.getvalue().encode()
+
+    return encode
+
+
+async def encode_partitions(
+    partitions: AsyncIterator[Sequence[RowMapping]], fmt: ExportFormat
+) -> AsyncIterator[bytes]:
+    """Encode each row partition into one bytes chunk, in order."""
+    encode = encode_ndjson if fmt == "ndjson" else _csv_encoder()
+    if fmt == "csv":
+        # An empty export still gets its header line.
+        yield encode([])
+    rows = 0
+    async for partition in partitions:
+        rows += len(partition)
+        yield encode(partition)
+    metrics.increment("export_rows_total", rows, format=fmt)
+
+
+async def open_partitions(
+    stack: AsyncExitStack, engine: AsyncEngine, filters: FeedFilters, chunk_rows: int
+) -> AsyncIterator[Sequence[RowMapping]]:
+    """Run the export query and return its row partitions from a server-side cursor.
+
+    The connection is entered on ``stack``, which must be closed once the
+    partitions are consumed. The export runs in one read-only
+    ``REPEATABLE READ`` transaction, so a long export sees a single
+    consistent snapshot.
+    """
+    conn = await stack.enter_async_context(engine.connect())
+    conn = await conn.execution_options(
+        isolation_level="REPEATABLE READ", postgresql_readonly=True
+    )
+    result = await conn.stream(
+        export_statement(filters.active, get_settings().FEED_PROJECTION),
+        filters.params(),
+        execution_options={"yield_per": chunk_rows},
+    )
+    partitions: AsyncIterator[Sequence[RowMapping]] = result.mappings().partitions(chunk_rows)
+    return partitions
+
+
+async def _prepend(
+    first: Sequence[RowMapping] | None, rest: AsyncIterator[Sequence[RowMapping]]
+) -> AsyncIterator[Sequence[RowMapping]]:
+    if first is None:
+        return
+    yield first
+    async for partition in rest:
+        yield partition
+
+
+async def _export_body(
+    stack: AsyncExitStack,
+    first: Sequence[RowMapping] | None,
+    rest: AsyncIterator[Sequence[RowMapping]],
+    fmt: ExportFormat,
+) -> AsyncIterator[bytes]:
+    async with stack:
+        with metrics.timer("export_seconds", format=fmt):
+            try:
+                async for chunk in encode_partitions(_prepend(first, rest), fmt):
+                    yield chunk
+            except Exception:
+                metrics.increment("export_failures_total", format=fmt)
+                logger.exception("%s export failed part-way; aborting the response", fmt)
+                if fmt == "ndjson":
+                    yield NDJSON_ERROR_LINE
+                raise
+
+
+async def export_statuses(
+    engine: AsyncEngine, filters: FeedFilters, fmt: ExportFormat, chunk_rows: int
+) -> AsyncIterator[bytes]:
+    """Start an export and return the encoded body of matching statuses.
+
+    The query is executed and its first partition fetched before this
+    returns, so errors up to that point are raised to the caller.
+    """
+    stack = AsyncExitStack()
+    try:
+        partitions = await open_partitions(stack, engine, filters, chunk_rows)
+        first = await anext(partitions, None)
+    except BaseException:
+        await stack.aclose()
+        raise
+    return _export_body(stack, first, partitions, fmt)
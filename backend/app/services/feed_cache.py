@@ -0,0 +1,671 @@
+"""Per-worker cache of the most recent statuses, stored in flat typed arrays.
+
+Nearly every client loads the first feed page and the ``WS_INITIAL_HOURS``
+initial state, so each worker keeps the newest ``FEED_CACHE_SIZE``
+statuses in memory. A list of row dicts would cost about 1 KB per status.
+:class:`RecentFeedCache` instead keeps one column per field, sorted by
+``(created_at, id)``:
+
+- ``created_at`` as microseconds in an ``array('q')``,
+- the id as 16 raw bytes, the category as a one-byte index into
+  ``VALID_CATEGORIES``, and the author as a 4-byte index into a small
+  author table, each in a ``bytearray``,
+- all message text in one shared UTF-8 buffer, addressed by offset and
+  length arrays.
+
+That is 41 bytes per status plus its text. A time filter is a binary
+search. Category and author filters use ``bytearray.rfind``, which scans
+the column in C from the newest entry back, instead of looping in Python.
+
+The cache answers a page only when it can prove the answer is complete. It
+tracks a floor: every status newer than the floor is cached. A page that
+needs older statuses, past the floor, returns ``None``, and the caller
+falls back to the database (:func:`fetch_recent_feed`).
+
+:class:`FeedCacheListener` keeps the cache current across workers. The
+``feed_notify`` migration adds triggers that ``pg_notify`` the
+``feed_changes`` channel when a status is inserted, updated or deleted, or
+when an author's display fields change. The listener collects these
+notifications and applies them in batches. The local insert path can also
+call :meth:`RecentFeedCache.add` directly. Adding a status twice is a no-op.
+
+With teams, a worker holds several caches in :class:`TeamFeedCaches`: the
+deployment-wide feed (``FEED_CACHE_SIZE``) and one small cache of
+``FEED_CACHE_TEAM_SIZE`` statuses for each recently read team, at most
+``FEED_CACHE_MAX_TEAMS`` of them, evicting the least recently read. A team's
+first page comes from the database and asks the listener to load that
+team's cache, so a busy team cannot push a quiet team's statuses out, and
+the cost of a page does not depend on how many teams exist. Notifications
+name the team, and each change touches only that team's cache.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import sys
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.config import Settings, get_settings
+from app.metrics import metrics
+from app.models import StatusUpdate, User
+from app.models.status import VALID_CATEGORIES
+from app.queries import FEED_COLUMNS, FeedFilters, fetch_feed
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "feed_changes"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MIN = -(1 << 63)
+_UNLOADED = (1 << 63) - 1
+_ID = 16
+_USER = 4
+_CODES = {category: code for code, category in enumerate(VALID_CATEGORIES)}
+
+Author = tuple[uuid.UUID, str, str, str | None]
+FeedRow = RowMapping | Mapping[str, Any]
+
+_statuses = StatusUpdate.__table__
+_users = User.__table__
+
+# Team caches loaded per sync, so a burst of new teams cannot stall notifications.
+TEAM_LOADS_PER_SYNC = 8
+
+ROWS_BY_ID = (
+    select(*FEED_COLUMNS, _statuses.c.team_id)
+    .join(_users, _users.c.id == _statuses.c.user_id)
+    .where(_statuses.c.id.in_(bindparam("ids", expanding=True)))
+)
+
+AUTHORS_BY_ID = select(
+    _users.c.id, _users.c.team_id, _users.c.username, _users.c.display_name, _users.c.avatar_url
+).where(_users.c.id.in_(bindparam("ids", expanding=True)))
+
+
+def _micros(moment: datetime) -> int:
+    delta = moment - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _rfind_all(column: bytearray, needle: bytes, lo: int, hi: int, wanted: int) -> Iterable[int]:
+    """Yield indexes in ``[lo, hi)`` whose fixed-width value is ``needle``, newest first."""
+    width = len(needle)
+    start, end = lo * width, hi * width
+    found = 0
+    while found < wanted:
+        pos = column.rfind(needle, start, end)
+        if pos < 0:
+            return
+        end = pos + width - 1
+        if pos % width == 0:
+            found += 1
+            yield pos // width
+
+
+class RecentFeedCache:
+    """The newest ``capacity`` statuses, columnar and sorted by ``(created_at, id)``.
+
+    Up to ``capacity / 16`` extra statuses are kept before the oldest are
+    evicted together.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._slack = max(1, capacity // 16)
+        self._floor = _UNLOADED
+        self._ts = array("q")
+        self._ids = bytearray()
+        self._codes = bytearray()
+        self._users = bytearray()
+        self._text_start = array("q")
+        self._text_len = array("I")
+        self._text = bytearray()
+        self._dead_text = 0
+        self._authors: list[Author] = []
+        self._author_index: dict[uuid.UUID, int] = {}
+        self._author_by_name: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ts)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether :meth:`load` has run, so pages can be answered."""
+        return self._floor != _UNLOADED
+
+    def load(self, rows: Sequence[FeedRow]) -> None:
+        """Replace the contents with ``rows``, the newest ``capacity`` statuses.
+
+        Fewer rows than ``capacity`` means this is every status, so any
+        page can be answered. Otherwise pages are complete back to the
+        oldest loaded status.
+        """
+        self._floor = _UNLOADED
+        for column in (self._ts, self._text_start, self._text_len):
+            del column[:]
+        for buffer in (self._ids, self._codes, self._users, self._text):
+            buffer.clear()
+        self._dead_text = 0
+        self._authors.clear()
+        self._author_index.clear()
+        self._author_by_name.clear()
+        # Oldest first, so every insert appends.
+        for row in sorted(rows, key=lambda r: (r["created_at"], r["id"])):
+            self.add(row)
+        if len(rows) < self.capacity:
+            self._floor = _MIN
+        else:
+            self._floor = self._ts[0] if self._ts else _MIN
+
+    def _author(self, user_id: uuid.UUID, author: Author) -> int:
+        index = self._author_index.get(user_id)
+        if index is None:
+            index = len(self._authors)
+            self._authors.append(author)
+            self._author_index[user_id] = index
+        elif self._authors[index] != author:
+            self._author_by_name.pop(self._authors[index][1], None)
+            self._authors[index] = author
+        self._author_by_name[author[1]] = index
+        return index
+
+    def _position(self, ts: int, id_bytes: bytes) -> int | None:
+        i = bisect_left(self._ts, ts)
+        j = bisect_right(self._ts, ts, lo=i)
+        while i < j:
+            existing = self._ids[i * _ID : (i + 1) * _ID]
+            if existing == id_bytes:
+                return None
+            if existing > id_bytes:
+                break
+            i += 1
+        return i
+
+    def _find(self, status_id: uuid.UUID) -> int | None:
+        for i in _rfind_all(self._ids, status_id.bytes, 0, len(self), 1):
+            return i
+        return None
+
+    def add(self, row: FeedRow) -> bool:
+        """Insert a status row with :data:`~app.queries.FEED_COLUMNS` keys.
+
+        Returns ``False`` if it is already cached, or if it is older than
+        everything kept once the cache is full.
+        """
+        ts = _micros(row["created_at"])
+        id_bytes = row["id"].bytes
+        pos = self._position(ts, id_bytes)
+        if pos is None:
+            return False
+        author = self._author(
+            row["user_id"],
+            (row["user_id"], row["username"], row["display_name"], row["avatar_url"]),
+        )
+        text = row["message"].encode()
+        self._ts.insert(pos, ts)
+        self._ids[pos * _ID : pos * _ID] = id_bytes
+        self._codes.insert(pos, _CODES[row["category"]])
+        self._users[pos * _USER : pos * _USER] = author.to_bytes(_USER, "little")
+        self._text_start.insert(pos, len(self._text))
+        self._text_len.insert(pos, len(text))
+        self._text += text
+        if len(self) <= self.capacity + self._slack:
+            return True
+        # Evict in chunks, so the arrays are not shifted on every insert.
+        drop = len(self) - self.capacity
+        self._floor = max(self._floor, self._ts[drop - 1])
+        self._delete(0, drop)
+        return pos >= drop
+
+    def remove(self, status_id: uuid.UUID) -> bool:
+        """Drop a deleted status. Returns whether it was cached."""
+        pos = self._find(status_id)
+        if pos is None:
+            return False
+        self._delete(pos)
+        return True
+
+    def _delete(self, pos: int, count: int = 1) -> None:
+        end = pos + count
+        self._dead_text += sum(self._text_len[pos:end])
+        del self._ts[pos:end]
+        del self._ids[pos * _ID : end * _ID]
+        del self._codes[pos:end]
+        del self._users[pos * _USER : end * _USER]
+        del self._text_start[pos:end]
+        del self._text_len[pos:end]
+        if self._dead_text > max(len(self._text) // 2, 64 * 1024):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the text buffer and author table without unreferenced entries."""
+        text = bytearray()
+        for i, (start, length) in enumerate(zip(self._text_start, self._text_len, strict=True)):
+            self._text_start[i] = len(text)
+            text += self._text[start : start + length]
+        self._text = text
+        self._dead_text = 0
+        old = self._authors
+        self._authors, self._author_index, self._author_by_name = [], {}, {}
+        remap: dict[int, int] = {}
+        for i in range(len(self)):
+            index = self._user_at(i)
+            if index not in remap:
+                remap[index] = self._author(old[index][0], old[index])
+            self._users[i * _USER : (i + 1) * _USER] = remap[index].to_bytes(_USER, "little")
+
+    def update_author(
+        self, user_id: uuid.UUID, *, username: str, display_name: str, avatar_url: str | None
+    ) -> bool:
+        """Apply a profile change to every cached status by ``user_id``."""
+        if user_id not in self._author_index:
+            return False
+        self._author(user_id, (user_id, username, display_name, avatar_url))
+        return True
+
+    def _user_at(self, i: int) -> int:
+        return int.from_bytes(self._users[i * _USER : (i + 1) * _USER], "little")
+
+    def _row(self, i: int) -> dict[str, Any]:
+        user_id, username, display_name, avatar_url = self._authors[self._user_at(i)]
+        start = self._text_start[i]
+        return {
+            "id": uuid.UUID(bytes=bytes(self._ids[i * _ID : (i + 1) * _ID])),
+            "message": self._text[start : start + self._text_len[i]].decode(),
+            "category": VALID_CATEGORIES[self._codes[i]],
+            "created_at": _EPOCH + timedelta(microseconds=self._ts[i]),
+            "user_id": user_id,
+            "username": username,
+            "display_name": display_name,
+            "avatar_url": avatar_url,
+        }
+
+    def _matches(self, filters: FeedFilters, lo: int, hi: int, wanted: int) -> list[int]:
+        author: int | None = None
+        if filters.user_id is not None:
+            author = self._author_index.get(filters.user_id)
+            if author is None:
+                return []
+        if filters.username is not None:
+            by_name = self._author_by_name.get(filters.username)
+            if by_name is None or (author is not None and by_name != author):
+                return []
+            author = by_name
+        code = _CODES.get(filters.category) if filters.category is not None else None
+        if filters.category is not None and code is None:
+            return []
+        if author is not None:
+            candidates = _rfind_all(
+                self._users, author.to_bytes(_USER, "little"), lo, hi, sys.maxsize
+            )
+            if code is not None:
+                candidates = (i for i in candidates if self._codes[i] == code)
+        elif code is not None:
+            candidates = _rfind_all(self._codes, bytes((code,)), lo, hi, wanted)
+        else:
+            candidates = range(hi - 1, lo - 1, -1)
+        matches: list[int] = []
+        for i in candidates:
+            matches.append(i)
+            if len(matches) == wanted:
+                break
+        return matches
+
+    def page(
+        self, filters: FeedFilters, *, limit: int, offset: int = 0
+    ) -> list[dict[str, Any]] | None:
+        """Return a newest-first feed page like :func:`~app.queries.fetch_feed`.
+
+        Returns ``None`` if the answer may include statuses older than the
+        cache holds.
+        """
+        if not self.loaded:
+            return None
+        complete = self._floor == _MIN
+        lo = bisect_right(self._ts, self._floor)
+        if filters.since is not None:
+            since = _micros(filters.since)
+            lo = max(lo, bisect_right(self._ts, since))
+            complete = complete or since >= self._floor
+        hi = len(self)
+        if filters.until is not None:
+            hi = bisect_right(self._ts, _micros(filters.until))
+        wanted = offset + limit
+        matches = self._matches(filters, lo, hi, wanted) if lo < hi else []
+        if len(matches) < wanted and not complete:
+            metrics.increment("feed_cache_requests_total", result="miss")
+            return None
+        metrics.increment("feed_cache_requests_total", result="hit")
+        return [self._row(i) for i in matches[offset:]]
+
+    def recent(self, since: datetime) -> list[dict[str, Any]] | None:
+        """Every status newer than ``since``, newest first, or ``None`` if not all are cached."""
+        return self.page(FeedFilters(since=since), limit=len(self))
+
+    def memory_bytes(self) -> int:
+        """Approximate heap size of the cache, including the author table."""
+        columns = (
+            self._ts,
+            self._ids,
+            self._codes,
+            self._users,
+            self._text_start,
+            self._text_len,
+            self._text,
+        )
+        size = sum(sys.getsizeof(column) for column in columns)
+        size += sys.getsizeof(self._authors) + sys.getsizeof(self._author_index)
+        size += sys.getsizeof(self._author_by_name)
+        for author in self._authors:
+            size += sys.getsizeof(author) + sum(sys.getsizeof(field) for field in author)
+        return size
+
+    def stats(self) -> dict[str, Any]:
+        """Entry count, memory use and text size, also published as gauges."""
+        size = self.memory_bytes()
+        metrics.set_gauge("feed_cache_entries", len(self))
+        metrics.set_gauge("feed_cache_bytes", size)
+        return {
+            "entries": len(self),
+            "capacity": self.capacity,
+            "authors": len(self._authors),
+            "bytes": size,
+            "bytes_per_entry": round(size / len(self), 1) if len(self) else 0.0,
+            "text_bytes": len(self._text) - self._dead_text,
+        }
+
+
+class TeamFeedCaches:
+    """The worker's recent-feed caches: one for all teams and one per recently read team."""
+
+    def __init__(self, *, size: int, team_size: int, max_teams: int) -> None:
+        self.everyone = RecentFeedCache(size) if size > 0 else None
+        self.team_size = team_size
+        self.max_teams = max_teams if team_size > 0 else 0
+        self._teams: OrderedDict[uuid.UUID, RecentFeedCache] = OrderedDict()
+        self._requested: dict[uuid.UUID, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._teams)
+
+    def get(self, team_id: uuid.UUID | None) -> RecentFeedCache | None:
+        """Return the cache for ``team_id`` (all teams for ``None``), marking it recently read."""
+        if team_id is None:
+            return self.everyone
+        cache = self._teams.get(team_id)
+        if cache is not None:
+            self._teams.move_to_end(team_id)
+        return cache
+
+    def request(self, team_id: uuid.UUID) -> None:
+        """Ask for ``team_id``'s cache to be loaded on the next sync.
+
+        At most ``max_teams`` requests are kept. Further ones are dropped,
+        and those teams are requested again on their next read.
+        """
+        if self.max_teams and team_id not in self._teams and len(self._requested) < self.max_teams:
+            self._requested[team_id] = None
+
+    def take_requests(self, limit: int) -> list[uuid.UUID]:
+        """Remove and return up to ``limit`` requested teams, oldest request first."""
+        teams = list(itertools.islice(self._requested, limit))
+        for team_id in teams:
+            del self._requested[team_id]
+        return teams
+
+    def install(self, team_id: uuid.UUID, rows: Sequence[FeedRow]) -> RecentFeedCache | None:
+        """Load ``team_id``'s newest statuses, evicting the least recently read team if full.
+
+        A team without statuses, which includes any id that is not a team,
+        gets no cache, so it cannot evict a team that has one.
+        """
+        if not rows:
+            return None
+        cache = RecentFeedCache(self.team_size)
+        cache.load(rows)
+        self._teams[team_id] = cache
+        self._teams.move_to_end(team_id)
+        while len(self._teams) > self.max_teams:
+            self._teams.popitem(last=False)
+            metrics.increment("feed_cache_team_evictions_total")
+        return cache
+
+    def targets(self, team_id: uuid.UUID) -> list[RecentFeedCache]:
+        """Caches that hold statuses of ``team_id``, without marking them read."""
+        caches = [self.everyone] if self.everyone is not None else []
+        team = self._teams.get(team_id)
+        if team is not None:
+            caches.append(team)
+        return caches
+
+    def clear_teams(self) -> None:
+        """Drop every team cache; each reloads on its team's next read."""
+        self._teams.clear()
+        self._requested.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Totals over all caches, also published as gauges."""
+        caches = [*([self.everyone] if self.everyone is not None else []), *self._teams.values()]
+        entries = sum(len(cache) for cache in caches)
+        size = sum(cache.memory_bytes() for cache in caches)
+        metrics.set_gauge("feed_cache_entries", entries)
+        metrics.set_gauge("feed_cache_bytes", size)
+        metrics.set_gauge("feed_cache_teams", len(self._teams))
+        return {"entries": entries, "bytes": size, "teams": len(self._teams)}
+
+
+class FeedCacheListener:
+    """Keeps :class:`TeamFeedCaches` current from ``feed_changes`` notifications.
+
+    Holds one pooled connection for ``LISTEN``. Notifications are applied
+    every ``interval`` seconds in one batch: deleted statuses are dropped,
+    and new or edited statuses and changed authors are read back with one
+    query each. Requested team caches are loaded afterwards. If the
+    connection is lost, notifications may have been missed, so the
+    listener reconnects, reloads the all-teams cache and drops team caches.
+
+    ``LISTEN`` needs a session connection, which PgBouncer in transaction
+    mode does not give. ``listen_engine``, if set, connects to PostgreSQL
+    directly for ``LISTEN`` only; the queries still use ``engine``.
+    """
+
+    def __init__(
+        self,
+        caches: TeamFeedCaches,
+        engine: AsyncEngine,
+        *,
+        interval: float,
+        listen_engine: AsyncEngine | None = None,
+    ) -> None:
+        self.caches = caches
+        self.engine = engine
+        self.listen_engine = listen_engine or engine
+        self.interval = interval
+        self._changed: dict[uuid.UUID, uuid.UUID] = {}
+        self._deleted: set[tuple[uuid.UUID, uuid.UUID]] = set()
+        self._authors: set[uuid.UUID] = set()
+        self._conn: AsyncConnection | None = None
+        self._driver: Any = None
+        self._task: asyncio.Task[None] | None = None
+
+    def _on_notify(self, connection: object, pid: int, channel: str, payload: str) -> None:
+        # "<op>:<team_id>:<id>", see the teams migration.
+        op, _, rest = payload.partition(":")
+        team, _, ident = rest.partition(":")
+        try:
+            team_id, key = uuid.UUID(team), uuid.UUID(ident)
+        except ValueError:
+            logger.warning("ignoring malformed %s payload %r", channel, payload)
+            return
+        if op == "delete":
+            if self._changed.get(key) == team_id:
+                del self._changed[key]
+            self._deleted.add((team_id, key))
+        elif op == "user":
+            self._authors.add(key)
+        else:
+            self._changed[key] = team_id
+
+    async def _listen(self) -> None:
+        self._conn = await self.listen_engine.connect()
+        raw = await self._conn.get_raw_connection()
+        self._driver = raw.driver_connection
+        await self._driver.add_listener(CHANNEL, self._on_notify)
+
+    async def _close(self) -> None:
+        # Remove the listener before the connection goes back to the pool.
+        if self._driver is not None:
+            with contextlib.suppress(Exception):
+                await self._driver.remove_listener(CHANNEL, self._on_notify)
+            self._driver = None
+        if self._conn is not None:
+            with contextlib.suppress(Exception):
+                await self._conn.close()
+            self._conn = None
+
+    async def reload(self) -> None:
+        """Reload the all-teams cache from the database and drop the team caches."""
+        self.caches.clear_teams()
+        everyone = self.caches.everyone
+        if everyone is not None:
+            async with AsyncSession(self.engine) as session:
+                rows = await fetch_feed(session, FeedFilters(), limit=everyone.capacity, offset=0)
+            everyone.load(rows)
+        self.caches.stats()
+
+    async def sync(self) -> None:
+        """Apply the notifications received since the last call, then load requested teams."""
+        changed, deleted, authors = self._changed, self._deleted, self._authors
+        self._changed, self._deleted, self._authors = {}, set(), set()
+        for team_id, status_id in (*deleted, *((t, s) for s, t in changed.items())):
+            for cache in self.caches.targets(team_id):
+                cache.remove(status_id)
+        if changed or authors:
+            async with self.engine.connect() as conn:
+                if changed:
+                    result = await conn.execute(ROWS_BY_ID, {"ids": list(changed)})
+                    for row in result.mappings():
+                        for cache in self.caches.targets(row["team_id"]):
+                            cache.add(row)
+                if authors:
+                    result = await conn.execute(AUTHORS_BY_ID, {"ids": list(authors)})
+                    for row in result.mappings():
+                        for cache in self.caches.targets(row["team_id"]):
+                            cache.update_author(
+                                row["id"],
+                                username=row["username"],
+                                display_name=row["display_name"],
+                                avatar_url=row["avatar_url"],
+                            )
+            metrics.increment("feed_cache_sync_statuses_total", len(changed) + len(deleted))
+        teams = self.caches.take_requests(TEAM_LOADS_PER_SYNC)
+        if teams:
+            # Changes committed while a team loads arrive as notifications
+            # and are applied on the next sync; adding them twice is a no-op.
+            async with AsyncSession(self.engine) as session:
+                for team_id in teams:
+                    rows = await fetch_feed(
+                        session,
+                        FeedFilters(team_id=team_id),
+                        limit=self.caches.team_size,
+                        offset=0,
+                    )
+                    self.caches.install(team_id, rows)
+            metrics.increment("feed_cache_team_loads_total", len(teams))
+
+    async def start(self) -> None:
+        """Start listening, load the cache, then apply notifications in the background.
+
+        Listening starts before the load, so no change between the two is
+        missed. If the database is unavailable, the app still starts. The
+        cache stays unloaded, so every page falls back to the database,
+        and the background loop keeps retrying.
+        """
+        try:
+            await self._listen()
+            await self.reload()
+        except Exception:
+            logger.warning("feed cache not loaded; retrying in the background", exc_info=True)
+            await self._close()
+        self._task = asyncio.create_task(self._run(), name="feed-cache-sync")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if self._driver is None or self._driver.is_closed():
+                    await self._close()
+                    await self._listen()
+                    await self.reload()
+                await self.sync()
+                self.caches.stats()
+            except Exception:
+                logger.exception("feed cache sync failed; reloading on the next interval")
+                await self._close()
+
+    async def stop(self) -> None:
+        """Stop applying notifications and release the listening connection."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self._close()
+
+
+async def fetch_recent_feed(
+    session: AsyncSession, filters: FeedFilters, *, limit: int, offset: int
+) -> Sequence[FeedRow]:
+    """Return a feed page from the worker's cache, or from the database if it cannot answer.
+
+    A page of a team without a cache yet is read from the database, and the
+    team's cache is requested so that its next pages are served from memory.
+    """
+    caches = get_feed_caches()
+    cache = caches.get(filters.team_id) if caches is not None else None
+    rows = cache.page(filters, limit=limit, offset=offset) if cache is not None else None
+    if rows is not None:
+        return rows
+    if caches is not None and cache is None and filters.team_id is not None:
+        caches.request(filters.team_id)
+    return await fetch_feed(session, filters, limit=limit, offset=offset)
+
+
+_caches: TeamFeedCaches | None = None
+
+
+def _enabled(settings: Settings) -> bool:
+    """Whether any cache size is above 0 and the listener can ``LISTEN``.
+
+    With ``DB_STATEMENT_MODE=pgbouncer`` the caches stay off unless
+    ``FEED_CACHE_LISTEN_URL`` names a direct connection: notifications sent
+    through a transaction-mode pooler are lost, and the caches would serve
+    stale pages without any error.
+    """
+    if settings.FEED_CACHE_SIZE == 0 and settings.FEED_CACHE_TEAM_SIZE == 0:
+        return False
+    return settings.DB_STATEMENT_MODE != "pgbouncer" or settings.FEED_CACHE_LISTEN_URL is not None
+
+
+def get_feed_caches() -> TeamFeedCaches | None:
+    """Return the worker's feed caches, or ``None`` when the caches are disabled."""
+    global _caches  # noqa: PLW0603
+    settings = get_settings()
+    if _caches is None and _enabled(settings):
+        _caches = TeamFeedCaches(
+            size=settings.FEED_CACHE_SIZE,
+            team_size=settings.FEED_CACHE_TEAM_SIZE,
+            max_teams=settings.FEED_CACHE_MAX_TEAMS,
+        )
+    return _caches
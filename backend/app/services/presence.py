@@ -0,0 +1,404 @@
+"""Presence tracking for the online indicator, without per-heartbeat writes.
+
+Each worker keeps its WebSocket connections in a :class:`PresenceRegistry`.
+A connection stays alive for ``PRESENCE_HEARTBEAT_SECONDS *
+(PRESENCE_MISSED_HEARTBEATS + 1)`` after its last pong. Deadlines live in a
+:class:`TimingWheel`, so a heartbeat is O(1): it moves the connection to
+another slot. Expiry only looks at the slots whose time has passed. A user
+is online while they have at least one live connection.
+
+Every ``PRESENCE_FLUSH_INTERVAL_SECONDS`` the :class:`PresenceTracker`
+expires overdue connections and collects which users came online or went
+offline since the last flush. It then broadcasts one ``presence`` diff for
+all of them, not one event per user. New clients start from
+:meth:`PresenceTracker.snapshot` and apply diffs in ``version`` order.
+
+Backends (``PRESENCE_BACKEND``):
+
+``memory``
+    Presence is what this worker sees. This is exact with a single worker.
+``postgres``
+    Each flush publishes the worker's changes to the UNLOGGED
+    ``presence_sessions`` table in one transaction, and then reads the
+    online users of all live workers. The diff is computed against that
+    aggregated set. Database writes scale with presence changes, not with
+    heartbeats. A worker that stops flushing is ignored after the heartbeat
+    timeout. If a flush fails, the next one republishes the worker's full set.
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Hashable, Set
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, cast
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import get_settings
+from app.metrics import metrics
+from app.models import PresenceSession, PresenceWorker
+
+logger = logging.getLogger(__name__)
+
+Broadcast = Callable[[dict[str, Any]], Awaitable[None]]
+ExpiredHandler = Callable[[list[Hashable]], Awaitable[None]]
+
+
+class TimingWheel:
+    """Hashed timing wheel with O(1) schedule/cancel and per-slot expiry.
+
+    Time is divided into ticks of ``tick`` seconds. A key due at tick ``d``
+    sits in slot ``d % slots``. :meth:`advance` visits only the slots of the
+    ticks that have passed, and expires the keys in them that are due.
+    """
+
+    def __init__(self, timeout: float, tick: float, now: float) -> None:
+        self.timeout = timeout
+        self.tick = tick
+        self._slots: list[set[Hashable]] = [set() for _ in range(math.ceil(timeout / tick) + 1)]
+        self._due: dict[Hashable, int] = {}
+        self._cursor = math.floor(now / tick)
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._due
+
+    def schedule(self, key: Hashable, now: float) -> None:
+        """Make ``key`` expire ``timeout`` seconds after ``now``."""
+        due = max(math.ceil((now + self.timeout) / self.tick), self._cursor + 1)
+        previous = self._due.get(key)
+        if previous == due:
+            return
+        if previous is not None:
+            self._slots[previous % len(self._slots)].discard(key)
+        self._slots[due % len(self._slots)].add(key)
+        self._due[key] = due
+
+    def cancel(self, key: Hashable) -> None:
+        """Forget ``key`` without expiring it."""
+        due = self._due.pop(key, None)
+        if due is not None:
+            self._slots[due % len(self._slots)].discard(key)
+
+    def advance(self, now: float) -> list[Hashable]:
+        """Move the wheel to ``now`` and return the keys that became due."""
+        target = math.floor(now / self.tick)
+        expired: list[Hashable] = []
+        # After a long stall every slot is visited once; the due check below
+        # keeps keys scheduled for a later round.
+        steps = min(target - self._cursor, len(self._slots))
+        for t in range(self._cursor + 1, self._cursor + 1 + steps):
+            slot = self._slots[t % len(self._slots)]
+            due_now = [key for key in slot if self._due[key] <= target]
+            for key in due_now:
+                slot.discard(key)
+                del self._due[key]
+            expired.extend(due_now)
+        self._cursor = max(self._cursor, target)
+        return expired
+
+
+class PresenceRegistry:
+    """This worker's connections, who they belong to, and their heartbeat deadlines."""
+
+    def __init__(
+        self, timeout: float, tick: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self._clock = clock
+        self._wheel = TimingWheel(timeout, tick, clock())
+        self._connections: dict[Hashable, uuid.UUID] = {}
+        self._counts: dict[uuid.UUID, int] = {}
+        self._changed: set[uuid.UUID] = set()
+        self._published: set[uuid.UUID] = set()
+
+    @property
+    def connection_count(self) -> int:
+        """Number of live connections on this worker."""
+        return len(self._connections)
+
+    @property
+    def online_users(self) -> Set[uuid.UUID]:
+        """Users with at least one live connection on this worker."""
+        return self._counts.keys()
+
+    def connect(self, connection_id: Hashable, user_id: uuid.UUID) -> None:
+        """Register a new connection for ``user_id`` and start its heartbeat deadline."""
+        if connection_id not in self._connections:
+            self._connections[connection_id] = user_id
+            count = self._counts.get(user_id, 0)
+            self._counts[user_id] = count + 1
+            if count == 0:
+                self._changed.add(user_id)
+        self._wheel.schedule(connection_id, self._clock())
+
+    def heartbeat(self, connection_id: Hashable) -> bool:
+        """Push back the deadline of a live connection; ``False`` if it is unknown."""
+        if connection_id not in self._connections:
+            return False
+        self._wheel.schedule(connection_id, self._clock())
+        return True
+
+    def disconnect(self, connection_id: Hashable) -> bool:
+        """Remove a connection that closed; ``False`` if it is unknown."""
+        user_id = self._connections.pop(connection_id, None)
+        if user_id is None:
+            return False
+        self._wheel.cancel(connection_id)
+        self._release(user_id)
+        return True
+
+    def expire(self) -> list[Hashable]:
+        """Remove and return the connections whose heartbeat deadline has passed."""
+        expired = self._wheel.advance(self._clock())
+        for connection_id in expired:
+            self._release(self._connections.pop(connection_id))
+        return expired
+
+    def _release(self, user_id: uuid.UUID) -> None:
+        count = self._counts[user_id] - 1
+        if count:
+            self._counts[user_id] = count
+        else:
+            del self._counts[user_id]
+            self._changed.add(user_id)
+
+    def drain(self) -> tuple[set[uuid.UUID], set[uuid.UUID]]:
+        """Return the users who came online and went offline since the last drain.
+
+        A user who connected and left again in between appears in neither set.
+        """
+        joined: set[uuid.UUID] = set()
+        left: set[uuid.UUID] = set()
+        for user_id in self._changed:
+            online = user_id in self._counts
+            if online and user_id not in self._published:
+                joined.add(user_id)
+            elif not online and user_id in self._published:
+                left.add(user_id)
+        self._changed.clear()
+        self._published |= joined
+        self._published -= left
+        return joined, left
+
+
+@dataclass(frozen=True, slots=True)
+class PresenceDiff:
+    """Users who came online or went offline between two presence versions."""
+
+    version: int
+    online: frozenset[uuid.UUID] = field(default_factory=frozenset)
+    offline: frozenset[uuid.UUID] = field(default_factory=frozenset)
+
+    def message(self) -> dict[str, Any]:
+        """Return the WebSocket message for this diff."""
+        return {
+            "type": "presence",
+            "version": self.version,
+            "online": sorted(str(u) for u in self.online),
+            "offline": sorted(str(u) for u in self.offline),
+        }
+
+
+_workers = cast(sa.Table, PresenceWorker.__table__)
+_sessions = cast(sa.Table, PresenceSession.__table__)
+
+
+def default_worker_id() -> str:
+    """Return an id unique to this worker process."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class PostgresPresenceStore:
+    """Publishes this worker's online users and reads those of all live workers."""
+
+    def __init__(self, engine: AsyncEngine, worker_id: str, ttl: float) -> None:
+        self.worker_id = worker_id
+        self._engine = engine
+        self._ttl = timedelta(seconds=ttl)
+
+    async def publish(
+        self,
+        joined: Set[uuid.UUID],
+        left: Set[uuid.UUID],
+        everyone: Set[uuid.UUID] | None = None,
+    ) -> None:
+        """Record changes, or replace this worker's sessions with ``everyone``."""
+        touch = postgresql.insert(_workers).values(worker_id=self.worker_id)
+        touch = touch.on_conflict_do_update(
+            index_elements=[_workers.c.worker_id], set_={"seen_at": sa.func.now()}
+        )
+        mine = _sessions.c.worker_id == self.worker_id
+        async with self._engine.begin() as conn:
+            await conn.execute(touch)
+            await conn.execute(
+                sa.delete(_workers).where(_workers.c.seen_at < sa.func.now() - self._ttl * 10)
+            )
+            if everyone is not None:
+                await conn.execute(sa.delete(_sessions).where(mine))
+                joined = everyone
+            elif left:
+                gone = sa.literal(list(left), postgresql.ARRAY(sa.Uuid))
+                await conn.execute(
+                    sa.delete(_sessions).where(mine, _sessions.c.user_id == sa.any_(gone))
+                )
+            if joined:
+                await conn.execute(
+                    postgresql.insert(_sessions).on_conflict_do_nothing(),
+                    [{"worker_id": self.worker_id, "user_id": u} for u in joined],
+                )
+
+    async def collect(self) -> set[uuid.UUID]:
+        """Return the users online on any worker that flushed within the TTL."""
+        query = (
+            sa.select(_sessions.c.user_id)
+            .distinct()
+            .join(_workers, _workers.c.worker_id == _sessions.c.worker_id)
+            .where(_workers.c.seen_at > sa.func.now() - self._ttl)
+        )
+        async with self._engine.connect() as conn:
+            result = await conn.execute(query)
+            return set(result.scalars())
+
+    async def remove(self) -> None:
+        """Delete this worker's row and, by cascade, its sessions."""
+        async with self._engine.begin() as conn:
+            await conn.execute(sa.delete(_workers).where(_workers.c.worker_id == self.worker_id))
+
+
+class PresenceTracker:
+    """Expires connections, aggregates presence, and broadcasts batched diffs."""
+
+    def __init__(
+        self,
+        *,
+        heartbeat_interval: float,
+        missed_heartbeats: int,
+        flush_interval: float,
+        store: PostgresPresenceStore | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.timeout = heartbeat_interval * (missed_heartbeats + 1)
+        self.flush_interval = flush_interval
+        self.registry = PresenceRegistry(self.timeout, flush_interval, clock)
+        self.store = store
+        self.broadcast: Broadcast | None = None
+        self.on_expired: ExpiredHandler | None = None
+        self.version = 0
+        self._online: set[uuid.UUID] = set()
+        self._resync = True
+        self._task: asyncio.Task[None] | None = None
+
+    def is_online(self, user_id: uuid.UUID) -> bool:
+        """Whether ``user_id`` was online at the last flush, on any worker."""
+        return user_id in self._online
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the full presence state as the message sent to new clients."""
+        return {
+            "type": "presence_snapshot",
+            "version": self.version,
+            "online": sorted(str(u) for u in self._online),
+        }
+
+    async def flush(self) -> PresenceDiff | None:
+        """Expire overdue connections, aggregate, and broadcast one diff if anything changed."""
+        with metrics.timer("presence_flush_seconds"):
+            expired = self.registry.expire()
+            if expired:
+                metrics.increment("presence_expired_total", len(expired))
+                if self.on_expired is not None:
+                    await self.on_expired(expired)
+            joined, left = self.registry.drain()
+            if self.store is None:
+                self._online |= joined
+                self._online -= left
+            else:
+                online = await self._aggregate(self.store, joined, left)
+                joined, left = online - self._online, self._online - online
+                self._online = online
+            metrics.set_gauge("presence_connections", self.registry.connection_count)
+            metrics.set_gauge("presence_online_users", len(self._online))
+            if not joined and not left:
+                return None
+            self.version += 1
+            diff = PresenceDiff(self.version, frozenset(joined), frozenset(left))
+            metrics.observe("presence_diff_users", len(joined) + len(left))
+            if self.broadcast is not None:
+                await self.broadcast(diff.message())
+            return diff
+
+    async def _aggregate(
+        self, store: PostgresPresenceStore, joined: set[uuid.UUID], left: set[uuid.UUID]
+    ) -> set[uuid.UUID]:
+        try:
+            everyone = self.registry.online_users if self._resync else None
+            await store.publish(joined, left, everyone)
+            self._resync = False
+            return await store.collect()
+        except Exception:
+            metrics.increment("presence_publish_failures_total")
+            logger.warning("presence publish failed; keeping local view", exc_info=True)
+            self._resync = True
+            return (self._online | joined) - left
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("presence flush failed")
+
+    def start(self) -> None:
+        """Start the background flush loop on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="presence-flush")
+
+    async def stop(self) -> None:
+        """Stop the flush loop and withdraw this worker's sessions from the shared store."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self.store is not None:
+            try:
+                await self.store.remove()
+            except Exception:
+                logger.warning(
+                    "could not remove worker presence; it expires after the TTL", exc_info=True
+                )
+
+
+_tracker: PresenceTracker | None = None
+
+
+def get_presence_tracker() -> PresenceTracker:
+    """Return the worker's presence tracker, creating it lazily from settings."""
+    global _tracker  # noqa: PLW0603
+    if _tracker is None:
+        settings = get_settings()
+        timeout = settings.PRESENCE_HEARTBEAT_SECONDS * (settings.PRESENCE_MISSED_HEARTBEATS + 1)
+        store = None
+        if settings.PRESENCE_BACKEND == "postgres":
+            from app.database import get_engine
+
+            store = PostgresPresenceStore(get_engine(), default_worker_id(), timeout)
+        _tracker = PresenceTracker(
+            heartbeat_interval=settings.PRESENCE_HEARTBEAT_SECONDS,
+            missed_heartbeats=settings.PRESENCE_MISSED_HEARTBEATS,
+            flush_interval=settings.PRESENCE_FLUSH_INTERVAL_SECONDS,
+            store=store,
+        )
+    return _tracker
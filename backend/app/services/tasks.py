@@ -0,0 +1,364 @@
+"""Supervised in-process runner for best-effort side effects.
+
+After a status is posted, GitHub enrichment, achievement notifications and
+WebSocket broadcasts run in the background. A bare ``asyncio.create_task``
+per side effect loses track of its tasks. Nothing bounds how many run at
+once, and under load they pile up without limit. Instead, request handlers
+hand the work to the worker's :class:`TaskRunner`:
+
+- Each named queue (:data:`DEFAULT_QUEUES`) has a fixed number of worker
+  coroutines, which limits how many of its jobs run at once. A slow GitHub
+  API therefore cannot starve broadcasts.
+- A queue holds at most ``TASK_QUEUE_MAX_SIZE`` waiting jobs. When it is
+  full, a new job replaces the newest waiting job of a lower priority. If
+  there is none, the new job is shed. Higher priorities run first, and jobs
+  of equal priority run in FIFO order.
+- A failing job is retried up to ``max_attempts`` times in total. The
+  delays are drawn at random up to an exponentially growing cap ("full
+  jitter"), so a failing dependency is not hit by synchronized retries.
+- :meth:`TaskRunner.stop` stops accepting work and gives queued, running
+  and retrying jobs up to ``TASK_DRAIN_TIMEOUT_SECONDS`` to finish. Jobs
+  that are still unfinished after that are cancelled and counted.
+
+Jobs are zero-argument callables that return an awaitable, such as
+``functools.partial(enrich, status_id)``. A retry calls the callable again,
+because a coroutine object can only be awaited once.
+
+Metrics, labelled with ``queue``:
+
+- ``task_queue_depth`` — jobs waiting (gauge).
+- ``task_queue_wait_seconds`` — time from submit to start.
+- ``task_run_seconds`` — time per attempt.
+- ``task_retries_total``, ``task_failures_total`` — retried attempts and
+  jobs that failed for good.
+- ``task_shed_total`` — jobs dropped because the queue was full, labelled
+  with ``priority``.
+- ``task_rejected_total`` — jobs submitted while the runner was stopped.
+- ``task_dropped_total`` — jobs cancelled when the drain timed out.
+"""
+
+import asyncio
+import contextlib
+import enum
+import itertools
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+
+from app.config import get_settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+JobFunc = Callable[[], Awaitable[object]]
+
+
+class Priority(enum.IntEnum):
+    """Job priority within a queue. Lower priorities are shed first."""
+
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+
+
+@dataclass(frozen=True, slots=True)
+class QueueSpec:
+    """Concurrency and retry policy of one named queue."""
+
+    concurrency: int
+    max_attempts: int
+
+
+DEFAULT_QUEUES: Mapping[str, QueueSpec] = {
+    # Calls the GitHub API; kept small to stay well within its rate limit.
+    "github": QueueSpec(concurrency=4, max_attempts=3),
+    "notifications": QueueSpec(concurrency=8, max_attempts=3),
+    # A broadcast retried later would arrive stale, so it runs once.
+    "broadcast": QueueSpec(concurrency=16, max_attempts=1),
+}
+
+
+@dataclass(slots=True)
+class Job:
+    """One unit of queued work and its attempt count."""
+
+    func: JobFunc
+    name: str
+    priority: Priority
+    enqueued_at: float
+    attempt: int = 0
+
+
+def retry_delay(attempt: int, base: float, cap: float, rng: random.Random) -> float:
+    """Full-jitter backoff: a random delay up to ``base * 2**(attempt - 1)``, at most ``cap``."""
+    return rng.uniform(0.0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class TaskQueue:
+    """A bounded priority queue of jobs with its own pool of worker coroutines."""
+
+    def __init__(
+        self,
+        name: str,
+        spec: QueueSpec,
+        *,
+        max_size: int,
+        retry_base: float,
+        retry_cap: float,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.name = name
+        self.spec = spec
+        self.max_size = max_size
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self._rng = rng or random.Random()
+        self._waiting: dict[Priority, deque[Job]] = {p: deque() for p in Priority}
+        self._size = 0
+        self._ready = asyncio.Semaphore(0)
+        self._running = 0
+        self._retrying: set[asyncio.Task[None]] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._workers: list[asyncio.Task[None]] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def running(self) -> int:
+        """Number of jobs currently executing."""
+        return self._running
+
+    @property
+    def retrying(self) -> int:
+        """Number of failed jobs waiting for their retry delay."""
+        return len(self._retrying)
+
+    def put(self, job: Job) -> bool:
+        """Queue ``job``, shedding lower-priority work if full. Returns whether it was queued."""
+        if self._size >= self.max_size:
+            victim = self._shed_candidate(job.priority)
+            if victim is None:
+                metrics.increment("task_shed_total", queue=self.name, priority=job.priority.name)
+                return False
+            self._waiting[victim].pop()
+            metrics.increment("task_shed_total", queue=self.name, priority=victim.name)
+        else:
+            self._size += 1
+            self._ready.release()
+        self._waiting[job.priority].append(job)
+        self._idle.clear()
+        metrics.set_gauge("task_queue_depth", self._size, queue=self.name)
+        return True
+
+    def _shed_candidate(self, priority: Priority) -> Priority | None:
+        for lower in Priority:
+            if lower >= priority:
+                return None
+            if self._waiting[lower]:
+                return lower
+        return None
+
+    def _pop(self) -> Job:
+        for priority in reversed(Priority):
+            if self._waiting[priority]:
+                self._size -= 1
+                metrics.set_gauge("task_queue_depth", self._size, queue=self.name)
+                return self._waiting[priority].popleft()
+        msg = f"queue {self.name!r} signalled a job but none is waiting"
+        raise RuntimeError(msg)
+
+    def _update_idle(self) -> None:
+        if not self._size and not self._running and not self._retrying:
+            self._idle.set()
+
+    async def _work(self) -> None:
+        while True:
+            await self._ready.acquire()
+            job = self._pop()
+            self._running += 1
+            try:
+                await self._attempt(job)
+            finally:
+                self._running -= 1
+                self._update_idle()
+
+    async def _attempt(self, job: Job) -> None:
+        job.attempt += 1
+        if job.attempt == 1:
+            metrics.observe(
+                "task_queue_wait_seconds", time.monotonic() - job.enqueued_at, queue=self.name
+            )
+        try:
+            with metrics.timer("task_run_seconds", queue=self.name):
+                await job.func()
+        except Exception:
+            if job.attempt < self.spec.max_attempts:
+                metrics.increment("task_retries_total", queue=self.name)
+                delay = retry_delay(job.attempt, self.retry_base, self.retry_cap, self._rng)
+                logger.warning(
+                    "task %s on %s failed (attempt %d/%d); retrying in %.2fs",
+                    job.name,
+                    self.name,
+                    job.attempt,
+                    self.spec.max_attempts,
+                    delay,
+                    exc_info=True,
+                )
+                self._schedule_retry(job, delay)
+            else:
+                metrics.increment("task_failures_total", queue=self.name)
+                logger.exception(
+                    "task %s on %s failed after %d attempts", job.name, self.name, job.attempt
+                )
+
+    def _schedule_retry(self, job: Job, delay: float) -> None:
+        async def retry() -> None:
+            await asyncio.sleep(delay)
+            # Retries are queued even while the runner drains, and compete
+            # for space like any new job of the same priority.
+            if not self.put(job):
+                logger.warning("retry of task %s on %s shed: queue full", job.name, self.name)
+
+        task = asyncio.create_task(retry(), name=f"task-retry-{self.name}")
+        self._retrying.add(task)
+
+        def done(finished: asyncio.Task[None]) -> None:
+            self._retrying.discard(finished)
+            self._update_idle()
+
+        task.add_done_callback(done)
+
+    def start(self) -> None:
+        """Start the worker coroutines on the running event loop."""
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._work(), name=f"task-{self.name}-{i}")
+                for i in range(self.spec.concurrency)
+            ]
+
+    async def join(self) -> None:
+        """Wait until no job is waiting, running or due for a retry."""
+        await self._idle.wait()
+
+    async def cancel(self) -> int:
+        """Cancel workers and retries, discard waiting jobs, and return how many were lost."""
+        lost = self._size + self._running + len(self._retrying)
+        tasks = [*self._workers, *self._retrying]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._workers = []
+        for waiting in self._waiting.values():
+            waiting.clear()
+        self._size = 0
+        self._ready = asyncio.Semaphore(0)
+        self._idle.set()
+        metrics.set_gauge("task_queue_depth", 0, queue=self.name)
+        return lost
+
+
+class TaskRunner:
+    """The worker's named task queues, started and drained with the app lifespan."""
+
+    def __init__(self, queues: Mapping[str, TaskQueue], *, drain_timeout: float) -> None:
+        self.queues = dict(queues)
+        self.drain_timeout = drain_timeout
+        self._accepting = False
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_specs(
+        cls,
+        specs: Mapping[str, QueueSpec],
+        *,
+        max_size: int,
+        retry_base: float,
+        retry_cap: float,
+        drain_timeout: float,
+    ) -> "TaskRunner":
+        """Build a runner with one queue per spec."""
+        queues = {
+            name: TaskQueue(
+                name, spec, max_size=max_size, retry_base=retry_base, retry_cap=retry_cap
+            )
+            for name, spec in specs.items()
+        }
+        return cls(queues, drain_timeout=drain_timeout)
+
+    def submit(
+        self,
+        queue: str,
+        func: JobFunc,
+        *,
+        priority: Priority = Priority.NORMAL,
+        name: str | None = None,
+    ) -> bool:
+        """Queue ``func`` on ``queue``. Returns ``False`` if it was shed or the runner is stopped.
+
+        Never blocks and never raises for a full queue, so request handlers
+        can call it inline.
+        """
+        target = self.queues.get(queue)
+        if target is None:
+            msg = f"unknown task queue {queue!r}; expected one of {sorted(self.queues)}"
+            raise KeyError(msg)
+        label = name or getattr(func, "__name__", None) or f"job-{next(self._seq)}"
+        if not self._accepting:
+            metrics.increment("task_rejected_total", queue=queue)
+            logger.warning("task %s on %s rejected: runner is not running", label, queue)
+            return False
+        job = Job(func=func, name=label, priority=priority, enqueued_at=time.monotonic())
+        return target.put(job)
+
+    def start(self) -> None:
+        """Start every queue's workers and begin accepting jobs."""
+        for queue in self.queues.values():
+            queue.start()
+        self._accepting = True
+
+    async def stop(self) -> int:
+        """Stop accepting jobs, drain for up to ``drain_timeout`` seconds, then cancel the rest.
+
+        Returns the number of jobs that were cancelled or discarded.
+        """
+        self._accepting = False
+        queues = list(self.queues.values())
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(q.join() for q in queues)), timeout=self.drain_timeout
+            )
+        except TimeoutError:
+            logger.warning("task drain timed out after %.1fs", self.drain_timeout)
+        dropped = 0
+        for queue in queues:
+            lost = await queue.cancel()
+            if lost:
+                metrics.increment("task_dropped_total", lost, queue=queue.name)
+                logger.warning("dropped %d unfinished tasks on %s", lost, queue.name)
+            dropped += lost
+        return dropped
+
+
+_runner: TaskRunner | None = None
+
+
+def get_task_runner() -> TaskRunner:
+    """Return the worker's task runner, creating it lazily from settings."""
+    global _runner  # noqa: PLW0603
+    if _runner is None:
+        settings = get_settings()
+        _runner = TaskRunner.from_specs(
+            DEFAULT_QUEUES,
+            max_size=settings.TASK_QUEUE_MAX_SIZE,
+            retry_base=settings.TASK_RETRY_BASE_SECONDS,
+            retry_cap=settings.TASK_RETRY_MAX_SECONDS,
+            drain_timeout=settings.TASK_DRAIN_TIMEOUT_SECONDS,
+        )
+    return _runner
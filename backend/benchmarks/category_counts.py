@@ -0,0 +1,149 @@
+"""Category-count benchmark: concurrent posts in one category on one day.
+
+Every post's triggers add one to a ``category_daily_counts`` row of its
+team, day and category. The row lock is held until the post's transaction
+commits, so concurrent posts in one category queue behind each other unless
+the count is spread over shard rows. This starts ``--writers`` concurrent
+connections against ``DATABASE_URL``. Each one inserts a status in category
+``done`` and holds its transaction open for ``--hold-ms`` before committing,
+standing in for the rest of a request's work. It reports posts per second,
+commit latency and how often writers were seen waiting on a row lock, then
+deletes its statuses again. Run from ``backend/`` against a migrated,
+disposable database::
+
+    python -m benchmarks.category_counts --writers 16 --hold-ms 20 --max-p99-ms 150
+
+Fails if the p99 post latency exceeds ``--max-p99-ms``.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import statistics
+import time
+import uuid
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.config import get_settings
+
+USERNAME = "bench-category-counts"
+
+POST = text(
+    "INSERT INTO status_updates (user_id, team_id, message, category) "
+    "SELECT id, team_id, 'benchmark', 'done' FROM users WHERE id = :user_id"
+)
+HOLD = text("SELECT pg_sleep(:seconds)")
+LOCK_WAITERS = text(
+    "SELECT count(*) FROM pg_stat_activity "
+    "WHERE wait_event_type = 'Lock' AND query LIKE 'INSERT INTO status_updates%'"
+)
+TODAY_ROWS = text(
+    "SELECT count(*), coalesce(sum(count), 0) FROM category_daily_counts "
+    "WHERE day = (now() AT TIME ZONE 'UTC')::date AND category = 'done'"
+)
+
+
+async def _bench_user(engine: AsyncEngine) -> uuid.UUID:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO users (username, display_name, email, password_hash) "
+                "VALUES (:name, :name, :email, '-') ON CONFLICT (username) DO NOTHING"
+            ),
+            {"name": USERNAME, "email": f"{USERNAME}@example.invalid"},
+        )
+        user_id = await conn.scalar(
+            text("SELECT id FROM users WHERE username = :name"), {"name": USERNAME}
+        )
+    assert isinstance(user_id, uuid.UUID)
+    return user_id
+
+
+async def _writer(
+    engine: AsyncEngine, user_id: uuid.UUID, hold_s: float, deadline: float
+) -> list[float]:
+    latencies: list[float] = []
+    async with engine.connect() as conn:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            async with conn.begin():
+                await conn.execute(POST, {"user_id": user_id})
+                await conn.execute(HOLD, {"seconds": hold_s})
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def _sample_waiters(engine: AsyncEngine, samples: list[int]) -> None:
+    async with engine.connect() as conn:
+        while True:
+            samples.append(int(await conn.scalar(LOCK_WAITERS) or 0))
+            await conn.rollback()
+            await asyncio.sleep(0.05)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Post from every writer for ``--seconds`` and summarize latency and lock waits."""
+    engine = create_async_engine(
+        get_settings().DATABASE_URL, pool_size=args.writers + 1, max_overflow=0
+    )
+    try:
+        user_id = await _bench_user(engine)
+        waiters: list[int] = []
+        sampler = asyncio.create_task(_sample_waiters(engine, waiters))
+        deadline = time.perf_counter() + args.seconds
+        results = await asyncio.gather(
+            *(_writer(engine, user_id, args.hold_ms / 1000, deadline) for _ in range(args.writers))
+        )
+        sampler.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await sampler
+        async with engine.connect() as conn:
+            rows, counted = (await conn.execute(TODAY_ROWS)).one()
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+    finally:
+        await engine.dispose()
+
+    latencies = sorted(ms for writer in results for ms in writer)
+    return {
+        "benchmark": "category_counts",
+        "writers": args.writers,
+        "hold_ms": args.hold_ms,
+        "posts": len(latencies),
+        "posts_per_second": round(len(latencies) / args.seconds, 1),
+        "ideal_posts_per_second": round(args.writers / (args.hold_ms / 1000), 1),
+        "latency_ms": {
+            "p50": round(statistics.median(latencies), 1),
+            "p99": round(latencies[int(len(latencies) * 0.99) - 1], 1),
+            "max": round(latencies[-1], 1),
+        },
+        "lock_waiters": {
+            "mean": round(statistics.fmean(waiters), 2) if waiters else 0.0,
+            "max": max(waiters, default=0),
+        },
+        "count_rows_today": rows,
+        "counted_today": counted,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark and print a JSON summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--hold-ms", type=float, default=20.0)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--max-p99-ms", type=float, default=150.0)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    result["passed"] = result["latency_ms"]["p99"] <= args.max_p99_ms
+    print(json.dumps(result, indent=2))
+    return 0 if result["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
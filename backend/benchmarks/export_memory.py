@@ -0,0 +1,141 @@
+"""Export memory benchmark: stream a large export and bound the server's RSS.
+
+Seeds ``--rows`` synthetic statuses into the database at ``DATABASE_URL``
+(once; pass ``--seed``), starts ``uvicorn app.main:app``, downloads
+``/api/v1/statuses/export`` while sampling the server's resident set size
+from ``/proc``, and fails if the peak exceeds ``--max-rss-mb``. Linux only.
+Run from ``backend/`` against a disposable database::
+
+    python -m benchmarks.export_memory --seed --rows 5000000 --max-rss-mb 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import get_settings
+from benchmarks.cold_start import free_port
+
+SEED_USERS = 1000
+
+
+async def seed(rows: int) -> None:
+    """Insert ``SEED_USERS`` users and ``rows`` statuses spread over 90 days."""
+    engine = create_async_engine(get_settings().DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO users (id, username, display_name, email, password_hash) "
+                "SELECT gen_random_uuid(), 'bench' || g, 'Bench ' || g, "
+                "'bench' || g || '@example.com', 'x' "
+                "FROM generate_series(1, :n) AS g ON CONFLICT DO NOTHING"
+            ),
+            {"n": SEED_USERS},
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO status_updates (id, user_id, message, category, created_at) "
+                "SELECT gen_random_uuid(), u.id, "
+                "'benchmark status ' || g || ' with some, \"quoted\" text', "
+                "(ARRAY['done','in-progress','blocked','planning'])[1 + g % 4], "
+                "now() - (g % 7776000) * interval '1 second' "
+                "FROM generate_series(1, :n) AS g "
+                "JOIN (SELECT id, row_number() OVER () - 1 AS k FROM users "
+                "      WHERE username LIKE 'bench%') AS u ON u.k = g % :users"
+            ),
+            {"n": rows, "users": SEED_USERS},
+        )
+    await engine.dispose()
+
+
+def rss_mb(pid: int) -> float:
+    """Return the resident set size of ``pid`` in MiB."""
+    with open(f"/proc/{pid}/status", encoding="ascii") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def run(fmt: str, max_rss_mb: float) -> dict[str, object]:
+    """Start a server, stream one export, and return the measurements."""
+    port = free_port()
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "app.main:app",
+        "--port",
+        str(port),
+        "--log-level",
+        "warning",
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    base = f"http://127.0.0.1:{port}"
+    peak = 0.0
+    try:
+        async with httpx.AsyncClient(base_url=base, timeout=None) as client:
+            for _ in range(200):
+                try:
+                    if (await client.get("/api/v1/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.05)
+            baseline = rss_mb(proc.pid)
+            received = lines = 0
+            started = time.perf_counter()
+            last_sample = 0.0
+            async with client.stream(
+                "GET", "/api/v1/statuses/export", params={"format": fmt}
+            ) as r:
+                r.raise_for_status()
+                async for chunk in r.aiter_bytes():
+                    received += len(chunk)
+                    lines += chunk.count(b"\n")
+                    now = time.perf_counter()
+                    if now - last_sample > 0.1:
+                        peak = max(peak, rss_mb(proc.pid))
+                        last_sample = now
+            elapsed = time.perf_counter() - started
+    finally:
+        proc.terminate()
+        await proc.wait()
+    return {
+        "benchmark": "export_memory",
+        "format": fmt,
+        "rows": lines - (1 if fmt == "csv" else 0),
+        "bytes": received,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(lines / elapsed) if elapsed else None,
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak, 1),
+        "max_rss_mb": max_rss_mb,
+        "passed": peak <= max_rss_mb,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Optionally seed, then run the benchmark and print a JSON summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="insert synthetic rows first")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--max-rss-mb", type=float, default=200.0)
+    args = parser.parse_args(argv)
+
+    if args.seed:
+        asyncio.run(seed(args.rows))
+    summary = asyncio.run(run(args.format, args.max_rss_mb))
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+"""Recent-feed cache benchmark: memory per 100k statuses and page latency.
+
+Loads ``--statuses`` synthetic statuses by ``--authors`` users into a
+:class:`~app.services.feed_cache.RecentFeedCache`. Reports the cache's heap
+size, and the size of just the dicts if the same rows were kept as a list
+of dicts (without their values). Times first-page reads for each filter.
+Fails if the cache needs more than ``--max-overhead`` bytes per status on
+top of the message text. No database or server is needed::
+
+    python -m benchmarks.feed_cache --statuses 100000 --max-overhead 64
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+import uuid
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from app.models.status import VALID_CATEGORIES
+from app.queries import FeedFilters
+from app.services.feed_cache import RecentFeedCache
+
+
+def synthetic_rows(statuses: int, authors: int, seed: int = 1) -> list[dict[str, Any]]:
+    """Build feed rows with 20-200 character messages, oldest first."""
+    rng = random.Random(seed)
+    people = [
+        (uuid.UUID(int=rng.getrandbits(128)), f"user{i}", f"User Number {i}", None)
+        for i in range(authors)
+    ]
+    start = datetime(2026, 10, 1, tzinfo=UTC)
+    rows = []
+    for i in range(statuses):
+        user_id, username, display_name, avatar_url = rng.choice(people)
+        rows.append(
+            {
+                "id": uuid.UUID(int=rng.getrandbits(128)),
+                "message": "x" * rng.randint(20, 200),
+                "category": rng.choice(VALID_CATEGORIES),
+                "created_at": start + timedelta(seconds=i),
+                "user_id": user_id,
+                "username": username,
+                "display_name": display_name,
+                "avatar_url": avatar_url,
+            }
+        )
+    return rows
+
+
+def _traced(build: Any) -> tuple[Any, int]:
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def run(statuses: int, authors: int, reads: int) -> dict[str, Any]:
+    """Measure memory and page latency for ``statuses`` cached statuses."""
+    rows = synthetic_rows(statuses, authors)
+    started = time.perf_counter()
+    cache = RecentFeedCache(statuses)
+    cache.load(rows)
+    load_s = time.perf_counter() - started
+    stats = cache.stats()
+
+    _, dict_bytes = _traced(lambda: [dict(r) for r in rows])
+    newest = rows[-1]
+    filters = {
+        "none": FeedFilters(),
+        "category": FeedFilters(category="blocked"),
+        "username": FeedFilters(username=newest["username"]),
+        "user_and_category": FeedFilters(user_id=newest["user_id"], category="done"),
+        "since_1h": FeedFilters(since=newest["created_at"] - timedelta(hours=1)),
+    }
+    latency = {}
+    for name, f in filters.items():
+        started = time.perf_counter()
+        for _ in range(reads):
+            cache.page(f, limit=20)
+        latency[name] = round((time.perf_counter() - started) / reads * 1e6, 1)
+
+    per_100k = stats["bytes"] * 100_000 / statuses
+    return {
+        "benchmark": "feed_cache",
+        "statuses": statuses,
+        "authors": authors,
+        "load_seconds": round(load_s, 2),
+        "cache_bytes": stats["bytes"],
+        "cache_mb_per_100k": round(per_100k / 2**20, 2),
+        "bytes_per_status": stats["bytes_per_entry"],
+        "text_bytes": stats["text_bytes"],
+        "overhead_bytes_per_status": round((stats["bytes"] - stats["text_bytes"]) / statuses, 1),
+        "dict_rows_bytes_without_values": dict_bytes,
+        "page_us": latency,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark and print a JSON summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--statuses", type=int, default=100_000)
+    parser.add_argument("--authors", type=int, default=1_000)
+    parser.add_argument("--reads", type=int, default=1_000)
+    parser.add_argument(
+        "--max-overhead", type=float, default=64.0, help="budget in bytes per status, beyond text"
+    )
+    args = parser.parse_args(argv)
+
+    result = run(args.statuses, args.authors, args.reads)
+    result["passed"] = result["overhead_bytes_per_status"] <= args.max_overhead
+    print(json.dumps(result, indent=2))
+    return 0 if result["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,585 @@
+"""Load test: many WebSocket clients and REST users against a local uvicorn server.
+
+Starts ``uvicorn app.main:app`` (``--workers`` processes) on a free port,
+unless ``--url`` points at a server that is already running. It then:
+
+1. opens ``--ws-clients`` WebSocket connections to ``--ws-path``, spread
+   over ``--ramp-seconds``;
+2. runs ``--users`` REST users for ``--duration`` seconds. Each user picks
+   an operation by the ``--mix`` weights: ``read`` is ``GET --read-path``,
+   ``post`` is ``POST --post-path`` with a JSON status. Users pause for an
+   exponentially distributed think time with mean ``--think-ms``;
+3. waits ``--drain-seconds`` for broadcasts still in flight, then closes
+   every socket.
+
+A post whose response has an ``id`` is expected on every WebSocket that was
+open when it was sent, as a ``{"type": "new_status", "data": {"id": ...}}``
+message. Each expected message that never arrives is counted as dropped.
+Delivery latency runs from sending the post to receiving the broadcast.
+
+By default only ``GET /api/v1/health`` is read, with no WebSocket clients.
+Posting and broadcasts need ``--post-path`` and ``--ws-path``, because
+this build has no status or WebSocket routes yet.
+
+The server's CPU and resident set size (summed over uvicorn and its
+workers) are sampled from ``/proc``, so this runs on Linux only. Nothing
+leaves the machine. A server started here gets ``RATE_LIMIT_*=off``,
+because every simulated client shares 127.0.0.1.
+
+The JSON summary is printed and saved to
+``--output-dir/load-<timestamp>-<commit>.json``. ``--compare`` adds the
+change of each headline metric against an earlier result (``latest`` picks
+the newest one in ``--output-dir``). Run from ``backend/``::
+
+    python -m benchmarks.load --users 200
+    python -m benchmarks.load --read-path "/api/v1/presence?team_id=<uuid>"
+    python -m benchmarks.load --ws-clients 2000 --ws-path /api/v1/ws/statuses \
+        --mix read=9,post=1 --read-path /api/v1/statuses --post-path /api/v1/statuses
+    python -m benchmarks.load --compare latest --max-p99-ms 250 --max-dropped 0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import WebSocketException
+
+from app.models.status import VALID_CATEGORIES
+from benchmarks.cold_start import free_port
+from benchmarks.export_memory import rss_mb
+
+OPERATIONS = ("read", "post")
+RESULTS_DIR = Path(__file__).parent / "results"
+SAMPLE_INTERVAL_SECONDS = 0.5
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+# Headline metrics for --compare, as dotted paths into the summary.
+COMPARED = (
+    "rest.read.requests_per_second",
+    "rest.read.latency_ms.p99",
+    "rest.post.requests_per_second",
+    "rest.post.latency_ms.p99",
+    "websocket.connect_ms.p99",
+    "websocket.delivery_ms.p99",
+    "websocket.dropped",
+    "server.cpu_percent.mean",
+    "server.rss_mb.peak",
+    "server.kb_per_connection",
+)
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Parse ``read=9,post=1`` into operation weights."""
+    mix: dict[str, float] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS or not weight:
+            msg = f"expected {'/'.join(OPERATIONS)}=<weight>, got {part!r}"
+            raise argparse.ArgumentTypeError(msg)
+        mix[name] = float(weight)
+    if not any(w > 0 for w in mix.values()):
+        msg = "at least one weight must be positive"
+        raise argparse.ArgumentTypeError(msg)
+    return mix
+
+
+def parse_header(value: str) -> tuple[str, str]:
+    """Parse ``Name: value`` into a header pair."""
+    name, sep, content = value.partition(":")
+    if not sep or not name.strip():
+        msg = f"expected 'Name: value', got {value!r}"
+        raise argparse.ArgumentTypeError(msg)
+    return name.strip(), content.strip()
+
+
+def percentiles(samples: list[float]) -> dict[str, float] | None:
+    """Return p50/p90/p99/max of ``samples`` rounded to 0.01, or ``None`` if empty."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def rank(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    return {
+        "p50": round(statistics.median(ordered), 2),
+        "p90": round(rank(0.90), 2),
+        "p99": round(rank(0.99), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+def process_tree(root: int) -> list[int]:
+    """Return ``root`` and all of its descendants, found by scanning ``/proc``."""
+    children: dict[int, list[int]] = defaultdict(list)
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", encoding="ascii") as fh:
+                fields = fh.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children[int(fields[1])].append(int(entry.name))
+    tree, pending = [], [root]
+    while pending:
+        pid = pending.pop()
+        tree.append(pid)
+        pending.extend(children.get(pid, ()))
+    return tree
+
+
+def cpu_seconds(pids: list[int]) -> float:
+    """Return the user plus system CPU time consumed so far by ``pids``."""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", encoding="ascii") as fh:
+                fields = fh.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        total += int(fields[11]) + int(fields[12])
+    return total / CLOCK_TICKS
+
+
+class ServerSampler:
+    """Samples CPU and RSS of a server process tree in the background."""
+
+    def __init__(self, pid: int) -> None:
+        self.pid = pid
+        self.samples: list[tuple[float, float, float]] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def rss_mb(self) -> float:
+        """Current resident set size of the whole tree in MiB."""
+        total = 0.0
+        for pid in process_tree(self.pid):
+            try:
+                total += rss_mb(pid)
+            except OSError:
+                continue
+        return total
+
+    async def _run(self) -> None:
+        last_wall, last_cpu = time.perf_counter(), cpu_seconds(process_tree(self.pid))
+        while True:
+            await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+            wall, cpu = time.perf_counter(), cpu_seconds(process_tree(self.pid))
+            self.samples.append((wall, 100 * (cpu - last_cpu) / (wall - last_wall), self.rss_mb()))
+            last_wall, last_cpu = wall, cpu
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def between(self, start: float, end: float) -> dict[str, Any]:
+        """Summarize the samples taken between two ``perf_counter`` times."""
+        window = [s for s in self.samples if start <= s[0] <= end] or self.samples[-1:]
+        return {
+            "cpu_percent": {
+                "mean": round(statistics.fmean(s[1] for s in window), 1) if window else None,
+                "max": round(max(s[1] for s in window), 1) if window else None,
+            },
+            "rss_mb": {"peak": round(max((s[2] for s in window), default=0.0), 1)},
+        }
+
+
+class LoadRun:
+    """State shared by the simulated clients of one run."""
+
+    def __init__(self, args: argparse.Namespace, base_url: str) -> None:
+        self.args = args
+        self.base_url = base_url
+        self.ws_url = "ws" + base_url.removeprefix("http") + (args.ws_path or "")
+        self.headers = dict(args.header)
+        self.latency_ms: dict[str, list[float]] = defaultdict(list)
+        self.outcomes: dict[str, Counter[str]] = defaultdict(Counter)
+        self.sockets: list[ClientConnection] = []
+        self.connect_ms: list[float] = []
+        self.connect_failures: Counter[str] = Counter()
+        self.disconnects = 0
+        self.messages = 0
+        self.open_sockets = 0
+        self.closing = False
+        # Post id -> (time sent, sockets open when sent); id -> receive times.
+        self.posted: dict[str, tuple[float, int]] = {}
+        self.received: dict[str, list[float]] = defaultdict(list)
+
+    async def ws_client(self, n: int) -> None:
+        """Connect after this client's share of the ramp, then read until closed."""
+        await asyncio.sleep(self.args.ramp_seconds * n / max(self.args.ws_clients, 1))
+        started = time.perf_counter()
+        try:
+            ws = await connect(
+                self.ws_url,
+                additional_headers=self.headers,
+                open_timeout=10,
+                ping_interval=None,
+                max_queue=None,
+            )
+        except (OSError, TimeoutError, WebSocketException) as exc:
+            self.connect_failures[type(exc).__name__] += 1
+            return
+        self.connect_ms.append((time.perf_counter() - started) * 1000)
+        self.sockets.append(ws)
+        self.open_sockets += 1
+        try:
+            async for raw in ws:
+                self.on_message(raw)
+        except WebSocketException:
+            pass
+        finally:
+            self.open_sockets -= 1
+            if not self.closing:
+                self.disconnects += 1
+
+    def on_message(self, raw: str | bytes) -> None:
+        """Record a ``new_status`` broadcast's arrival time."""
+        now = time.perf_counter()
+        self.messages += 1
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        if isinstance(message, dict) and message.get("type") == "new_status":
+            data = message.get("data")
+            if isinstance(data, dict) and "id" in data:
+                self.received[str(data["id"])].append(now)
+
+    async def rest_user(self, client: httpx.AsyncClient, n: int, deadline: float) -> None:
+        """Issue requests by the configured mix until ``deadline``."""
+        rng = random.Random(self.args.seed * 100_003 + n)
+        ops = list(self.args.mix)
+        weights = [self.args.mix[op] for op in ops]
+        sent = 0
+        while time.perf_counter() < deadline:
+            op = rng.choices(ops, weights)[0]
+            started = time.perf_counter()
+            open_sockets = self.open_sockets
+            try:
+                if op == "read":
+                    response = await client.get(self.args.read_path)
+                else:
+                    sent += 1
+                    body = {
+                        "message": f"load test {n}-{sent}",
+                        "category": rng.choice(VALID_CATEGORIES),
+                    }
+                    response = await client.post(self.args.post_path, json=body)
+            except httpx.HTTPError as exc:
+                self.outcomes[op][type(exc).__name__] += 1
+            else:
+                self.latency_ms[op].append((time.perf_counter() - started) * 1000)
+                self.outcomes[op][str(response.status_code)] += 1
+                if op == "post" and response.is_success:
+                    status_id = _response_id(response)
+                    if status_id is not None:
+                        self.posted[status_id] = (started, open_sockets)
+            if self.args.think_ms > 0:
+                await asyncio.sleep(rng.expovariate(1000 / self.args.think_ms))
+
+    async def close_sockets(self) -> None:
+        """Close every WebSocket still open."""
+        self.closing = True
+        await asyncio.gather(*(ws.close() for ws in self.sockets), return_exceptions=True)
+
+    def websocket_summary(self) -> dict[str, Any]:
+        """Connection, delivery and drop counts for the WebSocket clients."""
+        expected = sum(open_sockets for _, open_sockets in self.posted.values())
+        delivered = 0
+        delivery_ms: list[float] = []
+        for status_id, (sent_at, open_sockets) in self.posted.items():
+            arrivals = self.received.get(status_id, [])[:open_sockets]
+            delivered += len(arrivals)
+            delivery_ms.extend((t - sent_at) * 1000 for t in arrivals)
+        return {
+            "clients": self.args.ws_clients,
+            "connected": len(self.connect_ms),
+            "connect_failures": dict(self.connect_failures),
+            "unexpected_disconnects": self.disconnects,
+            "connect_ms": percentiles(self.connect_ms),
+            "messages": self.messages,
+            "expected_deliveries": expected,
+            "dropped": expected - delivered,
+            "delivery_ms": percentiles(delivery_ms),
+        }
+
+    def rest_summary(self, seconds: float) -> dict[str, Any]:
+        """Throughput, latency and outcomes per operation."""
+        return {
+            op: {
+                "requests": len(self.latency_ms[op]),
+                "requests_per_second": round(len(self.latency_ms[op]) / seconds, 1),
+                "outcomes": dict(self.outcomes[op]),
+                "latency_ms": percentiles(self.latency_ms[op]),
+            }
+            for op in self.args.mix
+        }
+
+
+def _response_id(response: httpx.Response) -> str | None:
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    return str(body["id"]) if isinstance(body, dict) and "id" in body else None
+
+
+def raise_open_file_limit(needed: int) -> None:
+    """Raise the soft ``RLIMIT_NOFILE`` towards ``needed`` (up to the hard limit)."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen[bytes]:
+    """Start ``uvicorn app.main:app`` with rate limits off."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("JWT_SECRET", "bench-only")
+    for scope in ("LOGIN", "REGISTER", "STATUS_CREATE", "WS_CONNECT", "EXPORT"):
+        env[f"RATE_LIMIT_{scope}"] = "off"
+    return subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+
+
+async def wait_until_healthy(base_url: str, timeout_s: float = 30.0) -> None:
+    """Poll ``/api/v1/health`` until it answers ``200``."""
+    deadline = time.perf_counter() + timeout_s
+    async with httpx.AsyncClient(base_url=base_url, timeout=1.0) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get("/api/v1/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.05)
+    msg = f"no 200 from {base_url}/api/v1/health within {timeout_s}s"
+    raise TimeoutError(msg)
+
+
+async def run(args: argparse.Namespace, base_url: str, server_pid: int | None) -> dict[str, Any]:
+    """Drive one load run against ``base_url`` and return its summary."""
+    await wait_until_healthy(base_url)
+    load = LoadRun(args, base_url)
+    sampler = ServerSampler(server_pid) if server_pid is not None else None
+    idle_rss = sampler.rss_mb() if sampler is not None else None
+    if sampler is not None:
+        sampler.start()
+
+    readers = [asyncio.create_task(load.ws_client(n)) for n in range(args.ws_clients)]
+    await asyncio.sleep(args.ramp_seconds)
+    while len(load.connect_ms) + sum(load.connect_failures.values()) < args.ws_clients:
+        await asyncio.sleep(0.05)
+    connected_rss = sampler.rss_mb() if sampler is not None else None
+
+    measure_start, client_cpu = time.perf_counter(), time.process_time()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=load.headers, limits=limits, timeout=args.timeout
+    ) as client:
+        deadline = measure_start + args.duration
+        await asyncio.gather(*(load.rest_user(client, n, deadline) for n in range(args.users)))
+    measure_end = time.perf_counter()
+    client_cpu_percent = 100 * (time.process_time() - client_cpu) / (measure_end - measure_start)
+    await asyncio.sleep(args.drain_seconds)
+    await load.close_sockets()
+    await asyncio.gather(*readers, return_exceptions=True)
+
+    server: dict[str, Any] = {"workers": args.workers if args.url is None else None}
+    if sampler is not None:
+        await sampler.stop()
+        server.update(sampler.between(measure_start, measure_end))
+        server["rss_mb"]["idle"] = round(idle_rss or 0.0, 1)
+        server["rss_mb"]["connected"] = round(connected_rss or 0.0, 1)
+        if load.connect_ms and idle_rss is not None and connected_rss is not None:
+            per_connection = (connected_rss - idle_rss) * 1024 / len(load.connect_ms)
+            server["kb_per_connection"] = round(per_connection, 1)
+    return {
+        "benchmark": "load",
+        "commit": git_commit(),
+        "started_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "config": {
+            "ws_clients": args.ws_clients,
+            "users": args.users,
+            "mix": args.mix,
+            "duration_seconds": args.duration,
+            "think_ms": args.think_ms,
+            "read_path": args.read_path,
+            "post_path": args.post_path,
+            "ws_path": args.ws_path,
+        },
+        "rest": load.rest_summary(measure_end - measure_start),
+        "websocket": load.websocket_summary(),
+        "server": server,
+        "client_cpu_percent": round(client_cpu_percent, 1),
+    }
+
+
+def git_commit() -> str | None:
+    """Return the short ``HEAD`` commit, suffixed ``-dirty`` for uncommitted changes."""
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{sha}-dirty" if dirty else sha
+
+
+def lookup(summary: dict[str, Any], path: str) -> float | None:
+    """Return the number at a dotted ``path`` in ``summary``, or ``None``."""
+    value: Any = summary
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value if isinstance(value, int | float) else None
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Return the baseline value, current value and change in percent of each headline metric."""
+    changes: dict[str, dict[str, Any]] = {}
+    for path in COMPARED:
+        before, after = lookup(baseline, path), lookup(current, path)
+        if before is None and after is None:
+            continue
+        change = None
+        if before and after is not None:
+            change = round(100 * (after - before) / before, 1)
+        changes[path] = {"baseline": before, "current": after, "change_pct": change}
+    return changes
+
+
+def save(summary: dict[str, Any], output_dir: Path) -> Path:
+    """Write ``summary`` to ``output_dir`` under a timestamped, commit-tagged name."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+    path = output_dir / f"load-{stamp}-{summary['commit'] or 'unknown'}.json"
+    path.write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def passed(summary: dict[str, Any], *, max_p99_ms: float | None, max_dropped: int | None) -> bool:
+    """Whether every operation's p99 and the dropped broadcasts are within the limits."""
+    p99s = [lookup(summary, f"rest.{op}.latency_ms.p99") for op in summary["rest"]]
+    return (max_p99_ms is None or all(p is None or p <= max_p99_ms for p in p99s)) and (
+        max_dropped is None or summary["websocket"]["dropped"] <= max_dropped
+    )
+
+
+def resolve_baseline(value: str, output_dir: Path) -> Path | None:
+    """Resolve ``--compare``: a file path, or ``latest`` for the newest saved result."""
+    if value != "latest":
+        return Path(value)
+    saved = sorted(output_dir.glob("load-*.json"))
+    return saved[-1] if saved else None
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the load test, save and print a JSON summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="sample this process tree with --url")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--ws-clients", type=int, default=0)
+    parser.add_argument("--users", type=int, default=100, help="concurrent REST users")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("read=1"))
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of REST load")
+    parser.add_argument("--ramp-seconds", type=float, default=5.0)
+    parser.add_argument("--drain-seconds", type=float, default=2.0)
+    parser.add_argument("--think-ms", type=float, default=100.0)
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout")
+    parser.add_argument("--read-path", default="/api/v1/health")
+    parser.add_argument("--post-path", help="required when --mix has post")
+    parser.add_argument("--ws-path", help="required with --ws-clients")
+    parser.add_argument(
+        "--header",
+        type=parse_header,
+        action="append",
+        default=[],
+        help="'Name: value' sent on every request and handshake (repeatable)",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output-dir", type=Path, default=RESULTS_DIR)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", help="earlier result file, or 'latest'")
+    parser.add_argument("--max-p99-ms", type=float, help="fail if any operation's p99 exceeds")
+    parser.add_argument("--max-dropped", type=int, help="fail if more broadcasts were dropped")
+    args = parser.parse_args(argv)
+    if args.mix.get("post") and args.post_path is None:
+        parser.error("--mix with post needs --post-path")
+    if args.ws_clients and args.ws_path is None:
+        parser.error("--ws-clients needs --ws-path")
+
+    baseline_path = resolve_baseline(args.compare, args.output_dir) if args.compare else None
+    raise_open_file_limit(args.ws_clients + args.users + 256)
+    proc = None
+    if args.url is None:
+        port = free_port()
+        proc = start_server(args.workers, port)
+        base_url, server_pid = f"http://127.0.0.1:{port}", proc.pid
+    else:
+        base_url, server_pid = args.url.rstrip("/"), args.server_pid
+    try:
+        summary = asyncio.run(run(args, base_url, server_pid))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    summary["passed"] = passed(summary, max_p99_ms=args.max_p99_ms, max_dropped=args.max_dropped)
+    if baseline_path is not None:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        summary["compared_to"] = {"file": baseline_path.name, "commit": baseline.get("commit")}
+        summary["comparison"] = compare(baseline, summary)
+    if not args.no_save:
+        summary["saved_to"] = str(save(summary, args.output_dir))
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
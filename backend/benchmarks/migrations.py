@@ -0,0 +1,260 @@
+"""Migration benchmark: online index builds and backfills on a large table.
+
+Creates a synthetic ``migration_bench`` table with ``--rows`` rows in the
+database at ``DATABASE_URL`` (once; pass ``--seed``). Then, while a writer
+keeps inserting and updating rows, it runs each migration step through the
+helpers in :mod:`app.migrations` and records the writer's latency:
+
+1. ``create_index_concurrently`` on ``(created_at, id)``.
+2. ``ADD COLUMN`` followed by a batched, throttled ``backfill``.
+3. The lock-timeout guard. An ``ALTER TABLE`` is attempted while another
+   transaction holds a lock on the table for 30 s. It must abort after
+   ``MIGRATION_LOCK_TIMEOUT_MS``. Without the guard it would wait the full
+   30 s, and the writer would be stalled behind it for that long.
+
+Pass ``--blocking`` to also time a plain ``CREATE INDEX`` for comparison.
+Fails if the writer stalls for longer than ``--max-stall-ms`` during the
+index build or the backfill, or if the guard does not abort in time. Run
+from ``backend/`` against a disposable database::
+
+    python -m benchmarks.migrations --seed --rows 10000000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+import sqlalchemy as sa
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import Connection, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from alembic import op
+from app.config import get_settings
+from app.migrations import backfill, create_index_concurrently, is_lock_timeout, set_lock_timeout
+
+TABLE = "migration_bench"
+SEED_CHUNK = 1_000_000
+
+
+async def seed(engine: AsyncEngine, rows: int) -> None:
+    """(Re)create the benchmark table with ``rows`` synthetic rows."""
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        await conn.execute(
+            text(
+                f"CREATE TABLE {TABLE} ("
+                "id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY, "
+                "user_id uuid NOT NULL, category text NOT NULL, "
+                "created_at timestamptz NOT NULL, score int NOT NULL)"
+            )
+        )
+    for start in range(0, rows, SEED_CHUNK):
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    f"INSERT INTO {TABLE} (user_id, category, created_at, score) "
+                    "SELECT gen_random_uuid(), "
+                    "(ARRAY['done','in-progress','blocked','planning'])[1 + g % 4], "
+                    "now() - (g % 7776000) * interval '1 second', g % 1000 "
+                    "FROM generate_series(:lo, :hi) AS g"
+                ),
+                {"lo": start + 1, "hi": min(start + SEED_CHUNK, rows)},
+            )
+        print(f"seeded {min(start + SEED_CHUNK, rows):,}/{rows:,} rows", flush=True)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"VACUUM ANALYZE {TABLE}"))
+
+
+class Writer:
+    """Background writer that records the latency of each small write transaction."""
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        self.latencies: list[float] = []
+        self._stop = asyncio.Event()
+
+    async def run(self) -> None:
+        async with self._engine.connect() as conn:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                await conn.execute(
+                    text(
+                        f"INSERT INTO {TABLE} (user_id, category, created_at, score) "
+                        "VALUES (gen_random_uuid(), 'done', now(), 1)"
+                    )
+                )
+                await conn.execute(
+                    text(f"UPDATE {TABLE} SET score = score + 1 WHERE id = :id"),
+                    {"id": 1 + int(time.time_ns() % 1_000_000)},
+                )
+                await conn.commit()
+                self.latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.005)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def _summary(latencies: list[float]) -> dict[str, float]:
+    ms = sorted(x * 1000 for x in latencies) or [0.0]
+    cuts = statistics.quantiles(ms, n=100) if len(ms) > 1 else [ms[0]] * 99
+    return {
+        "writes": len(latencies),
+        "p50_ms": round(cuts[49], 2),
+        "p99_ms": round(cuts[98], 2),
+        "max_ms": round(ms[-1], 2),
+    }
+
+
+def _migrate(step: Callable[[], object]) -> Callable[[Connection], object]:
+    """Run ``step`` with ``op`` bound to a migration context on ``connection``."""
+
+    def run(connection: Connection) -> object:
+        set_lock_timeout(connection, get_settings().MIGRATION_LOCK_TIMEOUT_MS)
+        connection.commit()
+        with Operations.context(MigrationContext.configure(connection)):
+            result = step()
+        connection.commit()
+        return result
+
+    return run
+
+
+async def measure(
+    engine: AsyncEngine, name: str, step: Callable[[Connection], object]
+) -> dict[str, Any]:
+    """Run one migration step while the writer runs and summarise both."""
+    writer = Writer(engine)
+    writer_task = asyncio.create_task(writer.run())
+    await asyncio.sleep(0.5)
+    started = time.perf_counter()
+    error = None
+    try:
+        async with engine.connect() as conn:
+            await conn.run_sync(step)
+    except Exception as exc:
+        error = exc
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.5)
+    writer.stop()
+    await writer_task
+    result: dict[str, Any] = {"step": name, "seconds": round(elapsed, 2)}
+    result["writer"] = _summary(writer.latencies)
+    if error is not None:
+        result["error"] = "lock_timeout" if is_lock_timeout(error) else repr(error)
+    return result
+
+
+async def hold_lock(engine: AsyncEngine, seconds: float, ready: asyncio.Event) -> None:
+    """Keep a transaction open that holds a conflicting lock on the table."""
+    async with engine.connect() as conn:
+        await conn.execute(text(f"LOCK TABLE {TABLE} IN ACCESS SHARE MODE"))
+        ready.set()
+        await asyncio.sleep(seconds)
+        await conn.rollback()
+
+
+async def run(batch_size: int, pause: float, blocking: bool) -> list[dict[str, Any]]:
+    """Run the migration steps against the seeded table."""
+    engine = create_async_engine(get_settings().DATABASE_URL, pool_size=4)
+    index_name = f"ix_{TABLE}_created_at"
+
+    def build_index() -> None:
+        create_index_concurrently(index_name, TABLE, ["created_at", "id"])
+
+    def add_and_backfill() -> int:
+        op.add_column(TABLE, sa.Column("score_x2", sa.Integer, nullable=True))
+        return backfill(
+            TABLE,
+            "score_x2 = score * 2",
+            where="score_x2 IS NULL",
+            batch_size=batch_size,
+            pause=pause,
+        )
+
+    def guarded_alter() -> None:
+        op.add_column(TABLE, sa.Column("guard_probe", sa.Integer, nullable=True))
+
+    def blocking_index() -> None:
+        op.create_index(f"ix_{TABLE}_category", TABLE, ["category", "created_at"])
+
+    results: list[dict[str, Any]] = []
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in (
+                f"DROP INDEX IF EXISTS {index_name}",
+                f"DROP INDEX IF EXISTS ix_{TABLE}_category",
+                f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS score_x2",
+                f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS guard_probe",
+            ):
+                await conn.execute(text(statement))
+
+        results.append(await measure(engine, "baseline", _migrate(lambda: time.sleep(3))))
+        results.append(await measure(engine, "create_index_concurrently", _migrate(build_index)))
+        results.append(
+            await measure(engine, "add_column_and_backfill", _migrate(add_and_backfill))
+        )
+
+        ready = asyncio.Event()
+        holder = asyncio.create_task(hold_lock(engine, 30.0, ready))
+        await ready.wait()
+        results.append(await measure(engine, "lock_timeout_guard", _migrate(guarded_alter)))
+        holder.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await holder
+
+        if blocking:
+            results.append(
+                await measure(engine, "create_index_blocking", _migrate(blocking_index))
+            )
+    finally:
+        await engine.dispose()
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Optionally seed, then run the migration steps and print a JSON summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="create and fill the table first")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--pause", type=float, default=0.05)
+    parser.add_argument("--max-stall-ms", type=float, default=1000.0)
+    parser.add_argument("--blocking", action="store_true", help="also time a plain CREATE INDEX")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.seed:
+        engine = create_async_engine(get_settings().DATABASE_URL)
+        asyncio.run(seed(engine, args.rows))
+        asyncio.run(engine.dispose())
+    results = asyncio.run(run(args.batch_size, args.pause, args.blocking))
+    online = [
+        r for r in results if r["step"] not in ("lock_timeout_guard", "create_index_blocking")
+    ]
+    guard = next(r for r in results if r["step"] == "lock_timeout_guard")
+    # Writes queue behind the waiting ALTER until it gives up, so the guard
+    # bounds the stall by the lock timeout rather than removing it.
+    guard_budget_ms = get_settings().MIGRATION_LOCK_TIMEOUT_MS + args.max_stall_ms
+    passed = (
+        guard.get("error") == "lock_timeout"
+        and guard["writer"]["max_ms"] <= guard_budget_ms
+        and all(r["writer"]["max_ms"] <= args.max_stall_ms for r in online)
+    )
+    summary = {"benchmark": "migrations", "steps": results, "passed": passed}
+    print(json.dumps(summary, indent=2))
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,84 @@
+"""Presence benchmark: heartbeat and flush cost with many connected users.
+
+Connects ``--users`` synthetic connections to an in-memory
+:class:`~app.services.presence.PresenceTracker`, then measures the cost of
+one heartbeat per connection and of a flush in which a share of them
+expires. No database or server is needed::
+
+    python -m benchmarks.presence --users 10000 --max-heartbeat-us 5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from app.services.presence import PresenceTracker
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def run(users: int, expire_share: float, max_heartbeat_us: float) -> dict[str, object]:
+    """Measure connect, heartbeat and flush for ``users`` connections."""
+    clock = _Clock()
+    tracker = PresenceTracker(
+        heartbeat_interval=30.0, missed_heartbeats=2, flush_interval=2.0, clock=clock
+    )
+    ids = [uuid.uuid4() for _ in range(users)]
+
+    started = time.perf_counter()
+    for i, user_id in enumerate(ids):
+        tracker.registry.connect(i, user_id)
+    connect_s = time.perf_counter() - started
+    started = time.perf_counter()
+    await tracker.flush()
+    first_flush_s = time.perf_counter() - started
+
+    clock.now = 60.0
+    silent = int(users * expire_share)
+    started = time.perf_counter()
+    for i in range(silent, users):
+        tracker.registry.heartbeat(i)
+    heartbeat_s = time.perf_counter() - started
+
+    clock.now = 92.0
+    started = time.perf_counter()
+    diff = await tracker.flush()
+    expiry_flush_s = time.perf_counter() - started
+
+    heartbeat_us = heartbeat_s / max(users - silent, 1) * 1e6
+    return {
+        "benchmark": "presence",
+        "users": users,
+        "connect_us_per_op": round(connect_s / users * 1e6, 2),
+        "heartbeat_us_per_op": round(heartbeat_us, 2),
+        "first_flush_ms": round(first_flush_s * 1000, 2),
+        "expiry_flush_ms": round(expiry_flush_s * 1000, 2),
+        "expired": len(diff.offline) if diff else 0,
+        "max_heartbeat_us": max_heartbeat_us,
+        "passed": heartbeat_us <= max_heartbeat_us,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark and print a JSON summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--expire-share", type=float, default=0.1)
+    parser.add_argument("--max-heartbeat-us", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(run(args.users, args.expire_share, args.max_heartbeat_us))
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
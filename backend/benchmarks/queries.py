@@ -0,0 +1,200 @@
+"""Hot-query benchmark: execution time with and without statement caching.
+
+Seeds ``--users`` users with ``--statuses`` statuses between them, then runs
+every catalog query (see :mod:`app.queries`) ``--reads`` times on one
+connection in four modes:
+
+- ``cached``: SQLAlchemy's compiled cache and asyncpg's prepared-statement
+  cache both on (``DB_STATEMENT_MODE=prepared``, the default).
+- ``no_compiled_cache``: the statement is compiled to SQL on every call.
+- ``no_prepared_cache``: ``DB_STATEMENT_MODE=pgbouncer``, so the server
+  parses and plans every call.
+- ``uncached``: neither cache.
+
+Reports the median time per execution for each query and mode, and how
+many times slower each query is ``uncached`` than ``cached``, then deletes
+its users again. Run from ``backend/`` against a migrated, disposable
+database::
+
+    python -m benchmarks.queries --reads 2000 --min-speedup 1.2
+
+Fails if the median of those per-query ratios is below ``--min-speedup``.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from app import queries
+from app.config import get_settings
+from app.database import statement_connect_args
+
+USER_PREFIX = "bench-queries-"
+
+MODES = {
+    "cached": ("prepared", True),
+    "no_compiled_cache": ("prepared", False),
+    "no_prepared_cache": ("pgbouncer", True),
+    "uncached": ("pgbouncer", False),
+}
+
+SEED_USERS = text(
+    "INSERT INTO users (username, display_name, email, password_hash, xp) "
+    "SELECT :prefix || i, 'Bench User ' || i, :prefix || i || '@example.invalid', '-', i "
+    "FROM generate_series(1, :users) AS i"
+)
+SEED_STATUSES = text(
+    "INSERT INTO status_updates (user_id, team_id, message, category, created_at) "
+    "SELECT u.id, u.team_id, 'benchmark status ' || i, "
+    "(ARRAY['done', 'in-progress', 'blocked', 'planning'])[1 + i % 4], "
+    "now() - make_interval(mins => i) "
+    "FROM generate_series(1, :statuses) AS i "
+    "JOIN users u ON u.username = :prefix || (1 + i % :users)"
+)
+
+
+async def _seed(engine: AsyncEngine, users: int, statuses: int) -> dict[str, Any]:
+    async with engine.begin() as conn:
+        await conn.execute(SEED_USERS, {"prefix": USER_PREFIX, "users": users})
+        await conn.execute(
+            SEED_STATUSES, {"prefix": USER_PREFIX, "users": users, "statuses": statuses}
+        )
+        row = (
+            await conn.execute(
+                text(
+                    "SELECT s.id, u.team_id FROM status_updates s "
+                    "JOIN users u ON u.id = s.user_id "
+                    "WHERE u.username = :name ORDER BY s.created_at DESC LIMIT 1"
+                ),
+                {"name": f"{USER_PREFIX}1"},
+            )
+        ).one()
+    return {"status_id": row.id, "team_id": row.team_id}
+
+
+async def _cleanup(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("DELETE FROM users WHERE username LIKE :prefix || '%'"), {"prefix": USER_PREFIX}
+        )
+
+
+def _workload(seeded: dict[str, Any]) -> dict[str, tuple[Select[Any], dict[str, Any]]]:
+    """Each catalog query with the parameters of a typical request."""
+    projected = get_settings().FEED_PROJECTION
+    today = datetime.now(UTC).date()
+    team = ("team_id",)
+    return {
+        "feed": (queries.feed_statement((), projected), {"limit": 20, "offset": 0}),
+        "team_feed": (
+            queries.feed_statement(team, projected),
+            {"team_id": seeded["team_id"], "limit": 20, "offset": 0},
+        ),
+        "team_feed_count": (
+            queries.feed_count_statement(team, projected),
+            {"team_id": seeded["team_id"]},
+        ),
+        "status_by_id": (
+            queries.PROJECTED_STATUS_BY_ID if projected else queries.STATUS_BY_ID,
+            {"status_id": seeded["status_id"]},
+        ),
+        "user_by_username": (queries.USER_BY_USERNAME, {"username": f"{USER_PREFIX}1"}),
+        "team_leaderboard": (
+            queries.TEAM_LEADERBOARD,
+            {"team_id": seeded["team_id"], "limit": 10},
+        ),
+        "team_category_counts": (
+            queries.TEAM_CATEGORY_DAILY_COUNTS,
+            {"team_id": seeded["team_id"], "since": today - timedelta(days=6), "until": today},
+        ),
+    }
+
+
+async def _time_query(
+    conn: AsyncConnection, stmt: Select[Any], params: dict[str, Any], reads: int
+) -> float:
+    """Median microseconds per execution, after one untimed call."""
+    await conn.execute(stmt, params)
+    timings = []
+    for _ in range(reads):
+        started = time.perf_counter()
+        (await conn.execute(stmt, params)).all()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1e6
+
+
+async def _run_mode(
+    statement_mode: str, compiled_cache: bool, workload: dict[str, Any], reads: int
+) -> dict[str, float]:
+    settings = get_settings().model_copy(update={"DB_STATEMENT_MODE": statement_mode})
+    engine = create_async_engine(
+        settings.DATABASE_URL, pool_size=1, connect_args=statement_connect_args(settings)
+    )
+    if not compiled_cache:
+        engine = engine.execution_options(compiled_cache=None)
+    try:
+        async with engine.connect() as conn:
+            return {
+                name: round(await _time_query(conn, stmt, params, reads), 1)
+                for name, (stmt, params) in workload.items()
+            }
+    finally:
+        await engine.dispose()
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Seed, time every mode and summarize per-query medians."""
+    engine = create_async_engine(get_settings().DATABASE_URL)
+    try:
+        await _cleanup(engine)
+        seeded = await _seed(engine, args.users, args.statuses)
+        workload = _workload(seeded)
+        results = {
+            mode: await _run_mode(statement_mode, compiled_cache, workload, args.reads)
+            for mode, (statement_mode, compiled_cache) in MODES.items()
+        }
+        await _cleanup(engine)
+    finally:
+        await engine.dispose()
+
+    means = {mode: statistics.fmean(timings.values()) for mode, timings in results.items()}
+    speedups = {
+        name: round(results["uncached"][name] / results["cached"][name], 2) for name in workload
+    }
+    return {
+        "benchmark": "queries",
+        "users": args.users,
+        "statuses": args.statuses,
+        "reads": args.reads,
+        "feed_projection": get_settings().FEED_PROJECTION,
+        "median_us": results,
+        "mean_us": {mode: round(mean, 1) for mode, mean in means.items()},
+        "speedup": speedups,
+        "median_speedup": statistics.median(speedups.values()),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark and print a JSON summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--statuses", type=int, default=20_000)
+    parser.add_argument("--reads", type=int, default=2_000)
+    parser.add_argument("--min-speedup", type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    result["passed"] = result["median_speedup"] >= args.min_speedup
+    print(json.dumps(result, indent=2))
+    return 0 if result["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,286 @@
+"""Rolling-restart benchmark: reconnect load with and without drain waves.
+
+Starts ``python -m app.serve`` with ``--workers`` processes, serving the
+application plus a benchmark WebSocket at ``/bench/ws``. That socket
+registers with the connection drainer just as the statuses socket would.
+The benchmark connects ``--clients`` WebSockets, sends the supervisor
+``SIGHUP`` for a rolling restart, and records when every client is admitted
+again. An admitted reconnect is what loads a client's missed statuses from
+the database, so reconnects per ``--bucket-ms`` approximate the database
+load the restart causes. Clients follow the close reason's ``retry_ms``,
+like the real client.
+
+It runs twice:
+
+- ``all_at_once`` sets ``DRAIN_SECONDS=0`` and ``DRAIN_WAVES=1``. This is
+  the burst uvicorn causes without draining.
+- ``waves`` uses ``--grace`` and ``--drain-seconds``.
+
+Fails if the peak reconnect rate with waves exceeds ``--max-peak-ratio``
+times the all-at-once peak. Needs no database. Run from ``backend/``::
+
+    python -m benchmarks.rolling_restart --workers 2 --clients 2000 --max-peak-ratio 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed, WebSocketException
+
+from app.main import create_app
+from app.services.drain import SERVICE_RESTART, get_connection_drainer
+from benchmarks.cold_start import free_port
+from benchmarks.load import process_tree, raise_open_file_limit
+
+SPARK = " ▁▂▃▄▅▆▇█"
+
+
+def app() -> FastAPI:
+    """The application plus ``/bench/ws``, which announces an id and waits to be closed."""
+    application = create_app()
+
+    @application.websocket("/bench/ws")
+    async def bench_socket(websocket: WebSocket) -> None:
+        await websocket.accept()
+        connection_id = uuid.uuid4()
+        last = str(connection_id)
+        drainer = get_connection_drainer()
+        admitted = await drainer.admit(
+            connection_id, close=websocket.close, last_received=lambda: last
+        )
+        if not admitted:
+            return
+        try:
+            await websocket.send_json({"type": "hello", "id": last})
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        except WebSocketDisconnect:
+            pass
+        finally:
+            drainer.unregister(connection_id)
+
+    return application
+
+
+@dataclass
+class Tally:
+    """Client-side observations of one scenario."""
+
+    admitted: list[float] = field(default_factory=list)
+    refused: int = 0
+    failed: int = 0
+    unexpected: int = 0
+    connected: int = 0
+
+
+async def client(url: str, tally: Tally, stop: asyncio.Event) -> None:
+    """Stay connected, reconnecting with ``last_received`` whenever the server closes."""
+    last: str | None = None
+    while not stop.is_set():
+        target = url if last is None else f"{url}?last_received={last}"
+        try:
+            ws = await connect(target, open_timeout=30, ping_interval=None)
+        except (OSError, TimeoutError, WebSocketException):
+            tally.failed += 1
+            await asyncio.sleep(0.1)
+            continue
+        retry_ms = 0
+        try:
+            hello = json.loads(await ws.recv())
+            if last is not None:
+                tally.admitted.append(time.perf_counter())
+            last = hello["id"]
+            tally.connected += 1
+            try:
+                await ws.wait_closed()
+            finally:
+                tally.connected -= 1
+        except ConnectionClosed:
+            tally.refused += 1
+        if stop.is_set():
+            await ws.close()
+            return
+        if ws.close_code == SERVICE_RESTART and ws.close_reason:
+            retry_ms = json.loads(ws.close_reason).get("retry_ms", 0)
+        else:
+            tally.unexpected += 1
+        await asyncio.sleep(retry_ms / 1000)
+
+
+async def _wait_ready(base_url: str, timeout_s: float = 60.0) -> None:
+    deadline = time.perf_counter() + timeout_s
+    async with httpx.AsyncClient(base_url=base_url, timeout=1.0) as http:
+        while time.perf_counter() < deadline:
+            try:
+                if (await http.get("/api/v1/health/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    msg = f"{base_url} did not become ready within {timeout_s}s"
+    raise TimeoutError(msg)
+
+
+def _workers(supervisor: int) -> set[int]:
+    """Pids of the supervisor's worker processes (not helpers such as a resource tracker)."""
+    workers = set()
+    for pid in process_tree(supervisor):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as fh:
+                if b"spawn_main" in fh.read():
+                    workers.add(pid)
+        except OSError:
+            continue
+    return workers
+
+
+def _timeline(stamps: list[float], start: float, bucket_s: float) -> list[int]:
+    counts: list[int] = []
+    for stamp in stamps:
+        slot = int((stamp - start) / bucket_s)
+        counts.extend([0] * (slot + 1 - len(counts)))
+        counts[slot] += 1
+    return counts
+
+
+def _sparkline(counts: list[int]) -> str:
+    top = max(counts, default=0) or 1
+    return "".join(SPARK[round(c / top * (len(SPARK) - 1))] for c in counts)
+
+
+async def scenario(
+    name: str, drain_env: dict[str, str], args: argparse.Namespace
+) -> dict[str, Any]:
+    """Run one rolling restart with the given drain settings and summarize the reconnects."""
+    port = free_port()
+    env = {
+        **os.environ,
+        "PYTHONDONTWRITEBYTECODE": "1",
+        "DB_POOL_WARMUP": "0",
+        "FEED_CACHE_SIZE": "0",
+        "FEED_CACHE_TEAM_SIZE": "0",
+        "RATE_LIMIT_WS_CONNECT": "off",
+        **drain_env,
+    }
+    env.setdefault("JWT_SECRET", "bench-only")
+    server = subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "app.serve",
+            "--app",
+            "benchmarks.rolling_restart:app",
+            "--factory",
+            "--port",
+            str(port),
+            "--workers",
+            str(args.workers),
+            "--log-level",
+            "WARNING",
+        ],
+        env=env,
+    )
+    tally, stop = Tally(), asyncio.Event()
+    clients: list[asyncio.Task[None]] = []
+    try:
+        await _wait_ready(f"http://127.0.0.1:{port}")
+        url = f"ws://127.0.0.1:{port}/bench/ws"
+        clients.extend(asyncio.create_task(client(url, tally, stop)) for _ in range(args.clients))
+        while tally.connected < args.clients:
+            await asyncio.sleep(0.1)
+        old_workers = _workers(server.pid)
+
+        started = time.perf_counter()
+        server.send_signal(signal.SIGHUP)
+        while True:
+            await asyncio.sleep(0.2)
+            workers = _workers(server.pid)
+            replaced = not workers & old_workers and len(workers) >= args.workers
+            if replaced and tally.connected == args.clients:
+                break
+            if time.perf_counter() - started > args.timeout:
+                msg = f"{name}: restart did not finish within {args.timeout}s"
+                raise TimeoutError(msg)
+        elapsed = time.perf_counter() - started
+    finally:
+        stop.set()
+        for task in clients:
+            task.cancel()
+        await asyncio.gather(*clients, return_exceptions=True)
+        server.terminate()
+        server.wait(timeout=60)
+
+    counts = _timeline(tally.admitted, started, args.bucket_ms / 1000)
+    return {
+        "scenario": name,
+        "restart_seconds": round(elapsed, 1),
+        "reconnects": len(tally.admitted),
+        "peak_per_bucket": max(counts, default=0),
+        "refused": tally.refused,
+        "failed_connects": tally.failed,
+        "unexpected_closes": tally.unexpected,
+        "timeline": _sparkline(counts),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run both scenarios and compare their peak reconnect rates."""
+    burst = await scenario(
+        "all_at_once",
+        {"DRAIN_GRACE_SECONDS": "0", "DRAIN_SECONDS": "0", "DRAIN_WAVES": "1"},
+        args,
+    )
+    waves = await scenario(
+        "waves",
+        {
+            "DRAIN_GRACE_SECONDS": str(args.grace),
+            "DRAIN_SECONDS": str(args.drain_seconds),
+            "DRAIN_WAVES": str(args.waves),
+        },
+        args,
+    )
+    ratio = waves["peak_per_bucket"] / max(burst["peak_per_bucket"], 1)
+    return {
+        "benchmark": "rolling_restart",
+        "workers": args.workers,
+        "clients": args.clients,
+        "bucket_ms": args.bucket_ms,
+        "runs": [burst, waves],
+        "peak_ratio": round(ratio, 3),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark and print a JSON summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--grace", type=float, default=1.0)
+    parser.add_argument("--drain-seconds", type=float, default=5.0)
+    parser.add_argument("--waves", type=int, default=10)
+    parser.add_argument("--bucket-ms", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--max-peak-ratio", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    raise_open_file_limit(args.clients + 256)
+    result = asyncio.run(run(args))
+    result["passed"] = result["peak_ratio"] <= args.max_peak_ratio
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0 if result["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,293 @@
+"""Multi-team benchmark: per-team feed and broadcast latency as teams are added.
+
+For each team count in ``--teams`` (default 10, 100 and 1000), loads a
+:class:`~app.services.feed_cache.TeamFeedCaches` cache for every team and
+subscribes ``--members`` connections per team to
+:class:`~app.services.channels.TeamChannels`. It then times, for randomly
+chosen teams, a first feed page from that team's cache and a broadcast to
+that team's members. Fails if the median latency at the largest team
+count exceeds ``--max-ratio`` times the median at the smallest, i.e. if
+per-team cost grows with the number of tenants. No database or server is
+needed::
+
+    python -m benchmarks.teams --teams 10 100 1000 --max-ratio 2
+
+With ``--database``, the same team counts are also seeded into PostgreSQL
+(``--members`` users and ``--statuses`` statuses per team, spread over 30
+days) and the team-scoped catalog queries are timed for random teams: the
+first feed page, ``TEAM_LEADERBOARD`` and a week of
+``TEAM_CATEGORY_DAILY_COUNTS``. Each query is also run under ``EXPLAIN``,
+and the run fails if any of them scans a table sequentially at the largest
+team count or if its median grows by more than ``--max-ratio``. The seeded
+teams are deleted afterwards. Run from ``backend/`` against a migrated,
+disposable database::
+
+    python -m benchmarks.teams --database --teams 10 100 1000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from app import queries
+from app.config import get_settings
+from app.queries import FeedFilters
+from app.services.channels import TeamChannels
+from app.services.feed_cache import TeamFeedCaches
+from benchmarks.feed_cache import synthetic_rows
+
+TEAM_PREFIX = "bench-teams-"
+
+SEED_TEAMS = text(
+    "INSERT INTO teams (id, slug, name) "
+    "SELECT gen_random_uuid(), :prefix || i, 'Bench team ' || i "
+    "FROM generate_series(CAST(:first AS integer), CAST(:last AS integer)) AS i"
+)
+SEED_USERS = text(
+    "INSERT INTO users (username, display_name, email, password_hash, xp, team_id) "
+    "SELECT t.slug || '-' || m, 'Bench User ' || m, t.slug || '-' || m || '@example.invalid', "
+    "'-', (m * 37) % 1000, t.id "
+    "FROM generate_series(CAST(:first AS integer), CAST(:last AS integer)) AS i "
+    "JOIN teams t ON t.slug = :prefix || i "
+    "CROSS JOIN generate_series(1, :members) AS m"
+)
+SEED_STATUSES = text(
+    "INSERT INTO status_updates (user_id, team_id, message, category, created_at) "
+    "SELECT u.id, u.team_id, 'benchmark status ' || s, "
+    "(ARRAY['done', 'in-progress', 'blocked', 'planning'])[1 + s % 4], "
+    "now() - make_interval(mins => (s * 4001 + u.xp * 7) % 43200) "
+    "FROM generate_series(CAST(:first AS integer), CAST(:last AS integer)) AS i "
+    "JOIN teams t ON t.slug = :prefix || i "
+    "JOIN users u ON u.team_id = t.id "
+    "CROSS JOIN generate_series(1, :per_user) AS s"
+)
+BENCH_TEAMS = "SELECT id FROM teams WHERE starts_with(slug, :prefix)"
+
+
+def _percentiles(samples_ns: list[int]) -> dict[str, float]:
+    ordered = sorted(samples_ns)
+    return {
+        "p50_us": round(statistics.median(ordered) / 1000, 2),
+        "p99_us": round(ordered[int(len(ordered) * 0.99) - 1] / 1000, 2),
+    }
+
+
+async def _noop(message: dict[str, Any]) -> None:
+    return None
+
+
+async def run_one(teams: int, statuses: int, members: int, reads: int) -> dict[str, Any]:
+    """Load ``teams`` teams and time per-team pages and broadcasts."""
+    caches = TeamFeedCaches(size=0, team_size=statuses, max_teams=teams)
+    channels = TeamChannels(send_timeout=1.0)
+    team_ids = [uuid.UUID(int=i + 1) for i in range(teams)]
+    started = time.perf_counter()
+    for i, team_id in enumerate(team_ids):
+        caches.install(team_id, synthetic_rows(statuses, members, seed=i))
+        for m in range(members):
+            user_id = uuid.UUID(int=(i + 1) << 32 | m)
+            channels.subscribe((i, m), user_id=user_id, team_id=team_id, send=_noop)
+    setup_s = time.perf_counter() - started
+
+    rng = random.Random(7)
+    page_ns: list[int] = []
+    publish_ns: list[int] = []
+    message = {"type": "status", "id": str(uuid.uuid4())}
+    for _ in range(reads):
+        team_id = rng.choice(team_ids)
+        filters = FeedFilters(team_id=team_id)
+        started_ns = time.perf_counter_ns()
+        cache = caches.get(team_id)
+        assert cache is not None
+        page = cache.page(filters, limit=20)
+        page_ns.append(time.perf_counter_ns() - started_ns)
+        assert page is not None and len(page) == 20
+        started_ns = time.perf_counter_ns()
+        await channels.publish(team_id, message)
+        publish_ns.append(time.perf_counter_ns() - started_ns)
+
+    stats = caches.stats()
+    return {
+        "teams": teams,
+        "setup_seconds": round(setup_s, 2),
+        "cached_statuses": stats["entries"],
+        "cache_kb_per_team": round(stats["bytes"] / teams / 1024, 1),
+        "page": _percentiles(page_ns),
+        "broadcast": _percentiles(publish_ns),
+    }
+
+
+async def run(team_counts: list[int], statuses: int, members: int, reads: int) -> dict[str, Any]:
+    """Run :func:`run_one` for each team count and compare the medians."""
+    results = [await run_one(n, statuses, members, reads) for n in sorted(team_counts)]
+    first, last = results[0], results[-1]
+    return {
+        "benchmark": "teams",
+        "statuses_per_team": statuses,
+        "members_per_team": members,
+        "runs": results,
+        "page_p50_ratio": round(last["page"]["p50_us"] / first["page"]["p50_us"], 2),
+        "broadcast_p50_ratio": round(
+            last["broadcast"]["p50_us"] / first["broadcast"]["p50_us"], 2
+        ),
+    }
+
+
+async def _cleanup(engine: AsyncEngine) -> None:
+    # Deleting the teams cascades to their users, statuses and feed entries.
+    # The count triggers then write decrements, so counts go last.
+    async with engine.begin() as conn:
+        rows = await conn.execute(text(BENCH_TEAMS), {"prefix": TEAM_PREFIX})
+        team_ids = list(rows.scalars())
+        await conn.execute(text("DELETE FROM teams WHERE id = ANY(:ids)"), {"ids": team_ids})
+        await conn.execute(
+            text("DELETE FROM category_daily_counts WHERE team_id = ANY(:ids)"), {"ids": team_ids}
+        )
+
+
+async def _seed(engine: AsyncEngine, first: int, last: int, members: int, statuses: int) -> None:
+    """Add teams ``first`` to ``last`` with their users and statuses, then analyze."""
+    params = {"prefix": TEAM_PREFIX, "first": first, "last": last}
+    async with engine.begin() as conn:
+        await conn.execute(SEED_TEAMS, params)
+        await conn.execute(SEED_USERS, {**params, "members": members})
+        await conn.execute(SEED_STATUSES, {**params, "per_user": max(1, statuses // members)})
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE users, status_updates, feed_entries"))
+        await conn.execute(text("ANALYZE category_daily_counts"))
+
+
+def _team_queries() -> dict[str, tuple[Select[Any], dict[str, Any]]]:
+    """Team-scoped catalog queries with every parameter but ``team_id``."""
+    today = datetime.now(UTC).date()
+    return {
+        "team_feed": (
+            queries.feed_statement(("team_id",), get_settings().FEED_PROJECTION),
+            {"limit": 20, "offset": 0},
+        ),
+        "team_leaderboard": (queries.TEAM_LEADERBOARD, {"limit": 10}),
+        "team_category_counts": (
+            queries.TEAM_CATEGORY_DAILY_COUNTS,
+            {"since": today - timedelta(days=6), "until": today},
+        ),
+    }
+
+
+def _plan_nodes(plan: dict[str, Any]) -> list[dict[str, Any]]:
+    nodes = [plan]
+    for child in plan.get("Plans", ()):
+        nodes.extend(_plan_nodes(child))
+    return nodes
+
+
+async def explain(
+    conn: AsyncConnection, stmt: Select[Any], params: dict[str, Any]
+) -> dict[str, Any]:
+    """Return the indexes used and the tables scanned sequentially by ``stmt``."""
+    compiled = stmt.compile(dialect=conn.dialect)
+    raw = await conn.get_raw_connection()
+    driver: Any = raw.driver_connection
+    args = [params[name] for name in compiled.positiontup or ()]
+    # The engine registers a json codec, so the plan arrives decoded.
+    plan = await driver.fetchval(f"EXPLAIN (FORMAT JSON) {compiled}", *args)
+    nodes = _plan_nodes(plan[0]["Plan"])
+    return {
+        "indexes": sorted({n["Index Name"] for n in nodes if "Index Name" in n}),
+        "seq_scans": sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"}),
+    }
+
+
+async def run_database_one(
+    engine: AsyncEngine, team_ids: list[uuid.UUID], reads: int
+) -> dict[str, Any]:
+    """Time each team-scoped query for random teams and explain it for one."""
+    rng = random.Random(7)
+    results: dict[str, Any] = {"teams": len(team_ids)}
+    async with engine.connect() as conn:
+        for name, (stmt, params) in _team_queries().items():
+            await conn.execute(stmt, {**params, "team_id": team_ids[0]})
+            samples_ns: list[int] = []
+            for _ in range(reads):
+                bound = {**params, "team_id": rng.choice(team_ids)}
+                started_ns = time.perf_counter_ns()
+                (await conn.execute(stmt, bound)).all()
+                samples_ns.append(time.perf_counter_ns() - started_ns)
+            plan = await explain(conn, stmt, {**params, "team_id": rng.choice(team_ids)})
+            results[name] = {**_percentiles(samples_ns), **plan}
+    return results
+
+
+async def run_database(
+    team_counts: list[int], statuses: int, members: int, reads: int
+) -> dict[str, Any]:
+    """Seed each team count in turn, time the team queries and compare the medians."""
+    engine = create_async_engine(get_settings().DATABASE_URL, pool_size=1)
+    results = []
+    try:
+        await _cleanup(engine)
+        seeded = 0
+        for count in sorted(team_counts):
+            await _seed(engine, seeded + 1, count, members, statuses)
+            seeded = count
+            async with engine.connect() as conn:
+                rows = await conn.execute(text(BENCH_TEAMS), {"prefix": TEAM_PREFIX})
+                team_ids = list(rows.scalars())
+            results.append(await run_database_one(engine, team_ids, reads))
+        await _cleanup(engine)
+    finally:
+        await engine.dispose()
+    first, last = results[0], results[-1]
+    names = list(_team_queries())
+    return {
+        "runs": results,
+        "p50_ratio": {n: round(last[n]["p50_us"] / first[n]["p50_us"], 2) for n in names},
+        "seq_scans": {n: last[n]["seq_scans"] for n in names if last[n]["seq_scans"]},
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark and print a JSON summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--statuses", type=int, default=200, help="cached statuses per team")
+    parser.add_argument("--members", type=int, default=20, help="connections per team")
+    parser.add_argument("--reads", type=int, default=5_000)
+    parser.add_argument("--database", action="store_true", help="also time the team queries")
+    parser.add_argument("--db-reads", type=int, default=500, help="timed calls per query")
+    parser.add_argument(
+        "--max-ratio",
+        type=float,
+        default=2.0,
+        help="allowed growth of median latency from the fewest to the most teams",
+    )
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args.teams, args.statuses, args.members, args.reads))
+    result["passed"] = max(result["page_p50_ratio"], result["broadcast_p50_ratio"]) <= (
+        args.max_ratio
+    )
+    if args.database:
+        database = asyncio.run(
+            run_database(args.teams, args.statuses, args.members, args.db_reads)
+        )
+        result["database"] = database
+        result["passed"] = (
+            result["passed"]
+            and not database["seq_scans"]
+            and max(database["p50_ratio"].values()) <= args.max_ratio
+        )
+    print(json.dumps(result, indent=2))
+    return 0 if result["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
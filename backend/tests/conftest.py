@@ -1,7 +1,7 @@
 """Shared test fixtures for the Team Statusboard backend."""
 
 import os
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable, Iterator
 
 import httpx
 import pytest
@@ -9,9 +9,73 @@ from httpx import ASGITransport
 
 TEST_JWT_SECRET = "test-secret"
 
-# JWT_SECRET must be set at module level (not in a fixture)
-# because app.config.Settings() is instantiated during import-time collection.
-os.environ.setdefault("JWT_SECRET", TEST_JWT_SECRET)
+
+@pytest.fixture(autouse=True)
+def _default_jwt_secret(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Provide JWT_SECRET for code paths that build the cached Settings lazily."""
+    if "JWT_SECRET" not in os.environ:
+        monkeypatch.setenv("JWT_SECRET", TEST_JWT_SECRET)
+
+
+# Module attributes behind the lazy get_*() accessors of per-worker services.
+LAZY_SINGLETONS = (
+    "app.rate_limit._limiter",
+    "app.services.counters._aggregator",
+    "app.services.presence._tracker",
+    "app.services.tasks._runner",
+    "app.services.feed_cache._caches",
+    "app.services.channels._channels",
+    "app.services.drain._drainer",
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_singletons(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Give every test new service singletons, built lazily from its own settings."""
+    for target in LAZY_SINGLETONS:
+        monkeypatch.setattr(target, None)
+
+
+@pytest.fixture(autouse=True)
+def _clean_metrics() -> None:
+    """Start every test with empty metrics."""
+    from app.metrics import metrics
+
+    metrics.reset()
+
+
+class FakeClock:
+    """Manually advanced stand-in for ``time.monotonic``; starts at 0."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """A fresh :class:`FakeClock` for code that takes a ``clock`` callable."""
+    return FakeClock()
+
+
+@pytest.fixture
+def settings_env(monkeypatch: pytest.MonkeyPatch) -> Iterator[Callable[..., None]]:
+    """Set environment variables and make the cached Settings pick them up.
+
+    Call it as ``settings_env(FEED_CACHE_SIZE="0")``. The Settings cache is
+    cleared again afterwards, so later tests do not see these values.
+    """
+    from app.config import get_settings
+
+    def apply(**values: str) -> None:
+        for name, value in values.items():
+            monkeypatch.setenv(name, value)
+        get_settings.cache_clear()
+
+    yield apply
+    get_settings.cache_clear()
 
 
 @pytest.fixture
@@ -0,0 +1,142 @@
+"""Unit tests for per-team broadcast channels."""
+
+import asyncio
+import uuid
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from app.metrics import metrics
+from app.services.channels import TeamChannels, get_team_channels
+
+TEAM_A = uuid.UUID(int=1)
+TEAM_B = uuid.UUID(int=2)
+
+
+class _Inbox:
+    def __init__(self) -> None:
+        self.messages: list[dict[str, Any]] = []
+
+    async def __call__(self, message: dict[str, Any]) -> None:
+        self.messages.append(message)
+
+
+def _user(n: int) -> uuid.UUID:
+    return uuid.UUID(int=1000 + n)
+
+
+class TestTeamChannels:
+    """Publishing reaches only the members of the addressed team."""
+
+    async def test_publish_stays_within_team(self) -> None:
+        channels = TeamChannels(send_timeout=1.0)
+        a1, a2, b1 = _Inbox(), _Inbox(), _Inbox()
+        channels.subscribe("a1", user_id=_user(1), team_id=TEAM_A, send=a1)
+        channels.subscribe("a2", user_id=_user(2), team_id=TEAM_A, send=a2)
+        channels.subscribe("b1", user_id=_user(3), team_id=TEAM_B, send=b1)
+
+        delivered = await channels.publish(TEAM_A, {"type": "status"})
+
+        assert delivered == 2
+        assert a1.messages == a2.messages == [{"type": "status"}]
+        assert b1.messages == []
+        assert await channels.publish(uuid.UUID(int=3), {"type": "status"}) == 0
+
+    async def test_unsubscribe_removes_empty_channels(self) -> None:
+        channels = TeamChannels(send_timeout=1.0)
+        channels.subscribe("a1", user_id=_user(1), team_id=TEAM_A, send=_Inbox())
+
+        assert channels.unsubscribe("a1")
+        assert not channels.unsubscribe("a1")
+        assert channels.team_count == 0
+
+    async def test_stalled_member_is_dropped(self) -> None:
+        channels = TeamChannels(send_timeout=0.01)
+        healthy = _Inbox()
+
+        async def stalled(message: dict[str, Any]) -> None:
+            await asyncio.sleep(60)
+
+        channels.subscribe("ok", user_id=_user(1), team_id=TEAM_A, send=healthy)
+        channels.subscribe("slow", user_id=_user(2), team_id=TEAM_A, send=stalled)
+
+        assert await channels.publish(TEAM_A, {"n": 1}) == 1
+        assert channels.members(TEAM_A) == 1
+        assert metrics.counter_value("channel_send_failures_total") == 1
+
+
+class TestPublishPresence:
+    """Presence diffs are split so each team only sees its own members."""
+
+    async def test_diff_split_by_team_with_lookup_for_remote_users(self) -> None:
+        looked_up: list[set[uuid.UUID]] = []
+
+        async def resolve(user_ids: Sequence[uuid.UUID]) -> Mapping[uuid.UUID, uuid.UUID]:
+            looked_up.append(set(user_ids))
+            return {_user(9): TEAM_B}
+
+        channels = TeamChannels(send_timeout=1.0, resolve_teams=resolve)
+        a, b = _Inbox(), _Inbox()
+        channels.subscribe("a", user_id=_user(1), team_id=TEAM_A, send=a)
+        channels.subscribe("b", user_id=_user(2), team_id=TEAM_B, send=b)
+        message = {
+            "type": "presence",
+            "version": 3,
+            "online": [str(_user(1)), str(_user(9))],
+            "offline": [str(_user(2)), str(_user(8))],
+        }
+
+        await channels.publish_presence(message)
+
+        assert looked_up == [{_user(9), _user(8)}]
+        assert a.messages == [
+            {"type": "presence", "version": 3, "online": [str(_user(1))], "offline": []}
+        ]
+        assert b.messages == [
+            {
+                "type": "presence",
+                "version": 3,
+                "online": [str(_user(9))],
+                "offline": [str(_user(2))],
+            }
+        ]
+
+    async def test_user_moved_to_another_team_is_routed_there_after_going_offline(
+        self,
+    ) -> None:
+        teams = {_user(9): TEAM_A}
+
+        async def resolve(user_ids: Sequence[uuid.UUID]) -> Mapping[uuid.UUID, uuid.UUID]:
+            return {u: teams[u] for u in user_ids if u in teams}
+
+        channels = TeamChannels(send_timeout=1.0, resolve_teams=resolve)
+        a, b = _Inbox(), _Inbox()
+        channels.subscribe("a", user_id=_user(1), team_id=TEAM_A, send=a)
+        channels.subscribe("b", user_id=_user(2), team_id=TEAM_B, send=b)
+        moved = str(_user(9))
+
+        await channels.publish_presence({"type": "presence", "online": [moved]})
+        teams[_user(9)] = TEAM_B
+        await channels.publish_presence({"type": "presence", "offline": [moved]})
+        await channels.publish_presence({"type": "presence", "online": [moved]})
+
+        assert [(m["online"], m["offline"]) for m in a.messages] == [([moved], []), ([], [moved])]
+        assert [(m["online"], m["offline"]) for m in b.messages] == [([moved], [])]
+
+    async def test_unknown_users_are_not_broadcast(self) -> None:
+        channels = TeamChannels(send_timeout=1.0)
+        inbox = _Inbox()
+        channels.subscribe("a", user_id=_user(1), team_id=TEAM_A, send=inbox)
+
+        await channels.publish_presence({"type": "presence", "online": [str(_user(5))]})
+
+        assert inbox.messages == []
+
+
+class TestGetTeamChannels:
+    """get_team_channels() builds one hub per worker from settings."""
+
+    def test_singleton(self) -> None:
+        channels = get_team_channels()
+
+        assert channels is get_team_channels()
+        assert channels.resolve_teams is not None
@@ -133,3 +133,42 @@ class TestDefaultValuesMatchSpec:
         assert s.CORS_ORIGINS == "http://localhost:3000"
         assert s.WS_INITIAL_HOURS == 1
         assert s.LOG_LEVEL == "INFO"
+
+
+class TestGetSettingsIsLazyAndCached:
+    """get_settings() builds Settings on first call and caches the instance."""
+
+    def test_get_settings_returns_cached_instance(self) -> None:
+        from app.config import get_settings
+
+        assert get_settings() is get_settings()
+
+    def test_legacy_settings_attribute_resolves_to_cached_instance(self) -> None:
+        import app.config
+        from app.config import get_settings
+
+        assert app.config.settings is get_settings()
+
+    def test_unknown_module_attribute_raises(self) -> None:
+        import app.config
+
+        with pytest.raises(AttributeError):
+            _ = app.config.does_not_exist  # type: ignore[attr-defined]
+
+
+@pytest.mark.usefixtures("jwt_env")
+class TestPoolSettings:
+    """Database pool settings have sane defaults and validation."""
+
+    def test_pool_defaults(self) -> None:
+        s = _make_settings()
+
+        assert s.DB_POOL_SIZE == 5
+        assert s.DB_MAX_OVERFLOW == 10
+        assert s.DB_POOL_WARMUP == 2
+
+    def test_negative_pool_warmup_rejected(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("DB_POOL_WARMUP", "-1")
+
+        with pytest.raises(ValidationError):
+            _make_settings()
@@ -0,0 +1,268 @@
+"""Unit tests for XP/streak write coalescing."""
+
+import asyncio
+import uuid
+from collections.abc import Sequence
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.metrics import metrics
+from app.services.counters import (
+    CounterAggregator,
+    Counters,
+    PendingCounters,
+    advance_streak,
+    build_flush_statement,
+)
+
+DAY = date(2026, 3, 10)
+
+
+class RecordingWriter:
+    """Fake batch writer that records batches and can fail or stall on demand."""
+
+    def __init__(self, fail_on_call: int | None = None, delay: float = 0.0) -> None:
+        self.batches: list[list[PendingCounters]] = []
+        self.fail_on_call = fail_on_call
+        self.delay = delay
+        self.started = asyncio.Event()
+
+    async def __call__(self, batch: Sequence[PendingCounters]) -> None:
+        self.started.set()
+        if self.fail_on_call is not None and len(self.batches) == self.fail_on_call:
+            self.fail_on_call = None
+            raise ConnectionError("database unavailable")
+        await asyncio.sleep(self.delay)
+        self.batches.append(list(batch))
+
+
+def _aggregator(writer: RecordingWriter, **kwargs: int) -> CounterAggregator:
+    options = {
+        "interval": 60.0,
+        "batch_size": 500,
+        "max_pending": 1000,
+        "pending_limit": 100_000,
+        **kwargs,
+    }
+    return CounterAggregator(writer=writer, **options)  # type: ignore[arg-type]
+
+
+class TestAdvanceStreak:
+    """advance_streak() follows consecutive UTC calendar days."""
+
+    def test_first_post_starts_streak(self) -> None:
+        result = advance_streak(Counters(), DAY)
+
+        assert (result.current_streak, result.longest_streak, result.last_post_date) == (1, 1, DAY)
+
+    def test_next_day_extends_streak(self) -> None:
+        stored = Counters(current_streak=3, longest_streak=5, last_post_date=date(2026, 3, 9))
+
+        result = advance_streak(stored, DAY)
+
+        assert result.current_streak == 4
+        assert result.longest_streak == 5
+
+    def test_same_day_keeps_streak(self) -> None:
+        stored = Counters(current_streak=3, longest_streak=3, last_post_date=DAY)
+
+        assert advance_streak(stored, DAY) == stored
+
+    def test_gap_restarts_streak(self) -> None:
+        stored = Counters(current_streak=6, longest_streak=6, last_post_date=date(2026, 3, 1))
+
+        result = advance_streak(stored, DAY)
+
+        assert result.current_streak == 1
+        assert result.longest_streak == 6
+
+
+class TestPendingCounters:
+    """Pending entries merge deltas and keep the newest streak."""
+
+    def test_merge_sums_xp_and_keeps_newer_streak(self) -> None:
+        uid = uuid.uuid4()
+        entry = PendingCounters(uid, 10, 2, 2, date(2026, 3, 9))
+
+        entry.merge(PendingCounters(uid, 15, 3, 3, DAY))
+        entry.merge(PendingCounters(uid, 5))
+
+        assert entry == PendingCounters(uid, 30, 3, 3, DAY)
+
+    def test_apply_ignores_older_streak(self) -> None:
+        stored = Counters(xp=100, current_streak=4, longest_streak=4, last_post_date=DAY)
+        entry = PendingCounters(uuid.uuid4(), 10, 1, 1, date(2026, 3, 1))
+
+        assert entry.apply(stored) == Counters(110, 4, 4, DAY)
+
+
+class TestCounterAggregatorReads:
+    """view() merges pending changes so authors see their XP immediately."""
+
+    def test_record_post_returns_merged_counters(self) -> None:
+        agg = _aggregator(RecordingWriter())
+        uid = uuid.uuid4()
+        stored = Counters(
+            xp=40, current_streak=1, longest_streak=1, last_post_date=date(2026, 3, 9)
+        )
+
+        first = agg.record_post(uid, stored, DAY, xp=15)
+        second = agg.record_post(uid, stored, DAY, xp=10)
+
+        assert first == Counters(55, 2, 2, DAY)
+        assert second == Counters(65, 2, 2, DAY)
+        assert agg.view(uid, stored) == second
+        assert agg.pending_users == 1
+
+    def test_view_without_pending_returns_stored(self) -> None:
+        stored = Counters(xp=7)
+
+        assert _aggregator(RecordingWriter()).view(uuid.uuid4(), stored) is stored
+
+
+class TestCounterAggregatorFlush:
+    """flush() writes coalesced batches and keeps changes on failure."""
+
+    async def test_flush_writes_one_row_per_user_in_batches(self) -> None:
+        writer = RecordingWriter()
+        agg = _aggregator(writer, batch_size=2)
+        users = [uuid.uuid4() for _ in range(3)]
+        for uid in users:
+            agg.add(uid, xp=5)
+            agg.add(uid, xp=5)
+
+        assert await agg.flush() == 3
+
+        assert [len(b) for b in writer.batches] == [2, 1]
+        assert {p.xp_delta for b in writer.batches for p in b} == {10}
+        assert agg.pending_users == 0
+
+    async def test_flush_with_nothing_pending_is_noop(self) -> None:
+        writer = RecordingWriter()
+
+        assert await _aggregator(writer).flush() == 0
+        assert writer.batches == []
+
+    async def test_failed_flush_restores_and_merges_newer_changes(self) -> None:
+        writer = RecordingWriter(fail_on_call=0)
+        agg = _aggregator(writer)
+        uid = uuid.uuid4()
+        agg.add(uid, xp=10)
+
+        with pytest.raises(ConnectionError):
+            await agg.flush()
+        agg.add(uid, xp=5)
+
+        assert agg.view(uid, Counters()).xp == 15
+        assert await agg.flush() == 1
+        assert writer.batches[0][0].xp_delta == 15
+
+    async def test_max_pending_triggers_background_flush(self) -> None:
+        writer = RecordingWriter()
+        agg = _aggregator(writer, max_pending=2)
+        agg.start()
+        try:
+            agg.add(uuid.uuid4(), xp=1)
+            agg.add(uuid.uuid4(), xp=1)
+            for _ in range(50):
+                if writer.batches:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await agg.stop()
+
+        assert sum(len(b) for b in writer.batches) == 2
+
+    async def test_stop_flushes_remaining_changes(self) -> None:
+        writer = RecordingWriter()
+        agg = _aggregator(writer)
+        agg.start()
+        agg.add(uuid.uuid4(), xp=3)
+
+        await agg.stop()
+
+        assert len(writer.batches) == 1
+        assert agg.pending_users == 0
+
+    async def test_stop_during_flush_lets_the_write_finish(self) -> None:
+        writer = RecordingWriter(delay=0.2)
+        agg = _aggregator(writer, max_pending=1)
+        uid = uuid.uuid4()
+        agg.start()
+        agg.add(uid, xp=10)
+        await writer.started.wait()
+
+        await agg.stop()
+
+        assert [[p.xp_delta for p in b] for b in writer.batches] == [[10]]
+        assert agg.view(uid, Counters()).xp == 0
+
+    async def test_cancelled_flush_restores_changes(self) -> None:
+        writer = RecordingWriter(delay=60.0)
+        agg = _aggregator(writer)
+        uid = uuid.uuid4()
+        agg.add(uid, xp=10)
+        flush = asyncio.create_task(agg.flush())
+        await writer.started.wait()
+
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+
+        assert agg.pending_users == 1
+        assert agg.view(uid, Counters()).xp == 10
+
+    async def test_changes_for_new_users_are_dropped_past_the_limit(self) -> None:
+        writer = RecordingWriter(fail_on_call=0)
+        agg = _aggregator(writer, pending_limit=2)
+        first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        agg.add(first, xp=1)
+        agg.add(second, xp=1)
+        with pytest.raises(ConnectionError):
+            await agg.flush()
+
+        agg.add(third, xp=1)
+        agg.add(first, xp=1)
+
+        assert agg.pending_users == 2
+        assert agg.view(third, Counters()).xp == 0
+        assert agg.view(first, Counters()).xp == 2
+        assert metrics.counter_value("counter_dropped_total") == 1
+
+    async def test_in_flight_changes_count_towards_the_limit(self) -> None:
+        writer = RecordingWriter(delay=0.2)
+        agg = _aggregator(writer, pending_limit=1)
+        agg.add(uuid.uuid4(), xp=1)
+        flush = asyncio.create_task(agg.flush())
+        await writer.started.wait()
+
+        agg.add(uuid.uuid4(), xp=1)
+        await flush
+
+        assert agg.pending_users == 0
+        assert metrics.counter_value("counter_dropped_total") == 1
+
+
+class TestBuildFlushStatement:
+    """The flush statement is a single UPDATE ... FROM (VALUES ...)."""
+
+    def test_statement_shape(self) -> None:
+        batch = [PendingCounters(uuid.uuid4(), 10), PendingCounters(uuid.uuid4(), 5, 1, 1, DAY)]
+
+        sql = str(build_flush_statement(batch).compile(dialect=postgresql.asyncpg.dialect()))
+
+        assert sql.startswith("UPDATE users SET xp=(users.xp + v.xp_delta)")
+        assert "FROM (VALUES" in sql
+        assert "WHERE users.id = v.id" in sql
+        assert "greatest(users.longest_streak" in sql
+
+    def test_rows_are_ordered_by_user_id(self) -> None:
+        ids = sorted(uuid.uuid4() for _ in range(5))
+        batch = [PendingCounters(uid, 1) for uid in reversed(ids)]
+
+        compiled = build_flush_statement(batch).compile(dialect=postgresql.asyncpg.dialect())
+        bound_ids = [v for v in compiled.params.values() if isinstance(v, uuid.UUID)]
+
+        assert bound_ids == ids
@@ -2,10 +2,17 @@
 
 import inspect
 
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
-from app.database import Base, get_db, get_engine, get_session_factory
+from app.database import (
+    Base,
+    dispose_engine,
+    get_db,
+    get_engine,
+    get_session_factory,
+    warm_up_pool,
+)
 
 
 class TestBaseIsDeclarativeBase:
@@ -35,3 +42,34 @@ class TestGetSessionFactoryIsSessionmaker:
 
     def test_get_session_factory_is_sessionmaker(self) -> None:
         assert isinstance(get_session_factory(), async_sessionmaker)
+
+
+class TestWarmUpPool:
+    """warm_up_pool() pre-opens connections and never raises."""
+
+    async def test_warm_up_disabled_returns_zero(self) -> None:
+        assert await warm_up_pool(0) == 0
+
+    async def test_warm_up_swallows_connection_errors(self) -> None:
+        import app.database
+
+        await dispose_engine()
+        app.database._engine = create_async_engine(
+            "postgresql+asyncpg://u:p@127.0.0.1:1/unreachable", pool_pre_ping=True
+        )
+        try:
+            assert await warm_up_pool(2) == 0
+        finally:
+            await dispose_engine()
+
+
+class TestDisposeEngine:
+    """dispose_engine() drops the cached engine and session factory."""
+
+    async def test_dispose_engine_resets_singletons(self) -> None:
+        first = get_engine()
+        get_session_factory()
+
+        await dispose_engine()
+
+        assert get_engine() is not first
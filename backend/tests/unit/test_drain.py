@@ -0,0 +1,246 @@
+"""Unit tests for connection draining."""
+
+import asyncio
+import json
+import signal
+from collections.abc import Callable, Iterator
+from types import FrameType
+
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.metrics import metrics
+from app.services.drain import (
+    MAX_REASON_BYTES,
+    SERVICE_RESTART,
+    ConnectionDrainer,
+    get_connection_drainer,
+    reconnect_reason,
+)
+
+
+@pytest.fixture
+def _restore_sigterm() -> Iterator[None]:
+    original = signal.getsignal(signal.SIGTERM)
+    yield
+    signal.signal(signal.SIGTERM, original)
+
+
+class _Waves:
+    """Fake sleep that numbers the waves instead of waiting."""
+
+    def __init__(self) -> None:
+        self.sleeps: list[float] = []
+
+    async def __call__(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+
+
+class _Socket:
+    def __init__(self, waves: _Waves, last: str | None = None) -> None:
+        self.waves = waves
+        self.last = last
+        self.closed: tuple[int, dict[str, object], int] | None = None
+
+    def last_received(self) -> str | None:
+        return self.last
+
+    async def close(self, code: int, reason: str) -> None:
+        self.closed = (code, json.loads(reason), len(self.waves.sleeps))
+
+
+def _drainer(
+    waves: _Waves, *, grace: float = 2.0, window: float = 1.0, n: int = 4
+) -> ConnectionDrainer:
+    return ConnectionDrainer(grace=grace, window=window, waves=n, sleep=waves)
+
+
+class TestReconnectReason:
+    """The close reason carries the retry delay and, if it fits, last_received."""
+
+    def test_includes_last_received(self) -> None:
+        assert json.loads(reconnect_reason("abc", 250)) == {
+            "reconnect": True,
+            "retry_ms": 250,
+            "last_received": "abc",
+        }
+
+    def test_drops_last_received_that_does_not_fit(self) -> None:
+        reason = reconnect_reason("x" * 200, 250)
+
+        assert len(reason.encode()) <= MAX_REASON_BYTES
+        assert json.loads(reason) == {"reconnect": True, "retry_ms": 250}
+
+
+class TestConnectionDrainer:
+    """drain() turns unready, waits out the grace period and closes sockets in waves."""
+
+    async def test_closes_in_equal_waves_after_grace(self) -> None:
+        waves = _Waves()
+        drainer = _drainer(waves)
+        sockets = [_Socket(waves, last=f"s{i}") for i in range(8)]
+        for i, sock in enumerate(sockets):
+            drainer.register(i, close=sock.close, last_received=sock.last_received)
+
+        closed = await drainer.drain()
+
+        assert closed == 8
+        assert drainer.state == "draining"
+        assert drainer.connections == 0
+        assert waves.sleeps == [2.0, 0.25, 0.25, 0.25]
+        assert [s.closed[2] for s in sockets if s.closed] == [1, 1, 2, 2, 3, 3, 4, 4]
+        for i, sock in enumerate(sockets):
+            assert sock.closed is not None
+            code, reason, _ = sock.closed
+            assert code == SERVICE_RESTART
+            assert reason["last_received"] == f"s{i}"
+            assert 0 <= int(reason["retry_ms"]) < 250  # type: ignore[call-overload]
+        assert metrics.counter_value("drain_closed_total") == 8
+
+    async def test_waves_stop_once_no_socket_is_left(self) -> None:
+        waves = _Waves()
+        drainer = _drainer(waves)
+        sockets = [_Socket(waves) for _ in range(2)]
+        for i, sock in enumerate(sockets):
+            drainer.register(i, close=sock.close, last_received=sock.last_received)
+
+        assert await drainer.drain() == 2
+        assert waves.sleeps == [2.0, 0.25]
+
+    async def test_idle_worker_only_waits_out_the_grace_period(self) -> None:
+        waves = _Waves()
+
+        assert await _drainer(waves).drain() == 0
+        assert waves.sleeps == [2.0]
+
+    async def test_socket_admitted_during_grace_closes_in_first_wave(self) -> None:
+        waves = _Waves()
+        late = _Socket(waves)
+
+        async def sleep(seconds: float) -> None:
+            if not waves.sleeps:
+                assert await drainer.admit("late", close=late.close, last_received=lambda: None)
+            await waves(seconds)
+
+        drainer = ConnectionDrainer(grace=2.0, window=1.0, waves=2, sleep=sleep)
+        await drainer.drain()
+
+        assert late.closed is not None and late.closed[2] == 1
+
+    async def test_admit_refuses_once_waves_have_started(self) -> None:
+        waves = _Waves()
+        drainer = _drainer(waves, n=1)
+        await drainer.drain()
+        sock = _Socket(waves, last="s1")
+
+        admitted = await drainer.admit("new", close=sock.close, last_received=sock.last_received)
+
+        assert not admitted
+        assert drainer.connections == 0
+        assert sock.closed is not None and sock.closed[0] == SERVICE_RESTART
+        assert sock.closed[1]["last_received"] == "s1"
+        assert metrics.counter_value("drain_refused_total") == 1
+
+    async def test_failed_close_does_not_stop_the_drain(self) -> None:
+        waves = _Waves()
+        drainer = _drainer(waves, n=1)
+        healthy = _Socket(waves)
+
+        async def broken(code: int, reason: str) -> None:
+            raise ConnectionResetError
+
+        drainer.register("broken", close=broken, last_received=lambda: None)
+        drainer.register("ok", close=healthy.close, last_received=lambda: None)
+
+        assert await drainer.drain() == 2
+        assert healthy.closed is not None
+
+    def test_ready_only_between_startup_and_drain(self) -> None:
+        drainer = _drainer(_Waves())
+
+        assert not drainer.ready
+        drainer.mark_ready()
+        assert drainer.ready
+        drainer.state = "draining"
+        drainer.mark_ready()
+        assert not drainer.ready
+
+
+@pytest.mark.usefixtures("_restore_sigterm")
+class TestSignalHandler:
+    """SIGTERM drains first and is then handed to the previous handler."""
+
+    async def test_drains_then_hands_over(self) -> None:
+        handed_over: list[str] = []
+
+        def previous(sig: int, frame: FrameType | None) -> None:
+            handed_over.append(drainer.state)
+
+        signal.signal(signal.SIGTERM, previous)
+        waves = _Waves()
+        drainer = _drainer(waves, grace=0.0, window=0.0, n=1)
+        sock = _Socket(waves)
+        drainer.register("a", close=sock.close, last_received=lambda: None)
+        drainer.mark_ready()
+        drainer.install_signal_handler()
+
+        signal.raise_signal(signal.SIGTERM)
+        assert not drainer.ready
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        assert sock.closed is not None
+        assert handed_over == ["draining"]
+        assert signal.getsignal(signal.SIGTERM) is previous
+
+    async def test_hands_over_when_the_drain_fails(self) -> None:
+        handed_over: list[int] = []
+        signal.signal(signal.SIGTERM, lambda sig, frame: handed_over.append(sig))
+
+        async def broken_sleep(seconds: float) -> None:
+            raise RuntimeError("clock broke")
+
+        drainer = ConnectionDrainer(grace=1.0, window=0.0, waves=1, sleep=broken_sleep)
+        drainer.install_signal_handler()
+
+        signal.raise_signal(signal.SIGTERM)
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        assert handed_over == [signal.SIGTERM]
+
+    async def test_second_signal_hands_over_at_once(self) -> None:
+        handed_over: list[int] = []
+        signal.signal(signal.SIGTERM, lambda sig, frame: handed_over.append(sig))
+        drainer = ConnectionDrainer(grace=60.0, window=0.0, waves=1)
+        drainer.install_signal_handler()
+
+        signal.raise_signal(signal.SIGTERM)
+        signal.raise_signal(signal.SIGTERM)
+
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+        assert handed_over == [signal.SIGTERM]
+
+
+class TestGetConnectionDrainer:
+    """get_connection_drainer() builds one drainer per worker from settings."""
+
+    def test_singleton_from_settings(self, settings_env: Callable[..., None]) -> None:
+        settings_env(DRAIN_WAVES="4")
+        drainer = get_connection_drainer()
+
+        assert drainer is get_connection_drainer()
+        assert drainer.waves == 4
+        assert drainer.state == "starting"
+
+    @pytest.mark.parametrize(("name", "value"), [("DRAIN_WAVES", "0"), ("DRAIN_SECONDS", "-1")])
+    def test_invalid_settings_rejected(
+        self, monkeypatch: pytest.MonkeyPatch, name: str, value: str
+    ) -> None:
+        monkeypatch.setenv(name, value)
+
+        with pytest.raises(ValidationError):
+            Settings(_env_file=None)  # type: ignore[call-arg]
@@ -0,0 +1,215 @@
+"""Unit tests for the streaming status export."""
+
+import csv
+import io
+import json
+import tracemalloc
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from datetime import UTC, datetime
+from typing import Any
+
+import httpx
+import pytest
+
+from app.metrics import metrics
+from app.queries import FeedFilters
+from app.services import export
+from app.services.export import (
+    EXPORT_FIELDS,
+    NDJSON_ERROR_LINE,
+    ExportFormat,
+    encode_ndjson,
+    encode_partitions,
+    export_statuses,
+)
+
+USER_ID = uuid.UUID(int=1)
+TEAM = uuid.UUID(int=100)
+
+
+def _row(i: int) -> dict[str, Any]:
+    return {
+        "id": uuid.UUID(int=i),
+        "created_at": datetime(2026, 1, 1, tzinfo=UTC),
+        "category": "done",
+        "message": f"shipped item {i}, with a comma",
+        "user_id": USER_ID,
+        "username": "alice",
+        "display_name": "Alice",
+        "avatar_url": None,
+    }
+
+
+async def _partitions(total: int, size: int) -> AsyncIterator[Sequence[Any]]:
+    for start in range(0, total, size):
+        yield [_row(i) for i in range(start, min(start + size, total))]
+
+
+async def _collect(chunks: AsyncIterator[bytes]) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+class TestEncoding:
+    """Rows are encoded as NDJSON objects or CSV lines with one header."""
+
+    def test_ndjson_one_object_per_line(self) -> None:
+        lines = encode_ndjson([_row(1), _row(2)]).decode().splitlines()
+
+        assert len(lines) == 2
+        first = json.loads(lines[0])
+        assert first["id"] == str(uuid.UUID(int=1))
+        assert first["created_at"] == "2026-01-01T00:00:00+00:00"
+        assert first["avatar_url"] is None
+
+    async def test_csv_has_single_header_across_chunks(self) -> None:
+        body = await _collect(encode_partitions(_partitions(5, 2), "csv"))
+
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        assert rows[0] == list(EXPORT_FIELDS)
+        assert len(rows) == 6
+        assert rows[1][3] == "shipped item 0, with a comma"
+
+    async def test_empty_csv_export_is_header_only(self) -> None:
+        body = await _collect(encode_partitions(_partitions(0, 2), "csv"))
+
+        assert body.decode() == ",".join(EXPORT_FIELDS) + "\n"
+
+    async def test_one_chunk_per_partition(self) -> None:
+        chunks = [c async for c in encode_partitions(_partitions(10, 4), "ndjson")]
+
+        assert [c.count(b"\n") for c in chunks] == [4, 4, 2]
+
+
+class TestConstantMemory:
+    """Peak memory of the encode pipeline does not grow with export size."""
+
+    @staticmethod
+    async def _peak_bytes(total: int) -> int:
+        tracemalloc.start()
+        try:
+            async for _ in encode_partitions(_partitions(total, 250), "ndjson"):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    async def test_peak_memory_independent_of_row_count(self) -> None:
+        small = await self._peak_bytes(1_000)
+        large = await self._peak_bytes(10_000)
+
+        assert large < 1024 * 1024
+        assert large < small * 1.5
+
+
+async def _failing_partitions(good: int, size: int) -> AsyncIterator[Sequence[Any]]:
+    async for partition in _partitions(good, size):
+        yield partition
+    raise ConnectionError("connection lost")
+
+
+class TestFailures:
+    """Errors before the first partition raise; later ones cut the body short."""
+
+    async def test_error_before_first_partition_is_raised(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        async def open_partitions(*args: Any) -> AsyncIterator[Sequence[Any]]:
+            return _failing_partitions(0, 2)
+
+        monkeypatch.setattr(export, "open_partitions", open_partitions)
+
+        with pytest.raises(ConnectionError):
+            await export_statuses(None, FeedFilters(), "ndjson", 2)  # type: ignore[arg-type]
+
+    @pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+    async def test_error_after_first_partition_aborts_body(
+        self, monkeypatch: pytest.MonkeyPatch, fmt: ExportFormat
+    ) -> None:
+        async def open_partitions(*args: Any) -> AsyncIterator[Sequence[Any]]:
+            return _failing_partitions(4, 2)
+
+        monkeypatch.setattr(export, "open_partitions", open_partitions)
+        body = await export_statuses(None, FeedFilters(), fmt, 2)  # type: ignore[arg-type]
+        chunks: list[bytes] = []
+
+        with pytest.raises(ConnectionError):
+            async for chunk in body:
+                chunks.append(chunk)
+
+        lines = b"".join(chunks).splitlines(keepends=True)
+        # Four rows, plus the CSV header or the NDJSON error line.
+        assert len(lines) == 5
+        assert (lines[-1] == NDJSON_ERROR_LINE) == (fmt == "ndjson")
+        assert metrics.counter_value("export_failures_total", format=fmt) == 1
+
+
+class TestExportEndpoint:
+    """GET /api/v1/statuses/export streams with download headers."""
+
+    async def test_requires_team_id(self, async_client: httpx.AsyncClient) -> None:
+        response = await async_client.get("/api/v1/statuses/export")
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["query", "team_id"]
+
+    async def test_rejects_unknown_category(self, async_client: httpx.AsyncClient) -> None:
+        response = await async_client.get(
+            "/api/v1/statuses/export", params={"team_id": str(TEAM), "category": "nope"}
+        )
+
+        assert response.status_code == 422
+
+    async def test_rejects_unknown_format(self, async_client: httpx.AsyncClient) -> None:
+        response = await async_client.get(
+            "/api/v1/statuses/export", params={"team_id": str(TEAM), "format": "xml"}
+        )
+
+        assert response.status_code == 422
+
+    async def test_streams_csv_with_filters(
+        self, async_client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        seen: dict[str, Any] = {}
+
+        async def body() -> AsyncIterator[bytes]:
+            yield b"id\n"
+            yield b"1\n"
+
+        async def fake_export(
+            engine: Any, filters: Any, fmt: str, chunk_rows: int
+        ) -> AsyncIterator[bytes]:
+            seen.update(filters=filters, fmt=fmt)
+            return body()
+
+        monkeypatch.setattr("app.api.routes.export.export_statuses", fake_export)
+
+        response = await async_client.get(
+            "/api/v1/statuses/export",
+            params={
+                "team_id": str(TEAM),
+                "format": "csv",
+                "category": "blocked",
+                "since": "2026-01-01T00:00:00Z",
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+        assert response.text == "id\n1\n"
+        assert seen["fmt"] == "csv"
+        assert seen["filters"].active == ("team_id", "category", "since")
+        assert seen["filters"].team_id == TEAM
+
+    async def test_database_unavailable_at_start_is_503(
+        self, async_client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        async def fake_export(*args: Any) -> AsyncIterator[bytes]:
+            raise ConnectionRefusedError("database down")
+
+        monkeypatch.setattr("app.api.routes.export.export_statuses", fake_export)
+
+        response = await async_client.get("/api/v1/statuses/export", params={"team_id": str(TEAM)})
+
+        assert response.status_code == 503
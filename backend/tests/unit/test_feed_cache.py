@@ -0,0 +1,337 @@
+"""Unit tests for the array-backed recent-feed cache."""
+
+import random
+import uuid
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import pytest
+
+from app.metrics import metrics
+from app.models.status import VALID_CATEGORIES
+from app.queries import FeedFilters
+from app.services.feed_cache import (
+    FeedCacheListener,
+    RecentFeedCache,
+    TeamFeedCaches,
+    fetch_recent_feed,
+    get_feed_caches,
+)
+
+BASE = datetime(2026, 10, 1, tzinfo=UTC)
+TEAM = uuid.UUID(int=100)
+AUTHORS = [(uuid.UUID(int=i + 1), f"user{i}", f"User {i}", None) for i in range(5)]
+
+
+def _rows(count: int, seed: int = 1) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        user_id, username, display_name, avatar_url = rng.choice(AUTHORS)
+        rows.append(
+            {
+                "id": uuid.UUID(int=rng.getrandbits(128)),
+                "message": f"status {i} " + "é" * rng.randint(0, 5),
+                "category": rng.choice(VALID_CATEGORIES),
+                # Pairs of equal timestamps exercise the id tie-break.
+                "created_at": BASE + timedelta(seconds=i // 2),
+                "user_id": user_id,
+                "username": username,
+                "display_name": display_name,
+                "avatar_url": avatar_url,
+            }
+        )
+    return rows
+
+
+def _expected(rows: list[dict[str, Any]], filters: FeedFilters) -> list[dict[str, Any]]:
+    def keep(row: dict[str, Any]) -> bool:
+        return all(
+            (
+                filters.user_id is None or row["user_id"] == filters.user_id,
+                filters.username is None or row["username"] == filters.username,
+                filters.category is None or row["category"] == filters.category,
+                filters.since is None or row["created_at"] > filters.since,
+                filters.until is None or row["created_at"] <= filters.until,
+            )
+        )
+
+    matching = [r for r in rows if keep(r)]
+    return sorted(matching, key=lambda r: (r["created_at"], r["id"]), reverse=True)
+
+
+class TestRecentFeedCache:
+    """Pages from the cache match what the feed query would return."""
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            FeedFilters(),
+            FeedFilters(category="blocked"),
+            FeedFilters(username="user2"),
+            FeedFilters(user_id=AUTHORS[3][0], category="done"),
+            FeedFilters(since=BASE + timedelta(seconds=40)),
+            FeedFilters(since=BASE + timedelta(seconds=10), until=BASE + timedelta(seconds=30)),
+        ],
+    )
+    def test_page_matches_reference(self, filters: FeedFilters) -> None:
+        rows = _rows(200)
+        cache = RecentFeedCache(1000)
+        cache.load(rows)
+
+        page = cache.page(filters, limit=15, offset=5)
+
+        assert page == _expected(rows, filters)[5:20]
+
+    def test_unloaded_cache_answers_nothing(self) -> None:
+        cache = RecentFeedCache(10)
+        cache.add(_rows(1)[0])
+
+        assert cache.page(FeedFilters(), limit=1) is None
+
+    def test_adding_twice_is_a_no_op(self) -> None:
+        row = _rows(1)[0]
+        cache = RecentFeedCache(10)
+        cache.load([row])
+
+        assert not cache.add(row)
+        assert len(cache) == 1
+
+    def test_full_cache_falls_back_past_its_floor(self) -> None:
+        rows = _rows(100)
+        cache = RecentFeedCache(32)
+        cache.load(_expected(rows, FeedFilters())[:32])
+        for row in _rows(40, seed=2):
+            cache.add({**row, "created_at": row["created_at"] + timedelta(days=1)})
+
+        assert cache.page(FeedFilters(), limit=20) is not None
+        assert cache.page(FeedFilters(), limit=20, offset=30) is None
+        assert cache.page(FeedFilters(since=BASE), limit=100) is None
+        assert cache.recent(BASE + timedelta(days=1, seconds=5)) is not None
+        assert len(cache) <= 32 + 32 // 16
+
+    def test_remove_and_author_update(self) -> None:
+        rows = _rows(50)
+        cache = RecentFeedCache(100)
+        cache.load(rows)
+        user_id = AUTHORS[0][0]
+
+        assert cache.remove(rows[0]["id"])
+        assert not cache.remove(rows[0]["id"])
+        cache.update_author(user_id, username="renamed", display_name="New", avatar_url="a.png")
+
+        page = cache.page(FeedFilters(username="renamed"), limit=100)
+        assert page is not None
+        assert page == [
+            {**r, "username": "renamed", "display_name": "New", "avatar_url": "a.png"}
+            for r in _expected(rows[1:], FeedFilters(user_id=user_id))
+        ]
+        assert cache.page(FeedFilters(username="user0"), limit=5) == []
+
+    def test_compaction_keeps_messages(self) -> None:
+        rows = _rows(400)
+        cache = RecentFeedCache(1000)
+        cache.load(rows)
+        for row in rows[:300]:
+            cache.remove(row["id"])
+
+        assert cache.stats()["text_bytes"] == sum(len(r["message"].encode()) for r in rows[300:])
+        assert cache.page(FeedFilters(), limit=100) == _expected(rows[300:], FeedFilters())
+
+    def test_memory_per_status_is_small(self) -> None:
+        rows = [{**r, "message": "x" * 100} for r in _rows(10_000)]
+        cache = RecentFeedCache(10_000)
+        cache.load(rows)
+
+        stats = cache.stats()
+
+        assert stats["entries"] == 10_000
+        assert stats["bytes_per_entry"] < 200
+        assert metrics.snapshot()["gauges"]
+
+
+class TestTeamFeedCaches:
+    """Team caches are loaded on request and the least recently read is evicted."""
+
+    def _caches(self, max_teams: int = 2) -> TeamFeedCaches:
+        return TeamFeedCaches(size=100, team_size=10, max_teams=max_teams)
+
+    def test_requests_are_taken_in_order_and_once(self) -> None:
+        caches = self._caches(max_teams=3)
+        teams = [uuid.UUID(int=i) for i in range(3)]
+        for team_id in (*teams, teams[0]):
+            caches.request(team_id)
+
+        assert caches.take_requests(2) == teams[:2]
+        assert caches.take_requests(2) == teams[2:]
+
+    def test_least_recently_read_team_is_evicted(self) -> None:
+        caches = self._caches()
+        a, b, c = (uuid.UUID(int=i) for i in range(3))
+        caches.install(a, _rows(5))
+        caches.install(b, _rows(5))
+        assert caches.get(a) is not None
+
+        caches.install(c, _rows(5))
+
+        assert caches.get(b) is None
+        assert caches.get(a) is not None
+        assert len(caches) == 2
+        assert metrics.counter_value("feed_cache_team_evictions_total") == 1
+
+    def test_team_cache_keeps_its_own_capacity(self) -> None:
+        caches = self._caches()
+        cache = caches.install(TEAM, _rows(50))
+
+        assert cache is not None and len(cache) == 10
+        assert caches.targets(TEAM) == [caches.everyone, cache]
+        assert caches.targets(uuid.UUID(int=1)) == [caches.everyone]
+
+    def test_requests_are_bounded_by_max_teams(self) -> None:
+        caches = self._caches()
+        for i in range(1000):
+            caches.request(uuid.UUID(int=i))
+
+        assert caches.take_requests(1000) == [uuid.UUID(int=0), uuid.UUID(int=1)]
+
+    def test_team_without_statuses_gets_no_cache(self) -> None:
+        caches = self._caches(max_teams=1)
+        caches.install(TEAM, _rows(5))
+
+        assert caches.install(uuid.UUID(int=1), []) is None
+        assert caches.get(uuid.UUID(int=1)) is None
+        assert caches.get(TEAM) is not None
+
+    def test_requests_ignored_when_team_caches_disabled(self) -> None:
+        caches = TeamFeedCaches(size=100, team_size=0, max_teams=10)
+        caches.request(TEAM)
+
+        assert caches.take_requests(10) == []
+
+
+class TestFeedCacheListener:
+    """Notifications are collected and applied in batches."""
+
+    async def test_deletes_apply_without_a_query(self) -> None:
+        rows = _rows(10)
+        caches = TeamFeedCaches(size=100, team_size=100, max_teams=10)
+        assert caches.everyone is not None
+        caches.everyone.load(rows)
+        team_cache = caches.install(TEAM, rows[:5])
+        assert team_cache is not None
+        listener = FeedCacheListener(caches, engine=None, interval=1.0)  # type: ignore[arg-type]
+
+        listener._on_notify(None, 1, "feed_changes", f"delete:{TEAM}:{rows[0]['id']}")
+        listener._on_notify(None, 1, "feed_changes", f"delete:{uuid.UUID(int=1)}:{rows[9]['id']}")
+        listener._on_notify(None, 1, "feed_changes", f"insert:{TEAM}:not-a-uuid")
+        listener._on_notify(None, 1, "feed_changes", f"delete:{rows[1]['id']}")
+        await listener.sync()
+
+        assert len(caches.everyone) == 8
+        assert len(team_cache) == 4
+
+    async def test_listens_on_the_listen_engine(self) -> None:
+        listening: list[str] = []
+
+        class _Driver:
+            async def add_listener(self, channel: str, callback: object) -> None:
+                listening.append(channel)
+
+        class _Connection:
+            async def get_raw_connection(self) -> Any:
+                return type("Raw", (), {"driver_connection": _Driver()})()
+
+        class _ListenEngine:
+            async def connect(self) -> _Connection:
+                return _Connection()
+
+        caches = TeamFeedCaches(size=10, team_size=0, max_teams=0)
+        listener = FeedCacheListener(
+            caches,
+            engine=None,  # type: ignore[arg-type]
+            interval=1.0,
+            listen_engine=_ListenEngine(),  # type: ignore[arg-type]
+        )
+
+        await listener._listen()
+
+        assert listening == ["feed_changes"]
+
+
+class TestFetchRecentFeed:
+    """fetch_recent_feed() serves from the cache when it can."""
+
+    @pytest.fixture
+    def _small_cache(self, settings_env: Callable[..., None]) -> None:
+        settings_env(FEED_CACHE_SIZE="100")
+
+    @pytest.mark.usefixtures("_small_cache")
+    async def test_hit_needs_no_session(self) -> None:
+        rows = _rows(10)
+        caches = get_feed_caches()
+        assert caches is not None and caches.everyone is not None
+        caches.everyone.load(rows)
+
+        page = await fetch_recent_feed(None, FeedFilters(), limit=3, offset=0)  # type: ignore[arg-type]
+
+        assert page == _expected(rows, FeedFilters())[:3]
+        assert metrics.counter_value("feed_cache_requests_total", result="hit") == 1
+
+    @pytest.mark.usefixtures("_small_cache")
+    async def test_team_page_reads_only_that_teams_cache(self) -> None:
+        rows = _rows(10)
+        caches = get_feed_caches()
+        assert caches is not None
+        caches.install(TEAM, rows)
+
+        page = await fetch_recent_feed(
+            None,  # type: ignore[arg-type]
+            FeedFilters(team_id=TEAM, category="done"),
+            limit=5,
+            offset=0,
+        )
+
+        assert page == _expected(rows, FeedFilters(category="done"))[:5]
+
+    @pytest.mark.usefixtures("_small_cache")
+    async def test_uncached_team_is_read_from_database_and_requested(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        seen: list[FeedFilters] = []
+
+        async def fake_fetch(session: Any, filters: FeedFilters, **kw: Any) -> list[Any]:
+            seen.append(filters)
+            return []
+
+        monkeypatch.setattr("app.services.feed_cache.fetch_feed", fake_fetch)
+        filters = FeedFilters(team_id=TEAM)
+
+        await fetch_recent_feed(None, filters, limit=5, offset=0)  # type: ignore[arg-type]
+
+        caches = get_feed_caches()
+        assert caches is not None
+        assert seen == [filters]
+        assert caches.take_requests(10) == [TEAM]
+
+    def test_disabled_with_zero_sizes(self, settings_env: Callable[..., None]) -> None:
+        settings_env(FEED_CACHE_SIZE="0", FEED_CACHE_TEAM_SIZE="0")
+
+        assert get_feed_caches() is None
+
+    def test_disabled_behind_pgbouncer_without_listen_url(
+        self, settings_env: Callable[..., None]
+    ) -> None:
+        settings_env(DB_STATEMENT_MODE="pgbouncer")
+
+        assert get_feed_caches() is None
+
+    def test_enabled_behind_pgbouncer_with_listen_url(
+        self, settings_env: Callable[..., None]
+    ) -> None:
+        settings_env(
+            DB_STATEMENT_MODE="pgbouncer",
+            FEED_CACHE_LISTEN_URL="postgresql+asyncpg://app@db:5432/statusboard",
+        )
+
+        assert get_feed_caches() is not None
@@ -39,3 +39,28 @@ class TestCorsHeadersPresentForAllowedOrigin:
 
         assert response.status_code == 200
         assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+
+
+class TestLivenessAndReadiness:
+    """Liveness always answers; readiness follows the connection drainer."""
+
+    async def test_liveness_returns_200(self, async_client: httpx.AsyncClient) -> None:
+        response = await async_client.get("/api/v1/health/live")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+
+    async def test_readiness_follows_drainer_state(self, async_client: httpx.AsyncClient) -> None:
+        from app.services.drain import get_connection_drainer
+
+        drainer = get_connection_drainer()
+        starting = await async_client.get("/api/v1/health/ready")
+        drainer.mark_ready()
+        ready = await async_client.get("/api/v1/health/ready")
+        drainer.state = "draining"
+        draining = await async_client.get("/api/v1/health/ready")
+
+        assert (starting.status_code, starting.json()) == (503, {"status": "starting"})
+        assert (ready.status_code, ready.json()) == (200, {"status": "ready"})
+        assert (draining.status_code, draining.json()) == (503, {"status": "draining"})
+        assert (await async_client.get("/api/v1/health/live")).status_code == 200
@@ -0,0 +1,166 @@
+"""Unit tests for the load-test harness's parsing, reporting and thresholds."""
+
+import argparse
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from benchmarks.load import (
+    LoadRun,
+    compare,
+    lookup,
+    main,
+    parse_header,
+    parse_mix,
+    passed,
+    percentiles,
+    resolve_baseline,
+)
+
+
+def _args(**overrides: Any) -> argparse.Namespace:
+    values: dict[str, Any] = {
+        "ws_clients": 0,
+        "users": 1,
+        "mix": {"read": 1.0},
+        "ws_path": None,
+        "header": [],
+        "seed": 7,
+    }
+    return argparse.Namespace(**{**values, **overrides})
+
+
+def _summary(read_p99: float, dropped: int) -> dict[str, Any]:
+    return {
+        "rest": {"read": {"latency_ms": {"p99": read_p99}}},
+        "websocket": {"dropped": dropped},
+    }
+
+
+class TestParsing:
+    """--mix and --header values are validated before the run starts."""
+
+    def test_mix_weights(self) -> None:
+        assert parse_mix("read=9, post=1") == {"read": 9.0, "post": 1.0}
+
+    @pytest.mark.parametrize("value", ["write=1", "read", "read=", "read=0,post=0"])
+    def test_invalid_mix_rejected(self, value: str) -> None:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_mix(value)
+
+    def test_header(self) -> None:
+        assert parse_header("Authorization:  Bearer abc ") == ("Authorization", "Bearer abc")
+
+    @pytest.mark.parametrize("value", ["Authorization", ": value"])
+    def test_invalid_header_rejected(self, value: str) -> None:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_header(value)
+
+
+class TestPercentiles:
+    """percentiles() reports p50/p90/p99/max by rank."""
+
+    def test_ranks(self) -> None:
+        assert percentiles([float(i) for i in range(1, 101)]) == {
+            "p50": 50.5,
+            "p90": 91.0,
+            "p99": 100.0,
+            "max": 100.0,
+        }
+
+    def test_empty(self) -> None:
+        assert percentiles([]) is None
+
+
+class TestReport:
+    """Deliveries are matched to posts, and REST outcomes are summed per operation."""
+
+    def test_dropped_counts_sockets_open_at_send(self) -> None:
+        run = LoadRun(_args(ws_clients=3), "http://127.0.0.1:8000")
+        run.connect_ms = [1.0, 2.0, 3.0]
+        # Three sockets were open for the first post, two for the second.
+        run.posted = {"a": (10.0, 3), "b": (20.0, 2)}
+        run.received = {"a": [10.010, 10.020], "b": [20.005, 20.006, 20.007]}
+
+        summary = run.websocket_summary()
+
+        assert summary["expected_deliveries"] == 5
+        assert summary["dropped"] == 1
+        assert summary["connected"] == 3
+        assert summary["delivery_ms"] is not None
+        assert summary["delivery_ms"]["max"] == 20.0
+
+    def test_rest_summary(self) -> None:
+        run = LoadRun(_args(mix={"read": 3.0, "post": 1.0}), "http://127.0.0.1:8000")
+        run.latency_ms["read"] = [1.0, 2.0, 3.0, 4.0]
+        run.outcomes["read"] = Counter({"200": 3, "ReadTimeout": 1})
+
+        summary = run.rest_summary(seconds=2.0)
+
+        assert summary["read"]["requests"] == 4
+        assert summary["read"]["requests_per_second"] == 2.0
+        assert summary["read"]["outcomes"] == {"200": 3, "ReadTimeout": 1}
+        assert summary["post"] == {
+            "requests": 0,
+            "requests_per_second": 0.0,
+            "outcomes": {},
+            "latency_ms": None,
+        }
+
+    def test_compare_reports_change(self) -> None:
+        baseline = {"rest": {"read": {"latency_ms": {"p99": 20.0}}}}
+        current = {"rest": {"read": {"latency_ms": {"p99": 25.0}}}}
+
+        changes = compare(baseline, current)
+
+        assert changes == {
+            "rest.read.latency_ms.p99": {"baseline": 20.0, "current": 25.0, "change_pct": 25.0}
+        }
+        assert lookup(current, "rest.read") is None
+
+    def test_latest_baseline_is_newest_saved_run(self, tmp_path: Path) -> None:
+        for name in ("load-20261001T000000Z-a.json", "load-20261002T000000Z-b.json"):
+            (tmp_path / name).write_text(json.dumps({}))
+
+        assert resolve_baseline("latest", tmp_path) == tmp_path / "load-20261002T000000Z-b.json"
+        assert resolve_baseline("latest", tmp_path / "empty") is None
+
+
+class TestThresholds:
+    """--max-p99-ms and --max-dropped decide whether the run passes."""
+
+    @pytest.mark.parametrize(
+        ("max_p99_ms", "max_dropped", "expected"),
+        [
+            (None, None, True),
+            (100.0, 0, True),
+            (50.0, None, False),
+        ],
+    )
+    def test_limits(
+        self, max_p99_ms: float | None, max_dropped: int | None, expected: bool
+    ) -> None:
+        summary = _summary(read_p99=80.0, dropped=0)
+
+        assert passed(summary, max_p99_ms=max_p99_ms, max_dropped=max_dropped) is expected
+
+    def test_dropped_broadcasts_fail(self) -> None:
+        summary = _summary(read_p99=1.0, dropped=3)
+
+        assert not passed(summary, max_p99_ms=None, max_dropped=0)
+        assert passed(summary, max_p99_ms=None, max_dropped=3)
+
+    def test_operation_without_requests_passes(self) -> None:
+        summary = {"rest": {"post": {"latency_ms": None}}, "websocket": {"dropped": 0}}
+
+        assert passed(summary, max_p99_ms=1.0, max_dropped=None)
+
+    @pytest.mark.parametrize("argv", [["--mix", "read=1,post=1"], ["--ws-clients", "10"]])
+    def test_posts_and_sockets_need_an_explicit_route(self, argv: list[str]) -> None:
+        with pytest.raises(SystemExit) as exc_info:
+            main(argv)
+
+        assert exc_info.value.code == 2
@@ -0,0 +1,57 @@
+"""Unit tests for the application factory."""
+
+from collections.abc import Callable
+
+import pytest
+from fastapi import FastAPI
+
+from app.main import create_app, lifespan
+
+
+class TestCreateApp:
+    """create_app() builds an app with routers and a lifespan hook."""
+
+    def test_create_app_returns_fastapi(self) -> None:
+        assert isinstance(create_app(), FastAPI)
+
+    def test_create_app_registers_health_route(self) -> None:
+        paths = create_app().openapi()["paths"]
+
+        assert "/api/v1/health" in paths
+
+    def test_module_app_is_cached_instance(self) -> None:
+        import app.main
+
+        assert app.main.app is app.main.get_app()
+
+
+class TestLifespan:
+    """lifespan() undoes completed startup steps when a later one fails."""
+
+    async def test_failed_start_stops_what_already_started(
+        self, monkeypatch: pytest.MonkeyPatch, settings_env: Callable[..., None]
+    ) -> None:
+        import app.database
+        import app.services.tasks
+        from app.services.counters import get_counter_aggregator
+        from app.services.presence import get_presence_tracker
+
+        settings_env(DB_POOL_WARMUP="0", FEED_CACHE_SIZE="0", FEED_CACHE_TEAM_SIZE="0")
+        disposed: list[bool] = []
+
+        async def dispose_engine() -> None:
+            disposed.append(True)
+
+        def broken_runner() -> None:
+            raise RuntimeError("task runner unavailable")
+
+        monkeypatch.setattr(app.database, "dispose_engine", dispose_engine)
+        monkeypatch.setattr(app.services.tasks, "get_task_runner", broken_runner)
+
+        with pytest.raises(RuntimeError, match="task runner unavailable"):
+            async with lifespan(create_app()):
+                pass
+
+        assert get_counter_aggregator()._task is None
+        assert get_presence_tracker()._task is None
+        assert disposed == [True]
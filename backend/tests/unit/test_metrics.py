@@ -0,0 +1,118 @@
+"""Unit tests for the in-process metrics registry and its route."""
+
+from collections.abc import Callable
+
+import httpx
+import pytest
+
+from app.metrics import MetricsRegistry, metrics
+
+
+class TestMetricsRegistry:
+    """Counters, gauges and summaries are recorded per label set."""
+
+    def test_counter_accumulates_per_label_set(self) -> None:
+        registry = MetricsRegistry()
+
+        registry.increment("requests", route="a")
+        registry.increment("requests", 2, route="a")
+        registry.increment("requests", route="b")
+
+        assert registry.counter_value("requests", route="a") == 3
+        assert registry.counter_value("requests", route="b") == 1
+        assert registry.counter_value("requests", route="c") == 0
+
+    def test_gauge_keeps_last_value(self) -> None:
+        registry = MetricsRegistry()
+
+        registry.set_gauge("depth", 4, queue="q")
+        registry.set_gauge("depth", 1, queue="q")
+
+        assert registry.gauge_value("depth", queue="q") == 1
+        assert registry.gauge_value("depth", queue="other") is None
+
+    def test_summary_reports_count_sum_and_percentiles(self) -> None:
+        registry = MetricsRegistry()
+
+        for value in range(1, 101):
+            registry.observe("latency", value / 1000)
+
+        stats = registry.summary("latency")
+        assert stats is not None
+        assert stats["count"] == 100
+        assert stats["max"] == 0.1
+        assert 0.049 <= stats["p50"] <= 0.052
+        assert stats["p99"] >= 0.099
+
+    def test_timer_observes_block_duration(self) -> None:
+        registry = MetricsRegistry()
+
+        with registry.timer("block", name="x"):
+            pass
+
+        stats = registry.summary("block", name="x")
+        assert stats is not None
+        assert stats["count"] == 1
+
+    def test_label_order_does_not_matter(self) -> None:
+        registry = MetricsRegistry()
+
+        registry.increment("c", a=1, b=2)
+        registry.increment("c", b=2, a=1)
+
+        assert registry.counter_value("c", a=1, b=2) == 2
+
+    def test_snapshot_and_reset(self) -> None:
+        registry = MetricsRegistry()
+        registry.increment("c", k="v")
+        registry.observe("s", 0.5)
+
+        snap = registry.snapshot()
+        assert snap["counters"] == [{"name": "c", "labels": {"k": "v"}, "value": 1}]
+        assert snap["summaries"][0]["stats"]["count"] == 1
+
+        registry.reset()
+        assert registry.snapshot() == {"counters": [], "gauges": [], "summaries": []}
+
+
+class TestMetricsEndpoint:
+    """GET /api/v1/metrics returns the worker's snapshot to holders of METRICS_TOKEN."""
+
+    @pytest.fixture
+    def metrics_token(self, settings_env: Callable[..., None]) -> str:
+        settings_env(METRICS_TOKEN="metrics-secret")
+        return "metrics-secret"
+
+    async def test_metrics_endpoint_returns_snapshot(
+        self, async_client: httpx.AsyncClient, metrics_token: str
+    ) -> None:
+        metrics.increment("test_metrics_endpoint_total")
+
+        response = await async_client.get(
+            "/api/v1/metrics", headers={"Authorization": f"Bearer {metrics_token}"}
+        )
+
+        assert response.status_code == 200
+        names = {c["name"] for c in response.json()["counters"]}
+        assert "test_metrics_endpoint_total" in names
+
+    async def test_wrong_token_is_rejected(
+        self, async_client: httpx.AsyncClient, metrics_token: str
+    ) -> None:
+        response = await async_client.get(
+            "/api/v1/metrics", headers={"Authorization": "Bearer guess"}
+        )
+
+        assert response.status_code == 401
+
+    async def test_missing_token_is_rejected(
+        self, async_client: httpx.AsyncClient, metrics_token: str
+    ) -> None:
+        response = await async_client.get("/api/v1/metrics")
+
+        assert response.status_code == 401
+
+    async def test_disabled_without_metrics_token(self, async_client: httpx.AsyncClient) -> None:
+        response = await async_client.get("/api/v1/metrics")
+
+        assert response.status_code == 404
@@ -2,7 +2,29 @@
 
 import ast
 import configparser
+import contextlib
+import io
+import logging
+from collections.abc import Callable, Iterator
 from pathlib import Path
+from typing import Any
+
+import pytest
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from app.migrations import (
+    add_constraint,
+    backfill,
+    create_index_concurrently,
+    drop_index_concurrently,
+    format_progress,
+    is_lock_timeout,
+    run_batched,
+)
 
 BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -139,3 +161,340 @@ class TestInitialMigration:
     def test_migration_status_updates_has_category_check_constraint(self) -> None:
         source = self._get_initial_migration_file().read_text()
         assert "ck_status_updates_category" in source
+
+
+class TestMigrationChain:
+    """Every migration after the initial one revises an existing revision."""
+
+    def test_revisions_form_a_single_chain(self) -> None:
+        versions_dir = BACKEND_DIR / "alembic" / "versions"
+        revisions: dict[str, str | None] = {}
+        for path in versions_dir.glob("*.py"):
+            module = ast.parse(path.read_text())
+            values: dict[str, str | None] = {}
+            for node in module.body:
+                if (
+                    isinstance(node, ast.AnnAssign)
+                    and isinstance(node.target, ast.Name)
+                    and node.target.id in ("revision", "down_revision")
+                    and node.value is not None
+                ):
+                    values[node.target.id] = ast.literal_eval(node.value)
+            revisions[str(values["revision"])] = values.get("down_revision")
+
+        heads = set(revisions) - {down for down in revisions.values() if down}
+        roots = [rev for rev, down in revisions.items() if down is None]
+        assert len(heads) == 1
+        assert roots == ["a1b2c3d4e5f6"]
+        assert all(down in revisions for down in revisions.values() if down)
+
+
+@contextlib.contextmanager
+def _sqlite_operations() -> Iterator[Connection]:
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        conn.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY, a INTEGER, b INTEGER)")
+        conn.exec_driver_sql("CREATE TABLE extra (id INTEGER PRIMARY KEY, bonus INTEGER)")
+        conn.execute(
+            text("INSERT INTO items (id, a) VALUES (:id, :a)"),
+            [{"id": i, "a": i} for i in range(1, 26)],
+        )
+        conn.execute(
+            text("INSERT INTO extra (id, bonus) VALUES (:id, 100)"),
+            [{"id": i} for i in range(1, 26)],
+        )
+        conn.commit()
+        with Operations.context(MigrationContext.configure(conn)):
+            yield conn
+
+
+def _offline_sql(run: Callable[[], object]) -> str:
+    buf = io.StringIO()
+    ctx = MigrationContext.configure(
+        dialect_name="postgresql", opts={"as_sql": True, "output_buffer": buf}
+    )
+    with Operations.context(ctx):
+        run()
+    return buf.getvalue()
+
+
+class TestBackfill:
+    """backfill() updates in key-ordered batches that each commit on their own."""
+
+    def test_updates_every_matching_row_in_batches(self) -> None:
+        with _sqlite_operations() as conn:
+            updated = backfill("items", "b = a * 2", where="b IS NULL", batch_size=10, pause=0)
+
+            rows = conn.execute(text("SELECT a, b FROM items")).all()
+        assert updated == 25
+        assert all(b == a * 2 for a, b in rows)
+
+    def test_rerun_skips_rows_already_done(self) -> None:
+        with _sqlite_operations():
+            backfill("items", "b = a", where="id <= 5", batch_size=10, pause=0)
+
+            assert backfill("items", "b = a", where="b IS NULL", batch_size=10, pause=0) == 20
+
+    def test_supports_from_clause(self) -> None:
+        with _sqlite_operations() as conn:
+            backfill(
+                "items",
+                "b = extra.bonus",
+                from_clause="extra",
+                where="extra.id = items.id",
+                batch_size=7,
+                pause=0,
+            )
+
+            assert conn.execute(text("SELECT DISTINCT b FROM items")).scalars().all() == [100]
+
+    def test_reports_progress(self, caplog: pytest.LogCaptureFixture) -> None:
+        with _sqlite_operations(), caplog.at_level(logging.INFO, logger="app.migrations"):
+            backfill("items", "b = a", batch_size=10, pause=0, report_every=0)
+
+        progress = [r.getMessage() for r in caplog.records if "backfill items" in r.getMessage()]
+        assert len(progress) == 4  # three batches and the final summary
+        assert "25 rows scanned, 25 written" in progress[-1]
+
+    def test_offline_mode_emits_single_update(self) -> None:
+        sql = _offline_sql(lambda: backfill("items", "b = a", where="b IS NULL"))
+
+        assert "UPDATE items SET b = a WHERE TRUE AND (b IS NULL)" in sql
+
+    def test_format_progress_with_estimate(self) -> None:
+        message = format_progress(
+            "backfill status_updates", 2_500_000, 2_000_000, 10_000_000, 50.0
+        )
+
+        assert "25% of ~10,000,000" in message
+        assert "50,000 rows/s" in message
+        assert "ETA 150s" in message
+
+
+class TestRunBatched:
+    """run_batched() applies any statement to consecutive key ranges."""
+
+    def test_copies_rows_into_another_table(self) -> None:
+        with _sqlite_operations() as conn:
+            conn.exec_driver_sql("CREATE TABLE copies (id INTEGER PRIMARY KEY, a INTEGER)")
+            conn.commit()
+            written = run_batched(
+                "items",
+                "INSERT INTO copies (id, a) SELECT id, a FROM items WHERE {batch} AND a % 2 = 0",
+                batch_size=10,
+                pause=0,
+            )
+
+            copied = conn.execute(text("SELECT count(*) FROM copies")).scalar_one()
+        assert written == copied == 12
+
+    def test_offline_mode_emits_statement_once(self) -> None:
+        sql = _offline_sql(
+            lambda: run_batched("items", "INSERT INTO copies SELECT * FROM items WHERE {batch}")
+        )
+
+        assert sql.count("INSERT INTO copies") == 1
+        assert "WHERE TRUE" in sql
+
+
+class TestFeedProjectionMigration:
+    """The feed projection is kept by triggers and filled in batches."""
+
+    @pytest.fixture
+    def source(self) -> str:
+        versions_dir = BACKEND_DIR / "alembic" / "versions"
+        return next(versions_dir.glob("*_feed_projection.py")).read_text()
+
+    def test_triggers_cover_posts_profiles_and_counts(self, source: str) -> None:
+        assert "AFTER INSERT ON status_updates" in source
+        assert "AFTER UPDATE OF username, display_name, avatar_url ON users" in source
+        assert "AFTER INSERT OR DELETE ON feed_entries" in source
+        assert 'ondelete="CASCADE"' in source
+
+    def test_existing_rows_copied_in_batches_after_triggers(self, source: str) -> None:
+        upgrade = source[source.index("def upgrade") : source.index("def downgrade")]
+
+        assert upgrade.index("for trigger in TRIGGERS") < upgrade.index("run_batched(")
+        assert "ON CONFLICT (id) DO NOTHING" in upgrade
+        assert "backfill(" in upgrade
+
+    def test_offline_sql_renders_whole_upgrade(self) -> None:
+        import importlib.util
+
+        path = next((BACKEND_DIR / "alembic" / "versions").glob("*_feed_projection.py"))
+        spec = importlib.util.spec_from_file_location("feed_projection", path)
+        assert spec is not None and spec.loader is not None
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        sql = _offline_sql(module.upgrade)
+
+        assert sql.count("CREATE OR REPLACE TRIGGER") == 5
+        assert "INSERT INTO feed_entries" in sql
+
+    def test_schema_statements_can_be_rerun(self) -> None:
+        import importlib.util
+
+        path = next((BACKEND_DIR / "alembic" / "versions").glob("*_feed_projection.py"))
+        spec = importlib.util.spec_from_file_location("feed_projection", path)
+        assert spec is not None and spec.loader is not None
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        sql = _offline_sql(module.upgrade)
+
+        assert "CREATE TABLE IF NOT EXISTS feed_entries" in sql
+        assert "CREATE TABLE IF NOT EXISTS category_daily_counts" in sql
+        assert sql.count("CREATE INDEX IF NOT EXISTS") == 4
+        assert "CREATE FUNCTION" not in sql
+
+
+class TestFeedNotifyMigration:
+    """Status and author changes are announced on the feed_changes channel."""
+
+    def test_notifies_status_and_author_changes(self) -> None:
+        versions_dir = BACKEND_DIR / "alembic" / "versions"
+        source = next(versions_dir.glob("*_feed_notify.py")).read_text()
+
+        assert "pg_notify('feed_changes'" in source
+        assert "AFTER INSERT OR DELETE OR UPDATE OF" in source
+        assert "ON users FOR EACH ROW" in source
+
+
+class TestConcurrentIndexes:
+    """Index helpers run CONCURRENTLY outside the migration transaction."""
+
+    def test_create_index_concurrently_outside_transaction(self) -> None:
+        sql = _offline_sql(
+            lambda: create_index_concurrently("ix_t_created", "t", ["created_at", "id"])
+        )
+
+        assert "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_t_created ON t (created_at, id)" in sql
+        assert sql.index("SET lock_timeout = 0") < sql.index("CREATE INDEX")
+
+    def test_drop_index_concurrently(self) -> None:
+        sql = _offline_sql(lambda: drop_index_concurrently("ix_t_created", "t"))
+
+        assert "DROP INDEX CONCURRENTLY IF EXISTS ix_t_created" in sql
+
+    def test_feed_index_migration_uses_concurrent_helpers(self) -> None:
+        versions_dir = BACKEND_DIR / "alembic" / "versions"
+        source = next(versions_dir.glob("*_status_feed_indexes.py")).read_text()
+
+        assert "create_index_concurrently" in source
+        assert "op.create_index" not in source
+
+
+class TestAddConstraint:
+    """add_constraint() skips a constraint the table already has."""
+
+    def test_adds_only_when_missing(self) -> None:
+        sql = _offline_sql(lambda: add_constraint("t", "uq_t_a", "UNIQUE (a)"))
+
+        assert "WHERE conname = 'uq_t_a' AND conrelid = 't'::regclass" in sql
+        assert "ALTER TABLE t ADD CONSTRAINT uq_t_a UNIQUE (a);" in sql
+
+
+class TestLockTimeoutGuard:
+    """Migrations abort on lock waits instead of queueing behind long transactions."""
+
+    def test_env_sets_lock_timeout_and_per_migration_transactions(self) -> None:
+        env_source = (BACKEND_DIR / "alembic" / "env.py").read_text()
+
+        assert "set_lock_timeout(connection, settings.MIGRATION_LOCK_TIMEOUT_MS)" in env_source
+        assert "transaction_per_migration=True" in env_source
+
+    def test_recognises_lock_not_available(self) -> None:
+        orig = Exception("canceling statement due to lock timeout")
+        orig.sqlstate = "55P03"  # type: ignore[attr-defined]
+
+        assert is_lock_timeout(OperationalError("ALTER TABLE", None, orig))
+        assert not is_lock_timeout(OperationalError("ALTER TABLE", None, Exception("boom")))
+        assert not is_lock_timeout(TimeoutError())
+
+
+class TestTeamsMigration:
+    """Teams are added without rewriting or long-locking the existing tables."""
+
+    @pytest.fixture
+    def module(self) -> Any:
+        import importlib.util
+
+        path = next((BACKEND_DIR / "alembic" / "versions").glob("*_teams.py"))
+        spec = importlib.util.spec_from_file_location("teams", path)
+        assert spec is not None and spec.loader is not None
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    def test_constraints_validated_outside_the_migration_transaction(self, module: Any) -> None:
+        sql = _offline_sql(module.upgrade)
+
+        assert (
+            "ADD COLUMN IF NOT EXISTS team_id UUID DEFAULT '00000000-0000-0000-0000-000000000001'"
+            in sql
+        )
+        for constraint in ("users_team_id_fkey", "fk_status_updates_user_id_team_id"):
+            added = sql.index(f"ADD CONSTRAINT {constraint}")
+            validated = sql.index(f"VALIDATE CONSTRAINT {constraint}")
+            assert "NOT VALID" in sql[added:validated]
+            assert "COMMIT" in sql[added:validated]
+        assert "UNIQUE USING INDEX uq_users_id_team_id" in sql
+
+    def test_statements_before_commits_can_be_rerun(self, module: Any) -> None:
+        sql = _offline_sql(module.upgrade)
+
+        assert "CREATE TABLE IF NOT EXISTS teams" in sql
+        assert "'Default') ON CONFLICT (id) DO NOTHING" in sql
+        assert sql.count("ADD COLUMN IF NOT EXISTS team_id") == 4
+        assert sql.count("IF NOT EXISTS (SELECT 1 FROM pg_constraint") == 3
+
+    def test_team_indexes_built_concurrently(self, module: Any) -> None:
+        sql = _offline_sql(module.upgrade)
+
+        assert sql.count("CREATE INDEX CONCURRENTLY") == len(module.INDEXES)
+        assert "ON users (team_id, xp DESC, username)" in sql
+
+    def test_counts_key_and_upserts_change_together(self, module: Any) -> None:
+        sql = _offline_sql(module.upgrade)
+        first_commit = sql.index("COMMIT")
+
+        assert sql.index("ADD PRIMARY KEY (team_id, day, category)") < first_commit
+        assert sql.index("ON CONFLICT (team_id, day, category)") < first_commit
+        assert "'delete:' || OLD.team_id || ':' || OLD.id" in sql
+
+    def test_downgrade_merges_team_counts(self, module: Any) -> None:
+        sql = _offline_sql(module.downgrade)
+
+        assert "GROUP BY day, category" in sql
+        assert "DROP TABLE teams" in sql
+
+
+class TestCategoryCountShardsMigration:
+    """Each post counts into one of several shard rows picked from its id."""
+
+    @pytest.fixture
+    def module(self) -> Any:
+        import importlib.util
+
+        path = next((BACKEND_DIR / "alembic" / "versions").glob("*_category_count_shards.py"))
+        spec = importlib.util.spec_from_file_location("category_count_shards", path)
+        assert spec is not None and spec.loader is not None
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    def test_key_and_upserts_change_together(self, module: Any) -> None:
+        sql = _offline_sql(module.upgrade)
+
+        assert "ADD COLUMN shard SMALLINT DEFAULT '0' NOT NULL" in sql
+        assert "ADD PRIMARY KEY (team_id, day, category, shard)" in sql
+        assert "COMMIT" not in sql
+        assert f"mod(get_byte(uuid_send(OLD.id), 15), {module.SHARDS})" in sql
+        assert "DO UPDATE SET count = c.count - 1" in sql
+
+    def test_downgrade_merges_shards(self, module: Any) -> None:
+        sql = _offline_sql(module.downgrade)
+
+        assert "GROUP BY team_id, day, category" in sql
+        assert "DROP COLUMN shard" in sql
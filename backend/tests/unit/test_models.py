@@ -5,7 +5,8 @@ from typing import Any
 
 import pytest
 from sqlalchemy import inspect
-from sqlalchemy.schema import ColumnDefault
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import ColumnDefault, CreateTable
 
 from app.database import Base
 from app.models.status import VALID_CATEGORIES, StatusUpdate
@@ -26,6 +27,7 @@ class TestUserModel:
         column_names = {col.key for col in mapper.columns}
         expected = {
             "id",
+            "team_id",
             "username",
             "display_name",
             "email",
@@ -141,7 +143,7 @@ class TestStatusUpdateModel:
     def test_status_update_columns_exist(self) -> None:
         mapper = inspect(StatusUpdate)
         column_names = {col.key for col in mapper.columns}
-        expected = {"id", "user_id", "message", "category", "created_at"}
+        expected = {"id", "user_id", "team_id", "message", "category", "created_at"}
         assert expected == column_names
 
     def test_status_update_id_is_uuid_primary_key(self) -> None:
@@ -259,3 +261,118 @@ class TestModelExports:
         assert hasattr(app.models, "__all__")
         assert "User" in app.models.__all__
         assert "StatusUpdate" in app.models.__all__
+
+
+class TestRateLimitBucketModel:
+    """Tests for the shared rate-limit bucket model."""
+
+    def test_rate_limit_bucket_table_is_unlogged(self) -> None:
+        from app.models import RateLimitBucket
+
+        assert RateLimitBucket.__tablename__ == "rate_limit_buckets"
+        ddl = str(CreateTable(RateLimitBucket.__table__).compile(dialect=postgresql.dialect()))
+        assert ddl.startswith("\nCREATE UNLOGGED TABLE rate_limit_buckets")
+
+    def test_rate_limit_bucket_key_is_primary_key(self) -> None:
+        from app.models import RateLimitBucket
+
+        mapper = inspect(RateLimitBucket)
+        assert mapper.columns["key"].primary_key
+        assert not mapper.columns["tokens"].nullable
+
+
+class TestPresenceModels:
+    """Tests for the shared presence models."""
+
+    def test_presence_tables_are_unlogged(self) -> None:
+        from app.models import PresenceSession, PresenceWorker
+
+        for model in (PresenceWorker, PresenceSession):
+            ddl = str(CreateTable(model.__table__).compile(dialect=postgresql.dialect()))
+            assert ddl.startswith("\nCREATE UNLOGGED TABLE")
+
+    def test_presence_session_cascades_with_worker(self) -> None:
+        from app.models import PresenceSession
+
+        (fk,) = PresenceSession.__table__.c.worker_id.foreign_keys
+        assert fk.ondelete == "CASCADE"
+        assert [c.name for c in PresenceSession.__table__.primary_key] == ["worker_id", "user_id"]
+
+
+class TestStatusUpdateIndexes:
+    """Feed and export scans are backed by (created_at, id) indexes."""
+
+    def test_feed_indexes_declared(self) -> None:
+        indexes = {ix.name: [c.name for c in ix.columns] for ix in StatusUpdate.__table__.indexes}
+
+        assert indexes["ix_status_updates_created_at"] == ["created_at", "id"]
+        assert indexes["ix_status_updates_category_created_at"] == ["category", "created_at", "id"]
+
+
+class TestFeedProjectionModels:
+    """The feed projection is keyed by status and indexed for single range scans."""
+
+    def test_feed_entry_follows_its_status(self) -> None:
+        from app.models import FeedEntry
+
+        (fk,) = FeedEntry.__table__.c.id.foreign_keys
+        assert fk.target_fullname == "status_updates.id"
+        assert fk.ondelete == "CASCADE"
+
+    def test_feed_entry_indexes_end_in_created_at_and_id(self) -> None:
+        from app.models import FeedEntry
+
+        indexes = {ix.name: [c.name for c in ix.columns] for ix in FeedEntry.__table__.indexes}
+
+        assert indexes["ix_feed_entries_created_at"] == ["created_at", "id"]
+        for prefix in ("category", "user_id", "username"):
+            assert indexes[f"ix_feed_entries_{prefix}_created_at"] == [prefix, "created_at", "id"]
+
+    def test_category_daily_counts_keyed_by_team_day_category_and_shard(self) -> None:
+        from app.models import CategoryDailyCount
+
+        assert [c.name for c in CategoryDailyCount.__table__.primary_key] == [
+            "team_id",
+            "day",
+            "category",
+            "shard",
+        ]
+
+
+class TestTeamScoping:
+    """Users, statuses and the projection carry team_id with leading indexes."""
+
+    def test_team_model_exported(self) -> None:
+        from app.models import DEFAULT_TEAM_ID, Team
+
+        assert Team.__tablename__ == "teams"
+        assert inspect(Team).columns["slug"].unique
+        assert repr(Team(id=DEFAULT_TEAM_ID, slug="core")).startswith("Team(id=UUID(")
+
+    def test_team_id_defaults_to_default_team(self) -> None:
+        from app.models import DEFAULT_TEAM_ID
+
+        for model in (User, StatusUpdate):
+            col = model.__table__.c.team_id
+            assert not col.nullable
+            assert col.server_default.arg == str(DEFAULT_TEAM_ID)
+
+    def test_status_team_must_match_author(self) -> None:
+        (fk,) = (
+            c
+            for c in StatusUpdate.__table__.foreign_key_constraints
+            if c.name == "fk_status_updates_user_id_team_id"
+        )
+
+        assert [e.target_fullname for e in fk.elements] == ["users.id", "users.team_id"]
+        assert fk.onupdate == "CASCADE"
+
+    def test_team_indexes_lead_with_team_id(self) -> None:
+        from app.models import FeedEntry
+
+        for table in (User.__table__, StatusUpdate.__table__, FeedEntry.__table__):
+            names = [ix.name for ix in table.indexes if "team_id" in str(ix.name)]
+            assert names
+            for ix in table.indexes:
+                if ix.name in names:
+                    assert next(iter(ix.expressions)).name == "team_id"
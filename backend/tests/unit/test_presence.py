@@ -0,0 +1,292 @@
+"""Unit tests for presence tracking."""
+
+import uuid
+from collections.abc import AsyncGenerator, Hashable, Iterator, Set
+from typing import Any
+
+import httpx
+import pytest
+
+from app.database import get_db
+from app.metrics import metrics
+from app.services.presence import (
+    PresenceRegistry,
+    PresenceTracker,
+    TimingWheel,
+    get_presence_tracker,
+)
+from tests.conftest import FakeClock
+
+
+class FakeStore:
+    """In-memory stand-in for the shared store; ``others`` are users on other workers."""
+
+    def __init__(self, others: set[uuid.UUID] | None = None) -> None:
+        self.others = others or set()
+        self.mine: set[uuid.UUID] = set()
+        self.publishes: list[tuple[set[uuid.UUID], set[uuid.UUID], set[uuid.UUID] | None]] = []
+        self.fail = False
+        self.removed = False
+
+    async def publish(
+        self,
+        joined: Set[uuid.UUID],
+        left: Set[uuid.UUID],
+        everyone: Set[uuid.UUID] | None = None,
+    ) -> None:
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        full = set(everyone) if everyone is not None else None
+        self.publishes.append((set(joined), set(left), full))
+        if full is not None:
+            self.mine = full
+        else:
+            self.mine = (self.mine | joined) - left
+
+    async def collect(self) -> set[uuid.UUID]:
+        return self.mine | self.others
+
+    async def remove(self) -> None:
+        self.removed = True
+
+
+def _tracker(clock: FakeClock, store: FakeStore | None = None) -> PresenceTracker:
+    return PresenceTracker(
+        heartbeat_interval=30.0,
+        missed_heartbeats=2,
+        flush_interval=2.0,
+        store=store,  # type: ignore[arg-type]
+        clock=clock,
+    )
+
+
+class TestTimingWheel:
+    """Keys expire on the first advance at or after their deadline."""
+
+    def test_expires_after_timeout(self) -> None:
+        wheel = TimingWheel(timeout=10.0, tick=1.0, now=0.0)
+        wheel.schedule("a", 0.0)
+
+        assert wheel.advance(9.0) == []
+        assert wheel.advance(10.0) == ["a"]
+        assert len(wheel) == 0
+
+    def test_reschedule_moves_deadline(self) -> None:
+        wheel = TimingWheel(timeout=10.0, tick=1.0, now=0.0)
+        wheel.schedule("a", 0.0)
+        wheel.schedule("a", 5.0)
+
+        assert wheel.advance(12.0) == []
+        assert wheel.advance(15.0) == ["a"]
+
+    def test_cancel_forgets_key(self) -> None:
+        wheel = TimingWheel(timeout=10.0, tick=1.0, now=0.0)
+        wheel.schedule("a", 0.0)
+        wheel.cancel("a")
+
+        assert wheel.advance(100.0) == []
+        assert "a" not in wheel
+
+    def test_long_stall_expires_everything_due_once(self) -> None:
+        wheel = TimingWheel(timeout=5.0, tick=1.0, now=0.0)
+        for i in range(5):
+            wheel.schedule(i, float(i))
+
+        assert sorted(wheel.advance(1000.0)) == [0, 1, 2, 3, 4]  # type: ignore[type-var]
+
+    def test_keeps_keys_scheduled_beyond_one_rotation(self) -> None:
+        wheel = TimingWheel(timeout=10.0, tick=1.0, now=0.0)
+        wheel.schedule("late", 100.0)  # wheel not advanced since t=0
+
+        assert wheel.advance(105.0) == []
+        assert wheel.advance(110.0) == ["late"]
+
+
+class TestPresenceRegistry:
+    """Users are online while they hold at least one live connection."""
+
+    def test_user_online_until_last_connection_closes(self, clock: FakeClock) -> None:
+        registry = PresenceRegistry(timeout=90.0, tick=2.0, clock=clock)
+        user = uuid.uuid4()
+        registry.connect("c1", user)
+        registry.connect("c2", user)
+
+        registry.disconnect("c1")
+        assert user in registry.online_users
+        registry.disconnect("c2")
+        assert user not in registry.online_users
+
+    def test_heartbeat_of_unknown_connection_is_rejected(self, clock: FakeClock) -> None:
+        registry = PresenceRegistry(timeout=90.0, tick=2.0, clock=clock)
+
+        assert not registry.heartbeat("missing")
+        assert not registry.disconnect("missing")
+
+    def test_expire_drops_silent_connections_only(self, clock: FakeClock) -> None:
+        registry = PresenceRegistry(timeout=90.0, tick=2.0, clock=clock)
+        quiet, chatty = uuid.uuid4(), uuid.uuid4()
+        registry.connect("quiet", quiet)
+        registry.connect("chatty", chatty)
+
+        clock.now = 60.0
+        registry.heartbeat("chatty")
+        clock.now = 92.0
+
+        assert registry.expire() == ["quiet"]
+        assert set(registry.online_users) == {chatty}
+
+    def test_drain_collapses_changes_within_one_interval(self, clock: FakeClock) -> None:
+        registry = PresenceRegistry(timeout=90.0, tick=2.0, clock=clock)
+        stays, blips = uuid.uuid4(), uuid.uuid4()
+        registry.connect("a", stays)
+        registry.connect("b", blips)
+        registry.disconnect("b")
+
+        assert registry.drain() == ({stays}, set())
+        registry.disconnect("a")
+        assert registry.drain() == (set(), {stays})
+        assert registry.drain() == (set(), set())
+
+
+class TestPresenceTracker:
+    """Flushes broadcast one versioned diff per interval."""
+
+    async def test_broadcasts_single_diff_for_many_changes(self, clock: FakeClock) -> None:
+        tracker = _tracker(clock)
+        sent: list[dict[str, Any]] = []
+
+        async def broadcast(message: dict[str, Any]) -> None:
+            sent.append(message)
+
+        tracker.broadcast = broadcast
+        users = [uuid.uuid4() for _ in range(3)]
+        for i, user in enumerate(users):
+            tracker.registry.connect(i, user)
+
+        await tracker.flush()
+        assert await tracker.flush() is None
+
+        assert len(sent) == 1
+        assert sent[0]["type"] == "presence"
+        assert sent[0]["version"] == 1
+        assert sent[0]["online"] == sorted(str(u) for u in users)
+        assert tracker.snapshot()["online"] == sent[0]["online"]
+
+    async def test_expired_connections_are_reported_and_go_offline(self, clock: FakeClock) -> None:
+        tracker = _tracker(clock)
+        closed: list[Hashable] = []
+
+        async def on_expired(connections: list[Hashable]) -> None:
+            closed.extend(connections)
+
+        tracker.on_expired = on_expired
+        user = uuid.uuid4()
+        tracker.registry.connect("c1", user)
+        await tracker.flush()
+
+        clock.now = 100.0
+        diff = await tracker.flush()
+
+        assert closed == ["c1"]
+        assert diff is not None
+        assert diff.offline == {user}
+        assert not tracker.is_online(user)
+
+    async def test_aggregates_users_from_other_workers(self, clock: FakeClock) -> None:
+        remote = uuid.uuid4()
+        store = FakeStore(others={remote})
+        tracker = _tracker(clock, store)
+        local = uuid.uuid4()
+        tracker.registry.connect("c1", local)
+
+        diff = await tracker.flush()
+
+        assert diff is not None
+        assert diff.online == {local, remote}
+        assert store.publishes == [({local}, set(), {local})]  # first flush is a full sync
+
+    async def test_failed_publish_keeps_local_view_and_resyncs(self, clock: FakeClock) -> None:
+        store = FakeStore()
+        tracker = _tracker(clock, store)
+        first, second = uuid.uuid4(), uuid.uuid4()
+        await tracker.flush()
+
+        store.fail = True
+        tracker.registry.connect("c1", first)
+        await tracker.flush()
+        assert tracker.is_online(first)
+        assert metrics.counter_value("presence_publish_failures_total") == 1
+
+        store.fail = False
+        tracker.registry.connect("c2", second)
+        await tracker.flush()
+        assert store.publishes[-1][2] == {first, second}
+        assert store.mine == {first, second}
+
+    async def test_stop_withdraws_worker(self, clock: FakeClock) -> None:
+        store = FakeStore()
+        tracker = _tracker(clock, store)
+
+        await tracker.stop()
+
+        assert store.removed
+
+    async def test_ten_thousand_users_expire_in_one_diff(self, clock: FakeClock) -> None:
+        tracker = _tracker(clock)
+        users = [uuid.uuid4() for _ in range(10_000)]
+        for i, user in enumerate(users):
+            tracker.registry.connect(i, user)
+        await tracker.flush()
+
+        clock.now = 60.0
+        for i in range(0, 10_000, 2):
+            assert tracker.registry.heartbeat(i)
+        clock.now = 92.0
+        diff = await tracker.flush()
+
+        assert diff is not None
+        assert len(diff.offline) == 5_000
+        assert tracker.registry.connection_count == 5_000
+
+
+@pytest.fixture
+def _no_db() -> Iterator[None]:
+    from app.main import app
+
+    async def fake_db() -> AsyncGenerator[None]:
+        yield None
+
+    app.dependency_overrides[get_db] = fake_db
+    yield
+    app.dependency_overrides.pop(get_db)
+
+
+@pytest.mark.usefixtures("_no_db")
+class TestPresenceRoute:
+    """GET /api/v1/presence returns one team's part of the current snapshot."""
+
+    async def test_presence_snapshot(
+        self, async_client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        team, other = uuid.UUID(int=100), uuid.UUID(int=200)
+        users = {uuid.UUID(int=1): team, uuid.UUID(int=2): other, uuid.UUID(int=3): team}
+
+        async def fake_teams(session: Any, user_ids: list[uuid.UUID]) -> dict[uuid.UUID, Any]:
+            return {u: users[u] for u in user_ids}
+
+        monkeypatch.setattr("app.api.routes.presence.fetch_user_teams", fake_teams)
+        get_presence_tracker()._online = set(users)
+
+        response = await async_client.get("/api/v1/presence", params={"team_id": str(team)})
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "type": "presence_snapshot",
+            "version": 0,
+            "online": [str(uuid.UUID(int=1)), str(uuid.UUID(int=3))],
+        }
+
+    async def test_requires_team_id(self, async_client: httpx.AsyncClient) -> None:
+        response = await async_client.get("/api/v1/presence")
+
+        assert response.status_code == 422
@@ -0,0 +1,27 @@
+"""Unit tests for the startup import-time profiler."""
+
+from app.profiling import ImportTiming, parse_importtime
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:        80 |        200 | encodings
+import time:       300 |        300 |     fastapi.routing
+not an importtime line
+"""
+
+
+class TestParseImporttime:
+    """parse_importtime() turns -X importtime output into structured rows."""
+
+    def test_skips_header_and_foreign_lines(self) -> None:
+        timings = parse_importtime(SAMPLE)
+
+        assert [t.module for t in timings] == ["_io", "encodings", "fastapi.routing"]
+
+    def test_parses_costs_and_depth(self) -> None:
+        timings = parse_importtime(SAMPLE)
+
+        assert timings[0] == ImportTiming("_io", self_us=120, cumulative_us=120, depth=1)
+        assert timings[1].depth == 0
+        assert timings[2].depth == 2
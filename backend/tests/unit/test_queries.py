@@ -0,0 +1,223 @@
+"""Unit tests for the hot-query catalog."""
+
+import uuid
+from collections.abc import Callable
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import queries
+from app.config import Settings
+from app.database import statement_connect_args
+from app.metrics import metrics
+
+
+def _sql(stmt: Any) -> str:
+    return str(stmt.compile(dialect=postgresql.asyncpg.dialect()))
+
+
+class TestFeedFilters:
+    """FeedFilters exposes active filter names and their bound values."""
+
+    def test_no_filters_active_by_default(self) -> None:
+        assert queries.FeedFilters().active == ()
+        assert queries.FeedFilters().params() == {}
+
+    def test_active_filters_in_stable_order(self) -> None:
+        since = datetime(2026, 1, 1, tzinfo=UTC)
+        filters = queries.FeedFilters(since=since, category="done", username="")
+
+        assert filters.active == ("username", "category", "since")
+        assert filters.params() == {"username": "", "category": "done", "since": since}
+
+
+class TestCatalogStatements:
+    """Catalog statements are built once and render parameterised SQL."""
+
+    def test_feed_variants_are_cached(self) -> None:
+        assert queries.feed_statement(("category",)) is queries.feed_statement(("category",))
+        assert queries.feed_statement() is not queries.feed_statement(("category",))
+
+    def test_feed_statement_orders_newest_first_with_bound_limit(self) -> None:
+        sql = _sql(queries.feed_statement())
+
+        assert "JOIN users" in sql
+        assert "ORDER BY status_updates.created_at DESC, status_updates.id DESC" in sql
+        assert "LIMIT $1" in sql
+        assert "OFFSET $2" in sql
+
+    def test_feed_statement_applies_each_filter(self) -> None:
+        sql = _sql(queries.feed_statement(("user_id", "username", "category", "since")))
+
+        assert "status_updates.user_id = $" in sql
+        assert "users.username = $" in sql
+        assert "status_updates.category = $" in sql
+        assert "status_updates.created_at > $" in sql
+
+    def test_feed_count_only_joins_users_for_username(self) -> None:
+        assert "JOIN" not in _sql(queries.feed_count_statement(("category",)))
+        assert "JOIN users" in _sql(queries.feed_count_statement(("username",)))
+
+    def test_point_lookups_use_bound_parameters(self) -> None:
+        assert "status_updates.id = $1" in _sql(queries.STATUS_BY_ID)
+        assert "users.username = $1" in _sql(queries.USER_BY_USERNAME)
+        assert "ORDER BY users.xp DESC" in _sql(queries.LEADERBOARD)
+
+
+class TestInstall:
+    """install() registers the cache listener once and records compile time."""
+
+    def test_install_records_compile_time_and_listens(self) -> None:
+        engine = create_async_engine("postgresql+asyncpg://u:p@127.0.0.1:1/db")
+
+        queries.install(engine)
+        queries.install(engine)
+
+        assert event.contains(
+            engine.sync_engine, "before_cursor_execute", queries._record_cache_outcome
+        )
+        for name in ("feed", "status_by_id", "user_by_username", "leaderboard"):
+            stats = metrics.summary("db_query_compile_seconds", query=name)
+            assert stats is not None
+            assert stats["count"] == 2
+
+    @pytest.mark.parametrize(("cache_hit", "result"), [(CACHE_HIT, "hit"), (CACHE_MISS, "miss")])
+    def test_cache_outcome_counted_for_catalog_queries(self, cache_hit: Any, result: str) -> None:
+        context: Any = SimpleNamespace(
+            execution_options={"catalog_query": "feed"}, cache_hit=cache_hit
+        )
+
+        queries._record_cache_outcome(None, None, "", None, context, False)  # type: ignore[arg-type]
+
+        assert metrics.counter_value("db_query_compiled_cache_total", query="feed", result=result)
+
+    def test_cache_outcome_ignores_other_statements(self) -> None:
+        context: Any = SimpleNamespace(execution_options={}, cache_hit=CACHE_HIT)
+
+        queries._record_cache_outcome(None, None, "", None, context, False)  # type: ignore[arg-type]
+
+        assert metrics.snapshot()["counters"] == []
+
+
+@pytest.mark.usefixtures("jwt_env")
+class TestStatementConnectArgs:
+    """DB_STATEMENT_MODE selects asyncpg prepared-statement behaviour."""
+
+    def test_prepared_mode_uses_configured_cache_size(self) -> None:
+        s = Settings(_env_file=None, DB_STATEMENT_CACHE_SIZE=250)
+
+        assert statement_connect_args(s) == {"prepared_statement_cache_size": 250}
+
+    def test_pgbouncer_mode_disables_caches_and_uses_unique_names(self) -> None:
+        s = Settings(_env_file=None, DB_STATEMENT_MODE="pgbouncer")
+
+        args = statement_connect_args(s)
+
+        assert args["prepared_statement_cache_size"] == 0
+        assert args["statement_cache_size"] == 0
+        name_func = args["prepared_statement_name_func"]
+        assert name_func() != name_func()
+        assert uuid.UUID(name_func().strip("_").removeprefix("asyncpg_"))
+
+
+class TestExportStatement:
+    """The export statement is unpaginated and oldest first."""
+
+    def test_export_statement_orders_oldest_first_without_limit(self) -> None:
+        sql = _sql(queries.export_statement(("since", "until")))
+
+        assert "ORDER BY status_updates.created_at, status_updates.id" in sql
+        assert "LIMIT" not in sql
+        assert "status_updates.created_at > $1" in sql
+        assert "status_updates.created_at <= $2" in sql
+
+
+class TestFeedProjection:
+    """Projected statements read feed_entries alone, in index order."""
+
+    @pytest.fixture
+    def _projection_on(self, settings_env: Callable[..., None]) -> None:
+        settings_env(FEED_PROJECTION="true")
+
+    def test_projected_feed_is_a_single_table_scan(self) -> None:
+        sql = _sql(queries.feed_statement(("category",), True))
+
+        assert "JOIN" not in sql
+        assert "FROM feed_entries" in sql
+        assert "feed_entries.category = $1" in sql
+        assert "ORDER BY feed_entries.created_at DESC, feed_entries.id DESC" in sql
+        assert "feed_entries.github_ref_count" in sql
+
+    def test_projected_username_filter_needs_no_join(self) -> None:
+        assert "JOIN" not in _sql(queries.feed_statement(("username",), True))
+        assert "JOIN" not in _sql(queries.feed_count_statement(("username",), True))
+        assert "JOIN" not in _sql(queries.export_statement(("username",), True))
+
+    def test_projected_rows_keep_feed_keys(self) -> None:
+        keys = [c.key for c in queries.PROJECTED_FEED_COLUMNS]
+
+        assert keys[: len(queries.FEED_COLUMNS)] == [c.key for c in queries.FEED_COLUMNS]
+        assert "feed_entries.id = $1" in _sql(queries.PROJECTED_STATUS_BY_ID)
+
+    @pytest.mark.usefixtures("_projection_on")
+    def test_warmup_follows_setting(self) -> None:
+        warmup = queries._warmup()
+
+        assert warmup["feed"][0] is queries.feed_statement((), True)
+        assert warmup["status_by_id"][0] is queries.PROJECTED_STATUS_BY_ID
+
+    def test_category_counts_scan_a_day_range(self) -> None:
+        sql = _sql(queries.TEAM_CATEGORY_DAILY_COUNTS)
+
+        assert "category_daily_counts.day BETWEEN $2::DATE AND $3::DATE" in sql
+        assert "ORDER BY category_daily_counts.day, category_daily_counts.category" in sql
+
+
+class TestTeamScoping:
+    """Team-scoped statements filter on team_id, which leads their indexes."""
+
+    def test_team_filter_comes_first(self) -> None:
+        team_id = uuid.uuid4()
+        filters = queries.FeedFilters(category="done", team_id=team_id)
+
+        assert filters.active == ("team_id", "category")
+        assert "status_updates.team_id = $1" in _sql(queries.feed_statement(filters.active))
+        assert "feed_entries.team_id = $1" in _sql(queries.feed_statement(filters.active, True))
+
+    def test_team_leaderboard_and_counts(self) -> None:
+        leaderboard = _sql(queries.TEAM_LEADERBOARD)
+
+        assert "WHERE users.team_id = $1::UUID ORDER BY users.xp DESC" in leaderboard
+        team_counts = _sql(queries.TEAM_CATEGORY_DAILY_COUNTS)
+        by_day = "GROUP BY category_daily_counts.day, category_daily_counts.category"
+
+        assert "category_daily_counts.team_id = $1" in team_counts
+        assert "sum(category_daily_counts.count)" in team_counts
+        assert by_day in team_counts
+
+    async def test_fetch_leaderboard_picks_team_statement(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        calls: list[tuple[str, dict[str, Any]]] = []
+
+        async def fake_execute(session: Any, name: str, stmt: Any, params: Any) -> list[Any]:
+            calls.append((name, params))
+            return []
+
+        monkeypatch.setattr(queries, "_execute", fake_execute)
+        team_id = uuid.uuid4()
+
+        await queries.fetch_leaderboard(None, limit=5)  # type: ignore[arg-type]
+        await queries.fetch_leaderboard(None, limit=5, team_id=team_id)  # type: ignore[arg-type]
+        assert await queries.fetch_user_teams(None, []) == {}  # type: ignore[arg-type]
+
+        assert calls == [
+            ("leaderboard", {"limit": 5}),
+            ("team_leaderboard", {"team_id": team_id, "limit": 5}),
+        ]
@@ -0,0 +1,249 @@
+"""Unit tests for token-bucket rate limiting."""
+
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import Settings
+from app.metrics import metrics
+from app.rate_limit import (
+    _SHARED_CONSUME,
+    _SHARED_PRUNE,
+    PostgresTokenBucketStore,
+    Rate,
+    RateLimiter,
+    TokenBucketStore,
+    parse_rate,
+    rate_limit,
+)
+from tests.conftest import FakeClock
+
+
+class RecordingEngine:
+    """Fake engine whose statements each report ``rowcount`` deleted rows."""
+
+    def __init__(self, rowcount: int = 0) -> None:
+        self.rowcount = rowcount
+        self.calls: list[dict[str, Any]] = []
+
+    @contextlib.asynccontextmanager
+    async def begin(self) -> AsyncIterator["RecordingEngine"]:
+        yield self
+
+    async def execute(self, statement: Any, params: dict[str, Any]) -> Any:
+        self.calls.append(params)
+        return type("Result", (), {"rowcount": self.rowcount})()
+
+
+def _settings(**overrides: Any) -> Settings:
+    return Settings(_env_file=None, JWT_SECRET="test-secret", **overrides)
+
+
+class TestParseRate:
+    """Rates are '<count>/<period>' or 'off'."""
+
+    @pytest.mark.parametrize(
+        ("value", "capacity", "per_second"),
+        [("5/minute", 5, 5 / 60), ("2/second", 2, 2.0), ("24/day", 24, 24 / 86400)],
+    )
+    def test_parses_count_and_period(self, value: str, capacity: int, per_second: float) -> None:
+        assert parse_rate(value) == Rate(capacity=capacity, per_second=per_second)
+
+    def test_off_disables(self) -> None:
+        assert parse_rate("off") is None
+
+    @pytest.mark.parametrize("value", ["", "5", "0/minute", "5/fortnight", "-1/second"])
+    def test_rejects_malformed(self, value: str) -> None:
+        with pytest.raises(ValueError):
+            parse_rate(value)
+
+
+class TestTokenBucketStore:
+    """Buckets allow bursts up to capacity and refill continuously."""
+
+    def test_allows_burst_then_denies_with_retry_after(self, clock: FakeClock) -> None:
+        store = TokenBucketStore(max_keys=10, clock=clock)
+        rate = Rate(capacity=3, per_second=1.0)
+
+        results = [store.consume("k", rate).allowed for _ in range(4)]
+
+        assert results == [True, True, True, False]
+        denied = store.consume("k", rate)
+        assert denied.retry_after == pytest.approx(1.0)
+
+    def test_refills_over_time_up_to_capacity(self, clock: FakeClock) -> None:
+        store = TokenBucketStore(max_keys=10, clock=clock)
+        rate = Rate(capacity=2, per_second=0.5)
+        store.consume("k", rate)
+        store.consume("k", rate)
+
+        clock.now += 2.0
+        assert store.consume("k", rate).allowed
+        assert not store.consume("k", rate).allowed
+
+        clock.now += 3600
+        assert store.consume("k", rate).remaining == pytest.approx(1.0)
+
+    def test_keys_are_independent(self, clock: FakeClock) -> None:
+        store = TokenBucketStore(max_keys=10, clock=clock)
+        rate = Rate(capacity=1, per_second=0.01)
+
+        assert store.consume("a", rate).allowed
+        assert store.consume("b", rate).allowed
+        assert not store.consume("a", rate).allowed
+
+    def test_evicts_least_recently_used_beyond_max_keys(self, clock: FakeClock) -> None:
+        store = TokenBucketStore(max_keys=2, clock=clock)
+        rate = Rate(capacity=1, per_second=0.01)
+        store.consume("a", rate)
+        store.consume("b", rate)
+        store.consume("a", rate)  # touch "a" so "b" is the oldest
+
+        store.consume("c", rate)
+
+        assert len(store) == 2
+        assert not store.consume("a", rate).allowed  # still tracked, still empty
+        assert store.consume("b", rate).allowed  # evicted, starts full again
+
+
+class TestRateLimiter:
+    """RateLimiter applies per-scope rates from settings and records decisions."""
+
+    async def test_disabled_scope_always_allows(self) -> None:
+        limiter = RateLimiter(_settings(RATE_LIMIT_LOGIN="off"))
+
+        for _ in range(20):
+            assert (await limiter.check("login", "ip:1")).allowed
+
+    async def test_records_decisions(self) -> None:
+        limiter = RateLimiter(_settings(RATE_LIMIT_LOGIN="1/minute"))
+
+        await limiter.check("login", "ip:1")
+        await limiter.check("login", "ip:1")
+
+        assert metrics.counter_value(
+            "rate_limit_decisions_total", scope="login", decision="allowed"
+        )
+        assert metrics.counter_value(
+            "rate_limit_decisions_total", scope="login", decision="denied"
+        )
+
+    def test_postgres_backend_requires_engine(self) -> None:
+        with pytest.raises(ValueError):
+            RateLimiter(_settings(RATE_LIMIT_BACKEND="postgres"))
+
+    def test_settings_reject_malformed_rate(self) -> None:
+        with pytest.raises(ValueError):
+            _settings(RATE_LIMIT_EXPORT="lots")
+
+
+class TestPostgresTokenBucketStore:
+    """The shared store is fronted by the local store and fails open."""
+
+    async def test_local_denial_skips_database(self, clock: FakeClock) -> None:
+        local = TokenBucketStore(max_keys=10, clock=clock)
+        rate = Rate(capacity=1, per_second=0.01)
+        local.consume("k", rate)
+        store = PostgresTokenBucketStore(engine=None, local=local)  # type: ignore[arg-type]
+
+        assert not (await store.consume("k", rate)).allowed
+
+    async def test_database_failure_falls_back_to_local_decision(self) -> None:
+        engine = create_async_engine("postgresql+asyncpg://u:p@127.0.0.1:1/unreachable")
+        store = PostgresTokenBucketStore(engine, TokenBucketStore(max_keys=10))
+
+        try:
+            decision = await store.consume("k", Rate(capacity=2, per_second=1.0))
+        finally:
+            await engine.dispose()
+
+        assert decision.allowed
+        assert metrics.counter_value("rate_limit_backend_errors_total") == 1
+
+    def test_shared_statement_is_single_typed_upsert(self) -> None:
+        sql = str(_SHARED_CONSUME.compile(dialect=postgresql.asyncpg.dialect()))
+
+        assert "ON CONFLICT (key) DO UPDATE" in sql
+        assert "$2::FLOAT" in sql
+        assert "RETURNING tokens" in sql
+
+
+class TestPruning:
+    """Shared buckets that have refilled are deleted periodically."""
+
+    def test_prune_statement_deletes_refilled_buckets_of_one_scope(self) -> None:
+        sql = str(_SHARED_PRUNE.compile(dialect=postgresql.asyncpg.dialect()))
+
+        assert sql.strip().startswith("DELETE FROM rate_limit_buckets")
+        assert "starts_with(key, $1::VARCHAR)" in sql
+        assert ">= $3::FLOAT" in sql
+
+    async def test_prune_runs_once_per_scope(self) -> None:
+        engine = RecordingEngine(rowcount=2)
+        store = PostgresTokenBucketStore(engine, TokenBucketStore(max_keys=10))  # type: ignore[arg-type]
+        rates = {"login": Rate(capacity=5, per_second=5 / 60), "export": None}
+
+        assert await store.prune(rates) == 4
+
+        assert engine.calls == [
+            {"prefix": "login:", "capacity": 5, "per_second": 5 / 60},
+            {"prefix": "export:", "capacity": 0.0, "per_second": 0.0},
+        ]
+        assert metrics.counter_value("rate_limit_pruned_total") == 4
+
+    async def test_memory_backend_has_nothing_to_prune(self) -> None:
+        limiter = RateLimiter(_settings())
+
+        limiter.start()
+
+        assert limiter._task is None
+        assert await limiter.prune() == 0
+
+    async def test_postgres_backend_prunes_every_interval(self) -> None:
+        engine = RecordingEngine()
+        limiter = RateLimiter(
+            _settings(RATE_LIMIT_BACKEND="postgres", RATE_LIMIT_PRUNE_INTERVAL_SECONDS=0.01),
+            engine,  # type: ignore[arg-type]
+        )
+        limiter.start()
+        try:
+            for _ in range(50):
+                if len(engine.calls) >= 2 * len(limiter.rates):
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await limiter.stop()
+
+        assert len(engine.calls) >= 2 * len(limiter.rates)
+        assert limiter._task is None
+
+
+class TestRateLimitDependency:
+    """rate_limit(scope) answers 429 with Retry-After once exhausted."""
+
+    async def test_returns_429_after_limit(self) -> None:
+        app = FastAPI()
+
+        @app.post("/login", dependencies=[Depends(rate_limit("login"))])
+        async def login() -> dict[str, str]:
+            return {"ok": "yes"}
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            codes = [(await client.post("/login")).status_code for _ in range(6)]
+            limited = await client.post("/login")
+
+        assert codes == [200] * 5 + [429]
+        assert int(limited.headers["retry-after"]) >= 1
+
+    def test_unknown_scope_rejected(self) -> None:
+        with pytest.raises(ValueError):
+            rate_limit("nope")
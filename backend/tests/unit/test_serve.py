@@ -0,0 +1,40 @@
+"""Unit tests for the multi-worker serving entry point."""
+
+from typing import Any
+
+import pytest
+
+from app import serve
+
+
+class TestDefaultWorkers:
+    """default_workers() prefers WEB_CONCURRENCY over the CPU count."""
+
+    def test_web_concurrency(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("WEB_CONCURRENCY", "3")
+
+        assert serve.default_workers() == 3
+
+    def test_cpu_count(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+        monkeypatch.setattr(serve.os, "cpu_count", lambda: 6)
+
+        assert serve.default_workers() == 6
+
+
+class TestMain:
+    """main() runs uvicorn's supervisor with the drain-friendly timeouts."""
+
+    def test_passes_options_to_uvicorn(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        calls: list[tuple[str, dict[str, Any]]] = []
+        monkeypatch.setattr(serve.uvicorn, "run", lambda app, **kw: calls.append((app, kw)))
+
+        assert serve.main(["--workers", "4", "--port", "9000", "--graceful-timeout", "12"]) == 0
+
+        [(app, options)] = calls
+        assert app == "app.main:app"
+        assert options["workers"] == 4
+        assert options["port"] == 9000
+        assert options["timeout_graceful_shutdown"] == 12
+        assert options["timeout_worker_healthcheck"] == 30
+        assert options["factory"] is False
@@ -0,0 +1,66 @@
+"""Unit tests for the dashboard statistics routes."""
+
+import uuid
+from collections.abc import AsyncGenerator, Iterator
+from datetime import date
+from typing import Any
+
+import httpx
+import pytest
+
+from app.database import get_db
+
+TEAM = uuid.UUID(int=100)
+
+
+@pytest.fixture
+def _no_db() -> Iterator[None]:
+    from app.main import app
+
+    async def fake_db() -> AsyncGenerator[None]:
+        yield None
+
+    app.dependency_overrides[get_db] = fake_db
+    yield
+    app.dependency_overrides.pop(get_db)
+
+
+@pytest.mark.usefixtures("_no_db")
+class TestCategoryCountsEndpoint:
+    """GET /api/v1/stats/categories reads the per-day counter table."""
+
+    async def test_returns_rows_for_range(
+        self, async_client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        seen: dict[str, Any] = {}
+
+        async def fake_fetch(
+            session: Any, *, team_id: uuid.UUID, since: date, until: date
+        ) -> list[dict[str, Any]]:
+            seen.update(team_id=team_id, since=since, until=until)
+            return [{"day": since, "category": "done", "count": 3}]
+
+        monkeypatch.setattr("app.api.routes.stats.fetch_category_counts", fake_fetch)
+
+        response = await async_client.get(
+            "/api/v1/stats/categories",
+            params={"team_id": str(TEAM), "since": "2026-10-01", "until": "2026-10-07"},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == [{"day": "2026-10-01", "category": "done", "count": 3}]
+        assert seen == {"team_id": TEAM, "since": date(2026, 10, 1), "until": date(2026, 10, 7)}
+
+    async def test_requires_team_id(self, async_client: httpx.AsyncClient) -> None:
+        response = await async_client.get("/api/v1/stats/categories")
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["query", "team_id"]
+
+    async def test_rejects_inverted_range(self, async_client: httpx.AsyncClient) -> None:
+        response = await async_client.get(
+            "/api/v1/stats/categories",
+            params={"team_id": str(TEAM), "since": "2026-10-08", "until": "2026-10-01"},
+        )
+
+        assert response.status_code == 422
@@ -0,0 +1,207 @@
+"""Unit tests for the supervised background task runner."""
+
+import asyncio
+import random
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+from app.metrics import metrics
+from app.services.tasks import (
+    DEFAULT_QUEUES,
+    Job,
+    Priority,
+    QueueSpec,
+    TaskQueue,
+    TaskRunner,
+    get_task_runner,
+    retry_delay,
+)
+
+
+def _runner(
+    concurrency: int = 1, max_attempts: int = 1, max_size: int = 100, drain_timeout: float = 1.0
+) -> TaskRunner:
+    return TaskRunner.from_specs(
+        {"q": QueueSpec(concurrency=concurrency, max_attempts=max_attempts)},
+        max_size=max_size,
+        retry_base=0.001,
+        retry_cap=0.001,
+        drain_timeout=drain_timeout,
+    )
+
+
+def _recorder(log: list[str], label: str) -> Callable[[], Awaitable[None]]:
+    async def job() -> None:
+        log.append(label)
+
+    return job
+
+
+class TestRetryDelay:
+    """retry_delay() draws full-jitter delays under an exponential cap."""
+
+    def test_delay_stays_under_growing_cap(self) -> None:
+        rng = random.Random(7)
+
+        for attempt, cap in ((1, 0.5), (2, 1.0), (3, 2.0), (10, 30.0)):
+            delays = [retry_delay(attempt, 0.5, 30.0, rng) for _ in range(200)]
+            assert all(0.0 <= d <= cap for d in delays)
+            assert max(delays) > cap / 2
+
+
+class TestTaskQueue:
+    """TaskQueue orders by priority and sheds low-priority work when full."""
+
+    def _queue(self, max_size: int) -> TaskQueue:
+        return TaskQueue(
+            "q",
+            QueueSpec(concurrency=1, max_attempts=1),
+            max_size=max_size,
+            retry_base=0,
+            retry_cap=0,
+        )
+
+    def _job(self, name: str, priority: Priority) -> Job:
+        async def noop() -> None:
+            return None
+
+        return Job(func=noop, name=name, priority=priority, enqueued_at=0.0)
+
+    def test_full_queue_sheds_newest_lower_priority_job(self) -> None:
+        queue = self._queue(max_size=2)
+        queue.put(self._job("low-1", Priority.LOW))
+        queue.put(self._job("low-2", Priority.LOW))
+
+        assert queue.put(self._job("high", Priority.HIGH))
+
+        assert len(queue) == 2
+        assert [queue._pop().name, queue._pop().name] == ["high", "low-1"]
+        assert metrics.counter_value("task_shed_total", queue="q", priority="LOW") == 1
+
+    def test_full_queue_sheds_new_job_without_lower_priority_work(self) -> None:
+        queue = self._queue(max_size=1)
+        queue.put(self._job("normal", Priority.NORMAL))
+
+        assert not queue.put(self._job("another", Priority.NORMAL))
+        assert not queue.put(self._job("low", Priority.LOW))
+
+        assert len(queue) == 1
+        assert metrics.counter_value("task_shed_total", queue="q", priority="NORMAL") == 1
+        assert metrics.counter_value("task_shed_total", queue="q", priority="LOW") == 1
+
+
+class TestTaskRunner:
+    """TaskRunner runs, retries and drains jobs within each queue's limits."""
+
+    async def test_runs_jobs_in_priority_order(self) -> None:
+        runner = _runner()
+        log: list[str] = []
+        runner.start()
+        gate = asyncio.Event()
+        runner.submit("q", gate.wait, name="gate")
+        await asyncio.sleep(0)
+        runner.submit("q", _recorder(log, "low"), priority=Priority.LOW)
+        runner.submit("q", _recorder(log, "normal"))
+        runner.submit("q", _recorder(log, "high"), priority=Priority.HIGH)
+        gate.set()
+
+        await runner.stop()
+
+        assert log == ["high", "normal", "low"]
+
+    async def test_concurrency_is_bounded_per_queue(self) -> None:
+        runner = _runner(concurrency=3)
+        active = peak = 0
+
+        async def job() -> None:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.001)
+            active -= 1
+
+        runner.start()
+        for _ in range(20):
+            runner.submit("q", job)
+        await runner.stop()
+
+        assert peak == 3
+        assert metrics.summary("task_run_seconds", queue="q")["count"] == 20  # type: ignore[index]
+
+    async def test_failed_job_is_retried_until_it_succeeds(self) -> None:
+        runner = _runner(max_attempts=3)
+        calls = 0
+
+        async def flaky() -> None:
+            nonlocal calls
+            calls += 1
+            if calls < 3:
+                raise ConnectionError("GitHub unavailable")
+
+        runner.start()
+        runner.submit("q", flaky)
+        await runner.stop()
+
+        assert calls == 3
+        assert metrics.counter_value("task_retries_total", queue="q") == 2
+        assert metrics.counter_value("task_failures_total", queue="q") == 0
+
+    async def test_job_fails_after_max_attempts(self) -> None:
+        runner = _runner(max_attempts=2)
+
+        async def broken() -> None:
+            raise ValueError("bad payload")
+
+        runner.start()
+        runner.submit("q", broken)
+        await runner.stop()
+
+        assert metrics.counter_value("task_failures_total", queue="q") == 1
+
+    async def test_stop_cancels_jobs_still_running_after_drain_timeout(self) -> None:
+        runner = _runner(drain_timeout=0.01)
+        cancelled = asyncio.Event()
+
+        async def stuck() -> None:
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        runner.start()
+        runner.submit("q", stuck)
+        runner.submit("q", stuck)
+        await asyncio.sleep(0)
+
+        assert await runner.stop() == 2
+        assert cancelled.is_set()
+        assert metrics.counter_value("task_dropped_total", queue="q") == 2
+
+    async def test_rejects_jobs_when_not_running(self) -> None:
+        runner = _runner()
+        log: list[str] = []
+
+        assert not runner.submit("q", _recorder(log, "early"))
+        runner.start()
+        await runner.stop()
+        assert not runner.submit("q", _recorder(log, "late"))
+
+        assert log == []
+        assert metrics.counter_value("task_rejected_total", queue="q") == 2
+
+    def test_unknown_queue_raises(self) -> None:
+        with pytest.raises(KeyError, match="unknown task queue"):
+            _runner().submit("nope", _recorder([], "x"))
+
+
+class TestGetTaskRunner:
+    """get_task_runner() builds the default queues from settings."""
+
+    def test_builds_default_queues(self) -> None:
+        runner = get_task_runner()
+
+        assert set(runner.queues) == set(DEFAULT_QUEUES)
+        assert runner is get_task_runner()
+        assert DEFAULT_QUEUES["broadcast"].max_attempts == 1